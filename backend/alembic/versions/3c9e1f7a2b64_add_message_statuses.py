@@ -0,0 +1,40 @@
+"""Add message_statuses
+
+Revision ID: 3c9e1f7a2b64
+Revises: 82fd251154db
+Create Date: 2026-10-17 10:12:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9e1f7a2b64'
+down_revision: Union[str, None] = '82fd251154db'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('message_statuses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('message_id', sa.String(), nullable=False),
+    sa.Column('recipient_id', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('pricing_category', sa.String(), nullable=True),
+    sa.Column('error_code', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('message_id', 'status', name='uq_message_statuses_message_id_status')
+    )
+    op.create_index(op.f('ix_message_statuses_recipient_id'), 'message_statuses', ['recipient_id'], unique=False)
+    op.create_index(op.f('ix_message_statuses_timestamp'), 'message_statuses', ['timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_message_statuses_timestamp'), table_name='message_statuses')
+    op.drop_index(op.f('ix_message_statuses_recipient_id'), table_name='message_statuses')
+    op.drop_table('message_statuses')
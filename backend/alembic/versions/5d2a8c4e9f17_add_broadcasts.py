@@ -0,0 +1,61 @@
+"""Add broadcasts and broadcast_recipients
+
+Revision ID: 5d2a8c4e9f17
+Revises: 3c9e1f7a2b64
+Create Date: 2026-10-17 11:04:27.906152
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a8c4e9f17'
+down_revision: Union[str, None] = '3c9e1f7a2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('broadcasts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('template_name', sa.String(), nullable=False),
+    sa.Column('language_code', sa.String(), nullable=True),
+    sa.Column('components', sa.JSON(), nullable=True),
+    sa.Column('audience', sa.JSON(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('total', sa.Integer(), nullable=True),
+    sa.Column('sent', sa.Integer(), nullable=True),
+    sa.Column('failed', sa.Integer(), nullable=True),
+    sa.Column('last_customer_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_broadcasts_id'), 'broadcasts', ['id'], unique=False)
+    op.create_index(op.f('ix_broadcasts_user_id'), 'broadcasts', ['user_id'], unique=False)
+    op.create_table('broadcast_recipients',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('broadcast_id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('message_id', sa.String(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['broadcast_id'], ['broadcasts.id'], ),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('broadcast_id', 'customer_id', name='uq_broadcast_recipients_broadcast_id_customer_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('broadcast_recipients')
+    op.drop_index(op.f('ix_broadcasts_user_id'), table_name='broadcasts')
+    op.drop_index(op.f('ix_broadcasts_id'), table_name='broadcasts')
+    op.drop_table('broadcasts')
@@ -0,0 +1,160 @@
+"""Append-only message log and backfill of interaction_history
+
+Revision ID: 9b1e4d7c2a35
+Revises: 5d2a8c4e9f17
+Create Date: 2026-10-17 15:42:08.513774
+
+Copia o interaction_history de cada cliente para messages, em blocos de
+clientes, e reduz a coluna JSON às interações mais recentes. Interações já
+presentes em messages (mais novas que a primeira mensagem gravada do
+cliente) não são copiadas de novo, então a migração pode ser repetida.
+O downgrade não restaura o histórico JSON completo.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1e4d7c2a35'
+down_revision: Union[str, None] = '5d2a8c4e9f17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHUNK_SIZE = 500
+RECENT_INTERACTIONS = 20
+AI_FIELDS = ("intent", "source", "label", "sentiment", "products")
+BASE_FIELDS = ("type", "content", "message_id", "timestamp")
+KNOWN_TYPES = ("message_received", "message_sent", "template_sent")
+
+customers = sa.table(
+    'customers',
+    sa.column('id', sa.Integer),
+    sa.column('interaction_history', sa.JSON)
+)
+messages = sa.table(
+    'messages',
+    sa.column('customer_id', sa.Integer),
+    sa.column('content', sa.Text),
+    sa.column('direction', sa.String),
+    sa.column('message_type', sa.String),
+    sa.column('processed_by_ai', sa.Boolean),
+    sa.column('ai_response', sa.JSON),
+    sa.column('whatsapp_message_id', sa.String),
+    sa.column('details', sa.JSON),
+    sa.column('created_at', sa.DateTime)
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if 'messages' not in sa.inspect(bind).get_table_names():
+        op.create_table('messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('customer_id', sa.Integer(), nullable=True),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('direction', sa.String(), nullable=True),
+        sa.Column('message_type', sa.String(), nullable=True),
+        sa.Column('processed_by_ai', sa.Boolean(), nullable=True),
+        sa.Column('ai_response', sa.JSON(), nullable=True),
+        sa.Column('whatsapp_message_id', sa.String(), nullable=True),
+        sa.Column('details', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_messages_id'), 'messages', ['id'], unique=False)
+    else:
+        columns = {c['name'] for c in sa.inspect(bind).get_columns('messages')}
+        if 'whatsapp_message_id' not in columns:
+            op.add_column('messages', sa.Column('whatsapp_message_id', sa.String(), nullable=True))
+        if 'details' not in columns:
+            op.add_column('messages', sa.Column('details', sa.JSON(), nullable=True))
+
+    op.create_index('ix_messages_customer_id_created_at', 'messages', ['customer_id', 'created_at'], unique=False)
+    op.create_index(op.f('ix_messages_whatsapp_message_id'), 'messages', ['whatsapp_message_id'], unique=False)
+
+    backfill(bind)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_messages_whatsapp_message_id'), table_name='messages')
+    op.drop_index('ix_messages_customer_id_created_at', table_name='messages')
+    op.drop_column('messages', 'details')
+    op.drop_column('messages', 'whatsapp_message_id')
+
+
+def backfill(bind) -> None:
+    last_id = 0
+    while True:
+        chunk = bind.execute(
+            sa.select(customers.c.id, customers.c.interaction_history)
+            .where(customers.c.id > last_id, customers.c.interaction_history.isnot(None))
+            .order_by(customers.c.id)
+            .limit(CHUNK_SIZE)
+        ).all()
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+
+        # Primeira mensagem já gravada de cada cliente do bloco
+        earliest = dict(bind.execute(
+            sa.select(messages.c.customer_id, sa.func.min(messages.c.created_at))
+            .where(messages.c.customer_id.in_([row.id for row in chunk]))
+            .group_by(messages.c.customer_id)
+        ).all())
+
+        rows = []
+        updates = []
+        for customer_id, history in chunk:
+            if isinstance(history, dict):
+                history = [history]
+            history = [item for item in history or [] if isinstance(item, dict)]
+            cutoff = earliest.get(customer_id)
+            for interaction in history:
+                row = to_row(customer_id, interaction)
+                if cutoff is not None and (row['created_at'] is None or row['created_at'] >= cutoff):
+                    continue
+                rows.append(row)
+            updates.append({'b_id': customer_id, 'b_history': history[-RECENT_INTERACTIONS:]})
+
+        if rows:
+            bind.execute(messages.insert(), rows)
+        bind.execute(
+            customers.update()
+            .where(customers.c.id == sa.bindparam('b_id'))
+            .values(interaction_history=sa.bindparam('b_history')),
+            updates
+        )
+
+
+def to_row(customer_id: int, interaction: Dict[str, Any]) -> Dict[str, Any]:
+    # Mesmo mapeamento de app.crud.crud_message.interaction_to_row
+    kind = interaction.get('type')
+    ai_response = {k: interaction[k] for k in AI_FIELDS if interaction.get(k) is not None}
+    details = {
+        k: v for k, v in interaction.items()
+        if k not in BASE_FIELDS and k not in AI_FIELDS and v is not None
+    }
+    if kind not in KNOWN_TYPES:
+        details['type'] = kind
+    return {
+        'customer_id': customer_id,
+        'content': interaction.get('content'),
+        'direction': 'incoming' if kind == 'message_received' else 'outgoing',
+        'message_type': 'template' if kind == 'template_sent' else 'text',
+        'processed_by_ai': ai_response.get('source') in ('llm', 'local', 'fallback'),
+        'ai_response': ai_response or None,
+        'whatsapp_message_id': interaction.get('message_id'),
+        'details': details or None,
+        'created_at': parse_timestamp(interaction.get('timestamp'))
+    }
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,111 @@
+"""Normalize customers.whatsapp_number to E.164, merge duplicates, make it unique
+
+Revision ID: c47a1f9e3d20
+Revises: 9b1e4d7c2a35
+Create Date: 2026-10-17 16:27:51.204419
+
+Clientes com o mesmo número normalizado são unidos no de menor id: as
+mensagens e os destinatários de disparos passam para ele (descartando
+destinatários repetidos no mesmo disparo), e nome, email, datas de criação e
+da última interação são completados com os dos duplicados. O histórico
+recente (interaction_history) do cliente mantido não é alterado; o log
+completo fica em messages. Números sem nenhum dígito ficam como estão (como
+em normalize_whatsapp_number) e entram na união pelo valor exato, para que
+repetições deles também não impeçam o índice único. O downgrade não separa
+os clientes unidos.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a1f9e3d20'
+down_revision: Union[str, None] = '9b1e4d7c2a35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Mesmo critério de app.schemas.customer.normalize_whatsapp_number
+NORMALIZED = r"'+' || regexp_replace(regexp_replace(whatsapp_number, '\D', '', 'g'), '^00', '')"
+DEFAULT_NAME = 'Cliente WhatsApp'
+
+
+def upgrade() -> None:
+    op.execute(f"""
+        CREATE TEMPORARY TABLE customer_merge ON COMMIT DROP AS
+        SELECT id, normalized, min(id) OVER (PARTITION BY normalized) AS keep_id
+        FROM (
+            SELECT id,
+                   CASE WHEN whatsapp_number ~ '\\d' THEN {NORMALIZED}
+                        ELSE whatsapp_number END AS normalized
+            FROM customers
+            WHERE whatsapp_number IS NOT NULL
+        ) numbers
+    """)
+    op.execute("CREATE INDEX ON customer_merge (id)")
+
+    op.execute(f"""
+        UPDATE customers kept SET
+            name = COALESCE(NULLIF(kept.name, '{DEFAULT_NAME}'), merged.name, kept.name),
+            email = COALESCE(kept.email, merged.email),
+            last_interaction = GREATEST(kept.last_interaction, merged.last_interaction),
+            created_at = LEAST(kept.created_at, merged.created_at)
+        FROM (
+            SELECT m.keep_id,
+                   max(NULLIF(c.name, '{DEFAULT_NAME}')) AS name,
+                   max(c.email) AS email,
+                   max(c.last_interaction) AS last_interaction,
+                   min(c.created_at) AS created_at
+            FROM customer_merge m
+            JOIN customers c ON c.id = m.id
+            WHERE m.id <> m.keep_id
+            GROUP BY m.keep_id
+        ) merged
+        WHERE kept.id = merged.keep_id
+    """)
+
+    op.execute("""
+        UPDATE messages SET customer_id = m.keep_id
+        FROM customer_merge m
+        WHERE messages.customer_id = m.id AND m.id <> m.keep_id
+    """)
+
+    # Um destinatário por disparo: fica o do cliente de menor id do grupo
+    op.execute("""
+        DELETE FROM broadcast_recipients r
+        USING customer_merge m
+        WHERE r.customer_id = m.id AND m.id <> m.keep_id
+          AND EXISTS (
+              SELECT 1
+              FROM broadcast_recipients other
+              JOIN customer_merge om ON om.id = other.customer_id
+              WHERE other.broadcast_id = r.broadcast_id
+                AND om.keep_id = m.keep_id
+                AND other.customer_id < r.customer_id
+          )
+    """)
+    op.execute("""
+        UPDATE broadcast_recipients SET customer_id = m.keep_id
+        FROM customer_merge m
+        WHERE broadcast_recipients.customer_id = m.id AND m.id <> m.keep_id
+    """)
+
+    op.execute("""
+        DELETE FROM customers
+        USING customer_merge m
+        WHERE customers.id = m.id AND m.id <> m.keep_id
+    """)
+    op.execute("""
+        UPDATE customers SET whatsapp_number = m.normalized
+        FROM customer_merge m
+        WHERE customers.id = m.id AND customers.whatsapp_number <> m.normalized
+    """)
+
+    op.execute("DROP INDEX IF EXISTS ix_customers_whatsapp_number")
+    op.create_index(op.f('ix_customers_whatsapp_number'), 'customers', ['whatsapp_number'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_customers_whatsapp_number'), table_name='customers')
+    op.create_index(op.f('ix_customers_whatsapp_number'), 'customers', ['whatsapp_number'], unique=False)
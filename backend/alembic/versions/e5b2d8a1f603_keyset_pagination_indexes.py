@@ -0,0 +1,49 @@
+"""Composite indexes for keyset pagination
+
+Revision ID: e5b2d8a1f603
+Revises: c47a1f9e3d20
+Create Date: 2026-10-17 17:08:33.940127
+
+As listagens passam a ser paginadas por (created_at, id) ou, nos clientes
+ativos, por (last_interaction, id). Linhas antigas sem created_at recebem um
+valor (updated_at/last_interaction ou agora) para que o cursor exista em toda
+linha; os índices são criados sem bloquear escritas.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b2d8a1f603'
+down_revision: Union[str, None] = 'c47a1f9e3d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_products_owner_id_created_at_id', 'products', ['owner_id', 'created_at', 'id']),
+    ('ix_products_is_active_created_at_id', 'products', ['is_active', 'created_at', 'id']),
+    ('ix_orders_user_id_created_at_id', 'orders', ['user_id', 'created_at', 'id']),
+    ('ix_customers_created_at_id', 'customers', ['created_at', 'id']),
+    ('ix_customers_last_interaction_id', 'customers', ['last_interaction', 'id']),
+)
+
+
+def upgrade() -> None:
+    op.execute("UPDATE products SET created_at = COALESCE(updated_at, now()) WHERE created_at IS NULL")
+    op.execute("UPDATE orders SET created_at = COALESCE(updated_at, now()) WHERE created_at IS NULL")
+    op.execute(
+        "UPDATE customers SET created_at = COALESCE(last_interaction, now() AT TIME ZONE 'utc') "
+        "WHERE created_at IS NULL"
+    )
+
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
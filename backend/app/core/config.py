@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "FastAPI E-commerce"
@@ -23,9 +23,65 @@ class Settings(BaseSettings):
     WHATSAPP_PHONE_NUMBER_ID: str
     WHATSAPP_BUSINESS_ID: str
     WHATSAPP_VERIFY_TOKEN: str
+    WHATSAPP_API_BASE_URL: str = "https://graph.facebook.com/v17.0"
+    WHATSAPP_HTTP2: bool = True
+    WHATSAPP_MAX_CONNECTIONS: int = 100
+    WHATSAPP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    WHATSAPP_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    WHATSAPP_TIMEOUT_SECONDS: float = 15.0
+    WHATSAPP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    WHATSAPP_MEDIA_TTL_SECONDS: int = 29 * 24 * 3600  # a Meta guarda mídias por 30 dias
+    WHATSAPP_MEDIA_URL_TTL_SECONDS: int = 24 * 3600
+    WHATSAPP_MEDIA_LOCAL_SIZE: int = 5000  # chaves de mídia em memória por processo
+    WHATSAPP_TEMPLATES_TTL_SECONDS: int = 300
+    WHATSAPP_TEMPLATES_STALE_SECONDS: int = 24 * 3600
+    WHATSAPP_RATE_PER_SECOND: float = 80.0  # limite de vazão por phone_number_id
+    WHATSAPP_RATE_BURST: float = 10.0
+    WHATSAPP_MAX_RETRIES: int = 5
+    WHATSAPP_BACKOFF_BASE_SECONDS: float = 0.5
+    WHATSAPP_BACKOFF_MAX_SECONDS: float = 30.0
+    
+    # Índice do catálogo
+    CATALOG_INDEX_REFRESH_SECONDS: float = 5.0
+    CATALOG_TOP_K: int = 5
+    CATALOG_MAX_IMAGES: int = 3  # fotos enviadas junto do catálogo; 0 desativa
+    CATALOG_EMBEDDINGS_ENABLED: bool = False  # requer numpy
+    
+    # Disparos em massa
+    BROADCAST_CHUNK_SIZE: int = 200
+    BROADCAST_CONCURRENCY: int = 20
+    BROADCAST_LOCK_TTL_SECONDS: int = 300
+    BROADCAST_DB_RETRIES: int = 3  # falhas seguidas do banco antes de marcar o disparo como failed
+    BROADCAST_RETRY_SECONDS: float = 2.0
     
     # OpenAI
     OPENAI_API_KEY: str
+    AI_BACKEND: str = "openai"  # openai, local, record, replay
+    AI_LOCAL_LATENCY: str = "lognormal"  # fixed, uniform, lognormal
+    AI_LOCAL_LATENCY_MS: float = 800.0  # mediana
+    AI_LOCAL_LATENCY_SPREAD: float = 0.5  # sigma (lognormal) ou ± fração (uniform)
+    AI_LOCAL_SEED: int = 0
+    AI_LOCAL_SCRIPT_PATH: str = ""  # roteiro JSON de respostas do backend local
+    AI_RECORDING_PATH: str = "data/ai_recording.jsonl"
+    AI_MAX_CONCURRENCY: int = 16  # chamadas simultâneas ao modelo
+    AI_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    AI_REQUEST_TIMEOUT_SECONDS: float = 30.0
+    AI_REPLY_SLA_SECONDS: float = 8.0  # espera máxima do cliente pela primeira resposta
+    AI_HEDGE_ENABLED: bool = False
+    AI_HEDGE_AFTER_SECONDS: float = 4.0  # até haver amostras para o p95
+    AI_EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    AI_COMBINED_ANALYSIS: bool = True  # resposta, intenção, sentimento e produtos em uma chamada
+    AI_CACHE_TTL_SECONDS: int = 6 * 3600  # 0 desativa o cache de respostas
+    AI_CACHE_LOCAL_SIZE: int = 5000
+    AI_CACHE_DISABLED_SELLERS: List[str] = []  # phone_number_ids sem cache
+    AI_LOCAL_INTENTS_ENABLED: bool = True
+    AI_INTENT_MODEL_PATH: str = "data/intent_model.json"
+    AI_INTENT_THRESHOLD: float = 0.85
+    AI_CONTEXT_TURNS: int = 6  # rodadas recentes no prompt; 0 desativa o contexto (ver ResponseCache)
+    AI_CONTEXT_SUMMARY_EVERY: int = 4  # rodadas incorporadas ao resumo quando a janela enche
+    AI_CONTEXT_TOKEN_BUDGET: int = 800  # resumo + rodadas recentes
+    AI_CONTEXT_SUMMARY_TOKENS: int = 200
+    AI_CONTEXT_TTL_SECONDS: int = 7 * 24 * 3600
     
     # Mercado Pago
     MERCADO_PAGO_ACCESS_TOKEN: str
@@ -34,6 +90,27 @@ class Settings(BaseSettings):
     # Configurações Redis
     REDIS_URL: str = "redis://localhost:6379"
     
+    # Webhook do WhatsApp
+    WEBHOOK_MODE: str = "inline"  # inline, queue
+    WEBHOOK_STREAM: str = "whatsapp:webhook"
+    WEBHOOK_CONSUMER_GROUP: str = "webhook-workers"
+    WEBHOOK_STREAM_MAXLEN: int = 100000
+    WEBHOOK_CLAIM_IDLE_MS: int = 60000
+    WEBHOOK_WORKER_CONCURRENCY: int = 16
+    MESSAGE_MAX_CONCURRENCY: int = 32
+    MESSAGE_DEDUP_TTL_SECONDS: int = 7 * 24 * 3600  # janela de reentrega da Meta
+    MESSAGE_DEDUP_LOCAL_SIZE: int = 10000
+    MESSAGE_COALESCE_WINDOW_SECONDS: float = 1.5  # 0 desativa o agrupamento
+    MESSAGE_COALESCE_MAX_DELAY_SECONDS: float = 5.0
+    STATUS_BUFFER_MAX_SIZE: int = 500
+    STATUS_BUFFER_FLUSH_SECONDS: float = 2.0
+    MESSAGE_LOG_MAX_SIZE: int = 500
+    MESSAGE_LOG_FLUSH_SECONDS: float = 0.5
+    CUSTOMER_CACHE_SIZE: int = 20000
+    CUSTOMER_CACHE_TTL_SECONDS: float = 60.0
+    CUSTOMER_CACHE_REDIS_TTL_SECONDS: int = 3600  # 0 usa só o cache local
+    INTERACTION_HISTORY_RECENT: int = 20  # interações mantidas em Customer.interaction_history
+    
     # Configurações do Ambiente
     DEBUG: bool = True
     ENVIRONMENT: str = "development"
@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException, Query, Response, status
+
+# (valor da coluna de ordenação, id) do último item da página anterior
+Cursor = Tuple[datetime, int]
+
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(value: datetime, id: int) -> str:
+    return f"{value.isoformat()},{id}"
+
+def parse_cursor(value: str) -> Cursor:
+    """
+    Converte "<created_at ISO 8601>,<id>" em cursor.
+    """
+    timestamp, _, id = value.rpartition(",")
+    # Um "+" do fuso não codificado na URL chega como espaço
+    return datetime.fromisoformat(timestamp.replace(" ", "+")), int(id)
+
+def cursor_param(
+    after: Optional[str] = Query(
+        None, description="Cursor da próxima página (cabeçalho X-Next-Cursor)"
+    )
+) -> Optional[Cursor]:
+    """
+    Dependência que lê o cursor `after` da query string.
+    """
+    if after is None:
+        return None
+    try:
+        return parse_cursor(after)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Cursor inválido; use o valor de X-Next-Cursor"
+        )
+
+def limit_param(limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)) -> int:
+    return limit
+
+def set_next_cursor(
+    response: Response,
+    items: List[Any],
+    limit: int,
+    field: str = "created_at"
+):
+    """
+    Informa no cabeçalho X-Next-Cursor o cursor da próxima página, se houver.
+    """
+    if len(items) < limit:
+        return
+    last = items[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, field), last.id)
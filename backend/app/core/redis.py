@@ -0,0 +1,23 @@
+from typing import Optional
+import redis.asyncio as redis
+from app.core.config import settings
+
+_client: Optional[redis.Redis] = None
+
+def get_redis() -> redis.Redis:
+    """
+    Retorna o cliente Redis compartilhado pelo processo.
+    """
+    global _client
+    if _client is None:
+        _client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
+
+async def close_redis() -> None:
+    """
+    Fecha o cliente Redis compartilhado, se existir.
+    """
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -2,8 +2,10 @@ from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query, Session
 
+from app.core.pagination import Cursor
 from app.database import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -24,9 +26,33 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         return db.query(self.model).filter(self.model.id == id).first()
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self, db: Session, *, after: Optional[Cursor] = None, limit: int = 100
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        return self.paginate(db.query(self.model), after=after, limit=limit)
+
+    def paginate(
+        self,
+        query: Query,
+        *,
+        after: Optional[Cursor] = None,
+        limit: int = 100,
+        key: Any = None
+    ) -> List[ModelType]:
+        """
+        Paginação por chave: ordena por (key, id) decrescente (key padrão:
+        created_at) e continua a partir do cursor `after` = (key, id) do último
+        item da página anterior. Com o índice composto correspondente, qualquer
+        página custa o mesmo que a primeira.
+        """
+        key = self.model.created_at if key is None else key
+        if after is not None:
+            query = query.filter(tuple_(key, self.model.id) < tuple_(*after))
+        return (
+            query
+            .order_by(key.desc(), self.model.id.desc())
+            .limit(limit)
+            .all()
+        )
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
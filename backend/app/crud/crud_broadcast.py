@@ -0,0 +1,97 @@
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
+from app.models.models import Broadcast, BroadcastRecipient
+from app.schemas.broadcast import BroadcastCreate
+
+UNFINISHED_STATUSES = ("pending", "running")
+
+class CRUDBroadcast(CRUDBase[Broadcast, BroadcastCreate, BroadcastCreate]):
+    def create_with_owner(
+        self, db: Session, *, obj_in: BroadcastCreate, user_id: int, total: int
+    ) -> Broadcast:
+        db_obj = Broadcast(
+            user_id=user_id,
+            template_name=obj_in.template_name,
+            language_code=obj_in.language_code,
+            components=obj_in.components,
+            audience=obj_in.audience.model_dump(exclude_none=True),
+            status="pending",
+            total=total,
+            sent=0,
+            failed=0,
+            last_customer_id=0
+        )
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def get_by_user(
+        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
+    ) -> List[Broadcast]:
+        return (
+            db.query(self.model)
+            .filter(Broadcast.user_id == user_id)
+            .order_by(Broadcast.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def get_by_id_and_user(
+        self, db: Session, *, id: int, user_id: int
+    ) -> Optional[Broadcast]:
+        return (
+            db.query(self.model)
+            .filter(Broadcast.id == id, Broadcast.user_id == user_id)
+            .first()
+        )
+
+    def get_unfinished(self, db: Session) -> List[Broadcast]:
+        return (
+            db.query(self.model)
+            .filter(Broadcast.status.in_(UNFINISHED_STATUSES))
+            .all()
+        )
+
+    def record_progress(
+        self,
+        db: Session,
+        *,
+        db_obj: Broadcast,
+        results: List[Dict[str, Any]],
+        last_customer_id: int
+    ) -> Broadcast:
+        """
+        Grava os resultados de um lote e o checkpoint na mesma transação.
+        """
+        if results:
+            db.execute(
+                insert(BroadcastRecipient)
+                .values(results)
+                .on_conflict_do_nothing(index_elements=["broadcast_id", "customer_id"])
+            )
+        db_obj.sent += sum(1 for r in results if r["status"] == "sent")
+        db_obj.failed += sum(1 for r in results if r["status"] == "failed")
+        db_obj.last_customer_id = last_customer_id
+        db.add(db_obj)
+        db.commit()
+        return db_obj
+
+    def update_status(
+        self, db: Session, *, db_obj: Broadcast, status: str
+    ) -> Broadcast:
+        db_obj.status = status
+        if status in ("completed", "cancelled", "failed"):
+            db_obj.completed_at = datetime.utcnow()
+        else:
+            db_obj.completed_at = None
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+broadcast = CRUDBroadcast(Broadcast)
@@ -1,9 +1,17 @@
-from typing import List, Optional, Dict, Any
-from datetime import datetime
-from sqlalchemy.orm import Session
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from sqlalchemy import JSON, Integer, Row, cast, column, false, func, literal, select, true, union_all, update
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by, insert
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm.attributes import set_committed_value
+from app.core.config import settings
+from app.core.pagination import Cursor
 from app.crud.base import CRUDBase
+from app.crud.crud_message import interaction_to_row, message as crud_message
 from app.models.models import Customer
-from app.schemas.customer import CustomerCreate, CustomerUpdate
+from app.schemas.customer import CustomerCreate, CustomerUpdate, normalize_whatsapp_number
 
 class CRUDCustomer(CRUDBase[Customer, CustomerCreate, CustomerUpdate]):
     def get_by_whatsapp(
@@ -11,7 +19,7 @@ class CRUDCustomer(CRUDBase[Customer, CustomerCreate, CustomerUpdate]):
     ) -> Optional[Customer]:
         return (
             db.query(self.model)
-            .filter(Customer.whatsapp_number == whatsapp_number)
+            .filter(Customer.whatsapp_number == normalize_whatsapp_number(whatsapp_number))
             .first()
         )
 
@@ -25,18 +33,72 @@ class CRUDCustomer(CRUDBase[Customer, CustomerCreate, CustomerUpdate]):
         )
 
     def get_active_customers(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self, db: Session, *, after: Optional[Cursor] = None, limit: int = 100
     ) -> List[Customer]:
-        """Retorna clientes que interagiram nos últimos 30 dias"""
-        thirty_days_ago = datetime.utcnow() - datetime.timedelta(days=30)
+        """Retorna clientes que interagiram nos últimos 30 dias, do mais recente
+        ao mais antigo; o cursor é (last_interaction, id)"""
+        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+        return self.paginate(
+            db.query(self.model).filter(Customer.last_interaction >= thirty_days_ago),
+            after=after,
+            limit=limit,
+            key=Customer.last_interaction
+        )
+
+    def get_audience_after(
+        self,
+        db: Session,
+        *,
+        after_id: int,
+        limit: int,
+        customer_ids: Optional[List[int]] = None,
+        active_within_days: Optional[int] = None
+    ) -> List[Tuple[int, str]]:
+        """
+        Retorna (id, whatsapp_number) do público de um disparo, em ordem de id,
+        a partir de `after_id` (paginação por chave para retomada).
+        """
+        query = self._audience_query(
+            db,
+            customer_ids=customer_ids,
+            active_within_days=active_within_days
+        )
         return (
-            db.query(self.model)
-            .filter(Customer.last_interaction >= thirty_days_ago)
-            .offset(skip)
+            query
+            .filter(Customer.id > after_id)
+            .order_by(Customer.id)
             .limit(limit)
             .all()
         )
 
+    def count_audience(
+        self,
+        db: Session,
+        *,
+        customer_ids: Optional[List[int]] = None,
+        active_within_days: Optional[int] = None
+    ) -> int:
+        return self._audience_query(
+            db,
+            customer_ids=customer_ids,
+            active_within_days=active_within_days
+        ).count()
+
+    def _audience_query(
+        self,
+        db: Session,
+        *,
+        customer_ids: Optional[List[int]] = None,
+        active_within_days: Optional[int] = None
+    ):
+        query = db.query(Customer.id, Customer.whatsapp_number)
+        if customer_ids is not None:
+            query = query.filter(Customer.id.in_(customer_ids))
+        if active_within_days is not None:
+            since = datetime.utcnow() - timedelta(days=active_within_days)
+            query = query.filter(Customer.last_interaction >= since)
+        return query
+
     def update_interaction(
         self,
         db: Session,
@@ -44,22 +106,93 @@ class CRUDCustomer(CRUDBase[Customer, CustomerCreate, CustomerUpdate]):
         db_obj: Customer,
         interaction_data: Dict[str, Any]
     ) -> Customer:
-        # Atualiza o histórico de interações
-        if not db_obj.interaction_history:
-            db_obj.interaction_history = []
-        
-        # Adiciona timestamp à interação
-        interaction_data["timestamp"] = datetime.utcnow().isoformat()
-        db_obj.interaction_history.append(interaction_data)
-        
-        # Atualiza última interação
-        db_obj.last_interaction = datetime.utcnow()
-        
-        db.add(db_obj)
+        # Adiciona timestamp à interação (se ainda não tiver)
+        interaction_data.setdefault("timestamp", datetime.utcnow().isoformat())
+        crud_message.create_many(
+            db, rows=[interaction_to_row(db_obj.id, interaction_data)]
+        )
+        row = db.execute(
+            self._projection_update({db_obj.id: [interaction_data]})
+            .returning(Customer.interaction_history, Customer.last_interaction)
+        ).first()
         db.commit()
-        db.refresh(db_obj)
+        # Os valores gravados voltam no RETURNING; sem refresh
+        if row is not None:
+            set_committed_value(db_obj, "interaction_history", row.interaction_history)
+            set_committed_value(db_obj, "last_interaction", row.last_interaction)
         return db_obj
 
+    def append_interactions(
+        self,
+        db: Session,
+        *,
+        interactions: Dict[int, List[Dict[str, Any]]]
+    ) -> int:
+        """
+        Grava interações de vários clientes em uma transação com duas
+        instruções, qualquer que seja o tamanho do lote: um INSERT em messages
+        (log completo, só acréscimos) e um UPDATE de customers que acrescenta
+        as interações a interaction_history, mantendo as
+        INTERACTION_HISTORY_RECENT mais recentes, e atualiza last_interaction.
+        """
+        if not interactions:
+            return 0
+
+        rows = [
+            interaction_to_row(customer_id, interaction)
+            for customer_id, items in interactions.items()
+            for interaction in items
+        ]
+        crud_message.create_many(db, rows=rows)
+        db.execute(self._projection_update(interactions))
+        db.commit()
+        return len(rows)
+
+    def _projection_update(self, interactions: Dict[int, List[Dict[str, Any]]]):
+        """
+        UPDATE ... FROM json_to_recordset: o histórico é concatenado e cortado
+        no próprio banco, sem ler o JSON atual de cada cliente.
+        """
+        table = Customer.__table__
+        incoming = (
+            func.json_to_recordset(literal(
+                [
+                    {"id": customer_id, "items": items}
+                    for customer_id, items in interactions.items()
+                ],
+                JSON
+            ))
+            .table_valued(column("id", Integer), column("items", JSONB))
+            .render_derived(name="incoming", with_types=True)
+        )
+        merged = func.coalesce(
+            cast(table.c.interaction_history, JSONB), cast("[]", JSONB)
+        ).op("||", return_type=JSONB)(incoming.c["items"])
+        elements = (
+            func.jsonb_array_elements(merged)
+            .table_valued("value", with_ordinality="position")
+            .render_derived(name="element")
+        )
+        recent = (
+            select(func.coalesce(
+                func.jsonb_agg(aggregate_order_by(elements.c.value, elements.c.position)),
+                cast("[]", JSONB)
+            ))
+            .where(
+                elements.c.position
+                > func.jsonb_array_length(merged) - settings.INTERACTION_HISTORY_RECENT
+            )
+            .scalar_subquery()
+        )
+        return (
+            update(table)
+            .where(table.c.id == incoming.c.id)
+            .values(
+                interaction_history=cast(recent, JSON),
+                last_interaction=datetime.utcnow()
+            )
+        )
+
     def get_or_create(
         self,
         db: Session,
@@ -70,16 +203,117 @@ class CRUDCustomer(CRUDBase[Customer, CustomerCreate, CustomerUpdate]):
         """
         Busca um cliente pelo número do WhatsApp ou cria um novo se não existir.
         Retorna uma tupla (customer, created) onde created é um booleano.
+
+        Uma única instrução: INSERT ... ON CONFLICT DO NOTHING RETURNING em
+        uma CTE, unida ao SELECT do cliente existente. A unicidade do número
+        normalizado impede duplicatas com entregas simultâneas.
         """
-        customer = self.get_by_whatsapp(db, whatsapp_number=whatsapp_number)
-        if customer:
-            return customer, False
-        
-        customer_in = CustomerCreate(
-            whatsapp_number=whatsapp_number,
-            **defaults
+        customer_in = CustomerCreate(whatsapp_number=whatsapp_number, **defaults)
+        number = customer_in.whatsapp_number
+        table = Customer.__table__
+
+        inserted = (
+            insert(table)
+            .values(**jsonable_encoder(customer_in), created_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=[table.c.whatsapp_number])
+            .returning(*table.c, true().label("created"))
+            .cte("inserted")
         )
-        customer = self.create(db, obj_in=customer_in)
-        return customer, True
+        found = union_all(
+            select(inserted),
+            select(*table.c, false().label("created"))
+            .where(table.c.whatsapp_number == number)
+        ).subquery()
+        row = db.execute(
+            select(aliased(Customer, found), found.c.created).limit(1)
+        ).first()
+
+        if row is None:
+            # Outra transação inseriu o número depois do início desta
+            # instrução; a linha já está confirmada
+            return self.get_by_whatsapp(db, whatsapp_number=number), False
+
+        customer, created = row
+        if created:
+            db.commit()
+        return customer, created
+
+    def get_or_create_many(
+        self,
+        db: Session,
+        *,
+        whatsapp_numbers: List[str],
+        defaults: Dict[str, Any]
+    ) -> Dict[str, Row]:
+        """
+        Resolve vários números de WhatsApp de uma vez: um SELECT ... IN para os
+        clientes existentes e um único INSERT ... ON CONFLICT DO NOTHING
+        RETURNING para os que faltam. Retorna um dicionário número (como
+        recebido) -> linha com id, whatsapp_number e name (sem carregar o
+        restante do cliente, como o histórico JSON).
+        """
+        normalized = {
+            number: normalize_whatsapp_number(number)
+            for number in whatsapp_numbers
+        }
+        numbers = list(dict.fromkeys(normalized.values()))
+        if not numbers:
+            return {}
+
+        columns = (Customer.id, Customer.whatsapp_number, Customer.name)
+        customers = {
+            c.whatsapp_number: c
+            for c in (
+                db.query(*columns)
+                .filter(Customer.whatsapp_number.in_(numbers))
+                .all()
+            )
+        }
+
+        rows = []
+        for number in numbers:
+            if number in customers:
+                continue
+            try:
+                customer_in = CustomerCreate(whatsapp_number=number, **defaults)
+            except ValidationError as e:
+                print(f"Número de WhatsApp inválido {number}: {str(e)}")
+                continue
+            rows.append({
+                **jsonable_encoder(customer_in),
+                "created_at": datetime.utcnow()
+            })
+
+        if rows:
+            stmt = (
+                insert(Customer)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["whatsapp_number"])
+                .returning(*columns)
+            )
+            for c in db.execute(stmt).all():
+                customers[c.whatsapp_number] = c
+
+            # Linhas inseridas em paralelo por outra requisição não voltam
+            # no RETURNING; busca-as novamente
+            conflicted = [
+                row["whatsapp_number"] for row in rows
+                if row["whatsapp_number"] not in customers
+            ]
+            if conflicted:
+                for c in (
+                    db.query(*columns)
+                    .filter(Customer.whatsapp_number.in_(conflicted))
+                    .all()
+                ):
+                    customers[c.whatsapp_number] = c
+
+            db.commit()
+
+        return {
+            number: customers[normal]
+            for number, normal in normalized.items()
+            if normal in customers
+        }
 
 customer = CRUDCustomer(Customer) 
\ No newline at end of file
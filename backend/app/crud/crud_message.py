@@ -0,0 +1,103 @@
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
+from app.models.models import Message
+from app.schemas.message import MessageCreate
+
+# Tipos de interação gravados pelo sistema
+RECEIVED = "message_received"
+SENT = "message_sent"
+TEMPLATE_SENT = "template_sent"
+# Campos da resposta da IA, guardados em ai_response
+AI_FIELDS = ("intent", "source", "label", "sentiment", "products")
+AI_SOURCES = ("llm", "local", "fallback")
+_BASE_FIELDS = ("type", "content", "message_id", "timestamp")
+
+def interaction_to_row(customer_id: int, interaction: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converte uma interação (formato de interaction_history) em linha de messages.
+    """
+    kind = interaction.get("type")
+    ai_response = {
+        key: interaction[key] for key in AI_FIELDS
+        if interaction.get(key) is not None
+    }
+    details = {
+        key: value for key, value in interaction.items()
+        if key not in _BASE_FIELDS and key not in AI_FIELDS and value is not None
+    }
+    if kind not in (RECEIVED, SENT, TEMPLATE_SENT):
+        details["type"] = kind
+
+    timestamp = interaction.get("timestamp")
+    return {
+        "customer_id": customer_id,
+        "content": interaction.get("content"),
+        "direction": "incoming" if kind == RECEIVED else "outgoing",
+        "message_type": "template" if kind == TEMPLATE_SENT else "text",
+        "processed_by_ai": ai_response.get("source") in AI_SOURCES,
+        "ai_response": ai_response or None,
+        "whatsapp_message_id": interaction.get("message_id"),
+        "details": details or None,
+        "created_at": datetime.fromisoformat(timestamp) if timestamp else datetime.utcnow()
+    }
+
+def row_to_interaction(message: Message) -> Dict[str, Any]:
+    """
+    Converte uma linha de messages de volta para o formato de interação.
+    """
+    details = dict(message.details or {})
+    kind = details.pop("type", None)
+    if kind is None:
+        if message.direction == "incoming":
+            kind = RECEIVED
+        else:
+            kind = TEMPLATE_SENT if message.message_type == "template" else SENT
+    interaction = {"type": kind}
+    if message.content is not None:
+        interaction["content"] = message.content
+    if message.whatsapp_message_id is not None:
+        interaction["message_id"] = message.whatsapp_message_id
+    interaction.update(message.ai_response or {})
+    interaction.update(details)
+    interaction["timestamp"] = message.created_at.isoformat()
+    return interaction
+
+class CRUDMessage(CRUDBase[Message, MessageCreate, MessageCreate]):
+    def create_many(
+        self, db: Session, *, rows: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Insere várias mensagens em um único INSERT, na transação de quem chama.
+        """
+        if not rows:
+            return 0
+        db.execute(insert(Message), rows)
+        return len(rows)
+
+    def get_by_customer(
+        self,
+        db: Session,
+        *,
+        customer_id: int,
+        limit: int = 50,
+        before: Optional[datetime] = None
+    ) -> List[Message]:
+        """
+        Retorna as mensagens mais recentes do cliente, da mais antiga para a
+        mais nova (usa o índice (customer_id, created_at)).
+        """
+        query = db.query(Message).filter(Message.customer_id == customer_id)
+        if before is not None:
+            query = query.filter(Message.created_at < before)
+        messages = (
+            query
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(limit)
+            .all()
+        )
+        return messages[::-1]
+
+message = CRUDMessage(Message)
@@ -0,0 +1,26 @@
+from typing import List, Dict, Any
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
+from app.models.models import MessageStatus
+from app.schemas.message_status import MessageStatusCreate
+
+class CRUDMessageStatus(CRUDBase[MessageStatus, MessageStatusCreate, MessageStatusCreate]):
+    def create_many(
+        self, db: Session, *, rows: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Insere vários status em um único INSERT, ignorando os já gravados.
+        """
+        if not rows:
+            return 0
+        stmt = (
+            insert(MessageStatus)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["message_id", "status"])
+        )
+        result = db.execute(stmt)
+        db.commit()
+        return result.rowcount
+
+message_status = CRUDMessageStatus(MessageStatus)
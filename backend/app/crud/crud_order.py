@@ -1,19 +1,23 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session
+from app.core.pagination import Cursor
 from app.crud.base import CRUDBase
 from app.models.models import Order, OrderItem, Product
 from app.schemas.order import OrderCreate, OrderUpdate
 
 class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
     def get_by_user(
-        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        user_id: int,
+        after: Optional[Cursor] = None,
+        limit: int = 100
     ) -> List[Order]:
-        return (
-            db.query(self.model)
-            .filter(Order.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return self.paginate(
+            db.query(self.model).filter(Order.user_id == user_id),
+            after=after,
+            limit=limit
         )
 
     def create_with_items(
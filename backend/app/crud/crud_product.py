@@ -1,19 +1,23 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session
+from app.core.pagination import Cursor
 from app.crud.base import CRUDBase
 from app.models.models import Product
 from app.schemas.product import ProductCreate, ProductUpdate
 
 class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
     def get_by_owner(
-        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        owner_id: int,
+        after: Optional[Cursor] = None,
+        limit: int = 100
     ) -> List[Product]:
-        return (
-            db.query(self.model)
-            .filter(Product.owner_id == owner_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return self.paginate(
+            db.query(self.model).filter(Product.owner_id == owner_id),
+            after=after,
+            limit=limit
         )
 
     def create_with_owner(
@@ -27,13 +31,19 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
         return db_obj
 
     def get_active(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self, db: Session, *, after: Optional[Cursor] = None, limit: int = 100
     ) -> List[Product]:
+        return self.paginate(
+            db.query(self.model).filter(Product.is_active == True),
+            after=after,
+            limit=limit
+        )
+
+    def get_all_active(self, db: Session) -> List[Product]:
         return (
             db.query(self.model)
             .filter(Product.is_active == True)
-            .offset(skip)
-            .limit(limit)
+            .order_by(Product.id)
             .all()
         )
 
@@ -1,11 +1,62 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.settings import settings
 
+class StatementCounter:
+    """
+    Conta as instruções SQL enviadas ao banco e os commits. Além do total,
+    `track()` mede um trecho (ex.: a gravação de um lote de mensagens); o
+    escopo segue o contexto, então vale dentro de asyncio.to_thread.
+
+    Um executemany conta uma instrução por linha, que é o que o driver envia.
+    """
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        self._scope: ContextVar[Optional[Dict[str, int]]] = ContextVar(
+            "sql_scope", default=None
+        )
+
+    def attach(self, engine: Engine):
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    @contextmanager
+    def track(self) -> Iterator[Dict[str, int]]:
+        scope = {"statements": 0, "commits": 0}
+        token = self._scope.set(scope)
+        try:
+            yield scope
+        finally:
+            self._scope.reset(token)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"statements": self.statements, "commits": self.commits}
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        count = len(parameters) if executemany else 1
+        self.statements += count
+        scope = self._scope.get()
+        if scope is not None:
+            scope["statements"] += count
+
+    def _on_commit(self, conn):
+        self.commits += 1
+        scope = self._scope.get()
+        if scope is not None:
+            scope["commits"] += 1
+
 # Criar engine do SQLAlchemy
 engine = create_engine(settings.DATABASE_URL)
 
+statement_counter = StatementCounter()
+statement_counter.attach(engine)
+
 # Criar sessão
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -18,4 +69,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
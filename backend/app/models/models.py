@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, JSON, Text
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, Float, DateTime, JSON, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -23,6 +23,11 @@ class User(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Paginação por chave: (created_at, id) dentro do filtro de cada listagem
+        Index("ix_products_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        Index("ix_products_is_active_created_at_id", "is_active", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -41,12 +46,17 @@ class Product(Base):
 
 class Customer(Base):
     __tablename__ = "customers"
+    __table_args__ = (
+        Index("ix_customers_created_at_id", "created_at", "id"),
+        # Clientes ativos: paginação por (last_interaction, id)
+        Index("ix_customers_last_interaction_id", "last_interaction", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    whatsapp_number = Column(String, index=True)
+    whatsapp_number = Column(String, unique=True, index=True)  # E.164 normalizado
     name = Column(String)
     email = Column(String)
-    interaction_history = Column(JSON)
+    interaction_history = Column(JSON)  # só as interações mais recentes; o log completo fica em messages
     last_interaction = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -54,6 +64,9 @@ class Customer(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -82,16 +95,67 @@ class OrderItem(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_customer_id_created_at", "customer_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id"))
     content = Column(Text)
     direction = Column(String)  # incoming, outgoing
-    message_type = Column(String)  # text, image, product
+    message_type = Column(String)  # text, template, image, product
     processed_by_ai = Column(Boolean, default=False)
-    ai_response = Column(JSON)
+    ai_response = Column(JSON)  # intent, source, label, sentiment, products
+    whatsapp_message_id = Column(String, index=True)  # wamid
+    details = Column(JSON)  # demais campos da interação (sent_by, status, error...)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+class MessageStatus(Base):
+    __tablename__ = "message_statuses"
+    __table_args__ = (
+        UniqueConstraint("message_id", "status", name="uq_message_statuses_message_id_status"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    message_id = Column(String, nullable=False)  # wamid da mensagem enviada
+    recipient_id = Column(String, index=True)
+    status = Column(String, nullable=False)  # sent, delivered, read, failed
+    timestamp = Column(DateTime(timezone=True), index=True)
+    pricing_category = Column(String)
+    error_code = Column(Integer)
+
+class Broadcast(Base):
+    __tablename__ = "broadcasts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    template_name = Column(String, nullable=False)
+    language_code = Column(String, default="pt_BR")
+    components = Column(JSON)
+    audience = Column(JSON)  # {"customer_ids": [...]} ou filtros
+    status = Column(String, default="pending")  # pending, running, completed, cancelled, failed
+    total = Column(Integer, default=0)
+    sent = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    last_customer_id = Column(Integer, default=0)  # checkpoint para retomada
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True))
+
+class BroadcastRecipient(Base):
+    __tablename__ = "broadcast_recipients"
+    __table_args__ = (
+        UniqueConstraint("broadcast_id", "customer_id", name="uq_broadcast_recipients_broadcast_id_customer_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    broadcast_id = Column(Integer, ForeignKey("broadcasts.id"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    status = Column(String, nullable=False)  # sent, failed
+    message_id = Column(String)
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class AutomatedMessage(Base):
     __tablename__ = "automated_messages"
 
@@ -1,4 +1,4 @@
-from . import auth, products, orders, customers, whatsapp, payments
+from . import auth, products, orders, customers, whatsapp, payments, broadcasts
 
 __all__ = [
     "auth",
@@ -6,5 +6,6 @@ __all__ = [
     "orders",
     "customers",
     "whatsapp",
-    "payments"
+    "payments",
+    "broadcasts"
 ] 
\ No newline at end of file
@@ -0,0 +1,140 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List
+from app.core import deps
+from app.database import get_db
+from app.crud.crud_broadcast import broadcast as crud_broadcast
+from app.crud.crud_customer import customer as crud_customer
+from app.schemas.broadcast import Broadcast, BroadcastCreate
+from app.schemas.auth import User
+from app.services.broadcast_service import broadcast_service, FINISHED_STATUSES
+from app.services.template_cache import template_cache, TemplateError
+
+router = APIRouter()
+
+@router.post("/", response_model=Broadcast, status_code=status.HTTP_202_ACCEPTED)
+async def create_broadcast(
+    *,
+    db: Session = Depends(get_db),
+    broadcast_in: BroadcastCreate,
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Cria um disparo de template para um público e inicia o envio em segundo plano.
+    """
+    try:
+        await template_cache.validate(
+            template_name=broadcast_in.template_name,
+            language_code=broadcast_in.language_code,
+            components=broadcast_in.components
+        )
+    except TemplateError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
+    total = crud_customer.count_audience(
+        db, **broadcast_in.audience.model_dump(exclude_none=True)
+    )
+    if total == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Nenhum cliente encontrado para o público informado"
+        )
+
+    broadcast = crud_broadcast.create_with_owner(
+        db, obj_in=broadcast_in, user_id=current_user.id, total=total
+    )
+    broadcast_service.start(broadcast.id)
+    return broadcast
+
+@router.get("/", response_model=List[Broadcast])
+async def get_broadcasts(
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Retorna os disparos do usuário atual.
+    """
+    return crud_broadcast.get_by_user(
+        db, user_id=current_user.id, skip=skip, limit=limit
+    )
+
+@router.get("/{broadcast_id}", response_model=Broadcast)
+async def get_broadcast(
+    *,
+    db: Session = Depends(get_db),
+    broadcast_id: int,
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Retorna um disparo e seu progresso.
+    """
+    broadcast = crud_broadcast.get_by_id_and_user(
+        db, id=broadcast_id, user_id=current_user.id
+    )
+    if not broadcast:
+        raise HTTPException(
+            status_code=404,
+            detail="Disparo não encontrado"
+        )
+    return broadcast
+
+@router.post("/{broadcast_id}/resume", response_model=Broadcast)
+async def resume_broadcast(
+    *,
+    db: Session = Depends(get_db),
+    broadcast_id: int,
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Retoma um disparo interrompido (ou que falhou) a partir do último
+    checkpoint.
+    """
+    broadcast = crud_broadcast.get_by_id_and_user(
+        db, id=broadcast_id, user_id=current_user.id
+    )
+    if not broadcast:
+        raise HTTPException(
+            status_code=404,
+            detail="Disparo não encontrado"
+        )
+    if broadcast.status in FINISHED_STATUSES and broadcast.status != "failed":
+        raise HTTPException(
+            status_code=400,
+            detail="Não é possível retomar este disparo"
+        )
+    if broadcast.status == "failed":
+        broadcast = crud_broadcast.update_status(db, db_obj=broadcast, status="pending")
+
+    broadcast_service.start(broadcast.id)
+    return broadcast
+
+@router.post("/{broadcast_id}/cancel", response_model=Broadcast)
+async def cancel_broadcast(
+    *,
+    db: Session = Depends(get_db),
+    broadcast_id: int,
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Cancela um disparo; os envios já feitos são mantidos.
+    """
+    broadcast = crud_broadcast.get_by_id_and_user(
+        db, id=broadcast_id, user_id=current_user.id
+    )
+    if not broadcast:
+        raise HTTPException(
+            status_code=404,
+            detail="Disparo não encontrado"
+        )
+    if broadcast.status in FINISHED_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail="Não é possível cancelar este disparo"
+        )
+
+    return crud_broadcast.update_status(db, db_obj=broadcast, status="cancelled")
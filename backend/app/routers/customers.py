@@ -1,28 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.core import deps
+from app.core.pagination import Cursor, cursor_param, limit_param, set_next_cursor
 from app.database import get_db
 from app.crud.crud_customer import customer as crud_customer
 from app.crud.crud_order import order as crud_order
 from app.schemas.customer import Customer, CustomerCreate, CustomerUpdate
 from app.schemas.order import Order
 from app.schemas.auth import User
+from app.services.customer_cache import customer_cache
 from app.services.whatsapp_service import whatsapp_service
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Customer])
 async def get_customers(
+    response: Response,
     db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    after: Optional[Cursor] = Depends(cursor_param),
+    limit: int = Depends(limit_param),
     current_user: User = Depends(deps.get_current_active_user)
 ):
     """
-    Retorna a lista de clientes.
+    Retorna a lista de clientes, dos mais novos aos mais antigos; a próxima
+    página vem do cabeçalho X-Next-Cursor.
     """
-    customers = crud_customer.get_multi(db, skip=skip, limit=limit)
+    customers = crud_customer.get_multi(db, after=after, limit=limit)
+    set_next_cursor(response, customers, limit)
     return customers
 
 @router.post("/", response_model=Customer, status_code=status.HTTP_201_CREATED)
@@ -48,6 +53,22 @@ async def create_customer(
     customer = crud_customer.create(db, obj_in=customer_in)
     return customer
 
+@router.get("/active", response_model=List[Customer])
+async def get_active_customers(
+    response: Response,
+    db: Session = Depends(get_db),
+    after: Optional[Cursor] = Depends(cursor_param),
+    limit: int = Depends(limit_param),
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Retorna a lista de clientes ativos (que interagiram nos últimos 30 dias),
+    da interação mais recente à mais antiga; o cursor é (last_interaction, id).
+    """
+    customers = crud_customer.get_active_customers(db, after=after, limit=limit)
+    set_next_cursor(response, customers, limit, field="last_interaction")
+    return customers 
+
 @router.get("/{customer_id}", response_model=Customer)
 async def get_customer(
     *,
@@ -84,6 +105,7 @@ async def update_customer(
             detail="Cliente não encontrado"
         )
     customer = crud_customer.update(db, db_obj=customer, obj_in=customer_in)
+    await customer_cache.invalidate(customer.whatsapp_number)
     return customer
 
 @router.get("/{customer_id}/orders", response_model=List[Order])
@@ -160,16 +182,3 @@ async def send_message(
             status_code=500,
             detail=f"Erro ao enviar mensagem: {str(e)}"
         )
-
-@router.get("/active", response_model=List[Customer])
-async def get_active_customers(
-    db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_user)
-):
-    """
-    Retorna a lista de clientes ativos (que interagiram nos últimos 30 dias).
-    """
-    customers = crud_customer.get_active_customers(db, skip=skip, limit=limit)
-    return customers 
\ No newline at end of file
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.core import deps
+from app.core.pagination import Cursor, cursor_param, limit_param, set_next_cursor
 from app.database import get_db
 from app.crud.crud_order import order as crud_order
 from app.schemas.order import Order, OrderCreate, OrderUpdate
@@ -12,17 +13,20 @@ router = APIRouter()
 
 @router.get("/", response_model=List[Order])
 async def get_orders(
+    response: Response,
     db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    after: Optional[Cursor] = Depends(cursor_param),
+    limit: int = Depends(limit_param),
     current_user: User = Depends(deps.get_current_active_user)
 ):
     """
-    Retorna a lista de pedidos do usuário atual.
+    Retorna a lista de pedidos do usuário atual, dos mais novos aos mais
+    antigos; a próxima página vem do cabeçalho X-Next-Cursor.
     """
     orders = crud_order.get_by_user(
-        db=db, user_id=current_user.id, skip=skip, limit=limit
+        db=db, user_id=current_user.id, after=after, limit=limit
     )
+    set_next_cursor(response, orders, limit)
     return orders
 
 @router.post("/", response_model=Order, status_code=status.HTTP_201_CREATED)
@@ -1,27 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core import deps
+from app.core.pagination import Cursor, cursor_param, limit_param, set_next_cursor
 from app.database import get_db
 from app.crud.crud_product import product as crud_product
 from app.schemas.product import Product, ProductCreate, ProductUpdate
 from app.schemas.auth import User
+from app.services.ai_cache import response_cache
+from app.services.catalog_index import catalog_index
+from app.services.media_service import media_service
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Product])
 async def get_products(
+    response: Response,
     db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    after: Optional[Cursor] = Depends(cursor_param),
+    limit: int = Depends(limit_param),
     current_user: User = Depends(deps.get_current_active_user)
 ):
     """
-    Retorna a lista de produtos do usuário atual.
+    Retorna a lista de produtos do usuário atual, dos mais novos aos mais
+    antigos; a próxima página vem do cabeçalho X-Next-Cursor.
     """
     products = crud_product.get_by_owner(
-        db=db, owner_id=current_user.id, skip=skip, limit=limit
+        db=db, owner_id=current_user.id, after=after, limit=limit
     )
+    set_next_cursor(response, products, limit)
     return products
 
 @router.post("/", response_model=Product, status_code=status.HTTP_201_CREATED)
@@ -37,6 +44,8 @@ async def create_product(
     product = crud_product.create_with_owner(
         db=db, obj_in=product_in, owner_id=current_user.id
     )
+    catalog_index.upsert(product)
+    catalog_index.advance_version(await response_cache.bump_catalog_version())
     return product
 
 @router.get("/{product_id}", response_model=Product)
@@ -78,7 +87,12 @@ async def update_product(
             status_code=404,
             detail="Produto não encontrado"
         )
+    previous_image_url = product.image_url
     product = crud_product.update(db=db, db_obj=product, obj_in=product_in)
+    if product.image_url != previous_image_url:
+        await media_service.invalidate(previous_image_url)
+    catalog_index.upsert(product)
+    catalog_index.advance_version(await response_cache.bump_catalog_version())
     return product
 
 @router.delete("/{product_id}", response_model=Product)
@@ -100,16 +114,21 @@ async def delete_product(
             detail="Produto não encontrado"
         )
     product = crud_product.remove(db=db, id=product_id)
+    await media_service.invalidate(product.image_url)
+    catalog_index.remove(product_id)
+    catalog_index.advance_version(await response_cache.bump_catalog_version())
     return product
 
 @router.get("/public/active", response_model=List[Product])
 async def get_active_products(
+    response: Response,
     db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100
+    after: Optional[Cursor] = Depends(cursor_param),
+    limit: int = Depends(limit_param)
 ):
     """
-    Retorna a lista de produtos ativos (endpoint público).
+    Retorna a lista de produtos ativos (endpoint público), paginada por cursor.
     """
-    products = crud_product.get_active(db=db, skip=skip, limit=limit)
+    products = crud_product.get_active(db=db, after=after, limit=limit)
+    set_next_cursor(response, products, limit)
     return products 
\ No newline at end of file
@@ -2,113 +2,80 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 from app.core import deps
-from app.database import get_db
+from app.core.config import settings
+from app.database import get_db, statement_counter
 from app.crud.crud_customer import customer as crud_customer
-from app.crud.crud_product import product as crud_product
 from app.services.whatsapp_service import whatsapp_service
+from app.services.message_queue import webhook_queue
+from app.services.ai_cache import response_cache
 from app.services.ai_service import ai_service
+from app.services.conversation_context import conversation_context
+from app.services.customer_cache import customer_cache
+from app.services.dedup import message_deduplicator
+from app.services.intent_classifier import intent_classifier
+from app.services.media_service import media_service
+from app.services.outbound_scheduler import outbound_scheduler
+from app.services.message_log import message_log
+from app.services.status_buffer import status_buffer
+from app.services.template_cache import template_cache, TemplateError
+from app.services.message_processor import (
+    coalescer,
+    dispatcher,
+    interaction_log,
+    turn_latency,
+    validate_entries,
+    drop_duplicates,
+    release_messages,
+    process_entries
+)
 from app.schemas.auth import User
 
 router = APIRouter()
 
 @router.post("/webhook")
-async def whatsapp_webhook(
-    request: Request,
-    db: Session = Depends(get_db)
-):
+async def whatsapp_webhook(request: Request):
     """
     Webhook para receber mensagens do WhatsApp.
+
+    No modo "queue" as entradas são gravadas na fila durável e processadas
+    pelo worker (app.tasks); no modo "inline" são processadas na requisição.
     """
     try:
         data = await request.json()
-        
-        # Verificar se é uma mensagem de entrada
-        if "entry" in data and len(data["entry"]) > 0:
-            for entry in data["entry"]:
-                if "changes" in entry and len(entry["changes"]) > 0:
-                    for change in entry["changes"]:
-                        if change["value"].get("messages"):
-                            for message in change["value"]["messages"]:
-                                # Processar a mensagem
-                                await process_incoming_message(db, message)
-        
+        entries = validate_entries(data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Payload inválido: {str(e)}"
+        )
+
+    try:
+        if entries:
+            # Reentregas do WhatsApp são descartadas antes do banco e da IA
+            entries = await drop_duplicates(entries)
+
+            if settings.WEBHOOK_MODE == "queue":
+                try:
+                    await webhook_queue.enqueue(entries)
+                except Exception:
+                    await release_messages(entries)
+                    raise
+            else:
+                try:
+                    await process_entries(entries)
+                except Exception:
+                    # Sem liberar, a reentrega da Meta seria descartada como duplicata
+                    await release_messages(entries)
+                    raise
+
         return {"status": "success"}
-    
+
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao processar webhook: {str(e)}"
         )
 
-async def process_incoming_message(db: Session, message: Dict[str, Any]):
-    """
-    Processa uma mensagem recebida do WhatsApp.
-    """
-    try:
-        # Extrair informações da mensagem
-        whatsapp_number = message["from"]
-        message_text = message.get("text", {}).get("body", "")
-        
-        # Buscar ou criar cliente
-        customer, created = crud_customer.get_or_create(
-            db,
-            whatsapp_number=whatsapp_number,
-            defaults={"name": "Cliente WhatsApp"}
-        )
-        
-        # Registrar interação
-        crud_customer.update_interaction(
-            db,
-            db_obj=customer,
-            interaction_data={
-                "type": "message_received",
-                "content": message_text,
-                "message_id": message["id"]
-            }
-        )
-        
-        # Processar mensagem com IA
-        ai_response = await ai_service.process_message_with_ai(message_text)
-        
-        if ai_response["should_respond"]:
-            # Enviar resposta
-            response = await whatsapp_service.send_message(
-                phone_number=whatsapp_number,
-                message=ai_response["response"]
-            )
-            
-            # Registrar resposta
-            crud_customer.update_interaction(
-                db,
-                db_obj=customer,
-                interaction_data={
-                    "type": "message_sent",
-                    "content": ai_response["response"],
-                    "message_id": response.get("message_id")
-                }
-            )
-            
-            # Se a IA identificou intenção de compra, enviar catálogo
-            if ai_response.get("intent") == "purchase_intent":
-                products = crud_product.get_active(db, skip=0, limit=5)
-                product_list = "\n".join([
-                    f"• {p.name}: R$ {p.price:.2f}"
-                    for p in products
-                ])
-                catalog_message = (
-                    "Aqui estão alguns dos nossos produtos:\n\n"
-                    f"{product_list}\n\n"
-                    "Gostaria de mais informações sobre algum deles?"
-                )
-                
-                await whatsapp_service.send_message(
-                    phone_number=whatsapp_number,
-                    message=catalog_message
-                )
-    
-    except Exception as e:
-        print(f"Erro ao processar mensagem: {str(e)}")
-
 @router.post("/send-message")
 async def send_message(
     *,
@@ -139,7 +106,7 @@ async def send_message(
                 interaction_data={
                     "type": "message_sent",
                     "content": message_data["content"],
-                    "message_id": response.get("message_id"),
+                    "message_id": (response.get("messages") or [{}])[0].get("id"),
                     "sent_by": current_user.email
                 }
             )
@@ -162,6 +129,18 @@ async def send_template(
     """
     Envia uma mensagem de template via WhatsApp.
     """
+    try:
+        await template_cache.validate(
+            template_name=template_data["template_name"],
+            language_code=template_data.get("language_code", "pt_BR"),
+            components=template_data.get("components")
+        )
+    except TemplateError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
     try:
         response = await whatsapp_service.send_template(
             phone_number=template_data["phone_number"],
@@ -184,7 +163,7 @@ async def send_template(
                 interaction_data={
                     "type": "template_sent",
                     "template_name": template_data["template_name"],
-                    "message_id": response.get("message_id"),
+                    "message_id": (response.get("messages") or [{}])[0].get("id"),
                     "sent_by": current_user.email
                 }
             )
@@ -205,11 +184,41 @@ async def get_templates(
     Lista os templates disponíveis.
     """
     try:
-        templates = await whatsapp_service.get_templates()
+        templates = await template_cache.get_templates()
         return templates
     
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Erro ao listar templates: {str(e)}"
-        ) 
\ No newline at end of file
+        ) 
+
+@router.get("/metrics")
+async def get_metrics(
+    current_user: User = Depends(deps.get_current_active_user)
+):
+    """
+    Retorna os contadores do processamento de mensagens.
+    """
+    return {
+        "webhook_queue": {"pending": await webhook_queue.depth()},
+        "dedup": message_deduplicator.stats(),
+        "dispatcher": dispatcher.stats(),
+        "coalescer": coalescer.stats(),
+        "turn_latency": turn_latency.stats(),
+        "ai_cache": response_cache.stats(),
+        "ai": ai_service.stats(),
+        "intents": intent_classifier.stats(),
+        "conversation_context": conversation_context.stats(),
+        "customers": customer_cache.stats(),
+        "interactions": interaction_log.stats(),
+        "messages": message_log.stats(),
+        "statuses": status_buffer.stats(),
+        "database": statement_counter.stats(),
+        "media": media_service.stats(),
+        "templates": template_cache.stats(),
+        "outbound": {
+            "queue_depth": outbound_scheduler.queue_depth(),
+            "numbers": outbound_scheduler.stats()
+        }
+    }
@@ -0,0 +1,55 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional, Any
+from enum import Enum
+
+class Sentiment(str, Enum):
+    POSITIVO = "POSITIVO"
+    NEGATIVO = "NEGATIVO"
+    NEUTRO = "NEUTRO"
+
+class Intent(str, Enum):
+    PURCHASE = "purchase_intent"
+    ORDER_STATUS = "order_status"
+    SUPPORT = "support"
+    GENERAL = "general"
+
+class ProductMention(BaseModel):
+    product_name: str = Field(..., min_length=1)
+    quantity: int = Field(1, ge=1)
+    specific_info: List[str] = []
+
+    @field_validator("quantity", mode="before")
+    @classmethod
+    def default_quantity(cls, value: Any) -> Any:
+        return 1 if value in (None, "", 0) else value
+
+    @field_validator("specific_info", mode="before")
+    @classmethod
+    def listify_info(cls, value: Any) -> Any:
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [value]
+        return value
+
+class MessageAnalysis(BaseModel):
+    reply: str = Field(..., min_length=1)
+    intent: Intent = Intent.GENERAL
+    sentiment: Sentiment = Sentiment.NEUTRO
+    products: List[ProductMention] = []
+
+    @field_validator("intent", mode="before")
+    @classmethod
+    def known_intent(cls, value: Any) -> Any:
+        if isinstance(value, Intent):
+            return value
+        value = str(value or "").strip().lower()
+        return value if value in Intent._value2member_map_ else Intent.GENERAL
+
+    @field_validator("sentiment", mode="before")
+    @classmethod
+    def known_sentiment(cls, value: Any) -> Any:
+        if isinstance(value, Sentiment):
+            return value
+        value = str(value or "").strip().upper()
+        return value if value in Sentiment._value2member_map_ else Sentiment.NEUTRO
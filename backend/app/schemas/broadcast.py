@@ -0,0 +1,47 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+from enum import Enum
+
+class BroadcastStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+class BroadcastAudience(BaseModel):
+    customer_ids: Optional[List[int]] = Field(None, min_length=1)
+    active_within_days: Optional[int] = Field(None, gt=0)
+
+    @model_validator(mode="after")
+    def check_audience(self):
+        # Um disparo é pago e irreversível: o público nunca é implícito
+        if (self.customer_ids is None) == (self.active_within_days is None):
+            raise ValueError("Informe customer_ids ou active_within_days (apenas um)")
+        return self
+
+class BroadcastCreate(BaseModel):
+    template_name: str
+    language_code: str = "pt_BR"
+    components: Optional[List[Dict[str, Any]]] = None
+    audience: BroadcastAudience
+
+class Broadcast(BaseModel):
+    id: int
+    user_id: int
+    template_name: str
+    language_code: str
+    components: Optional[List[Dict[str, Any]]] = None
+    audience: Optional[Dict[str, Any]] = None
+    status: BroadcastStatus
+    total: int
+    sent: int
+    failed: int
+    last_customer_id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
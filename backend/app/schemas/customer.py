@@ -1,12 +1,28 @@
-from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, Dict, Any
+import re
+from pydantic import BaseModel, Field, EmailStr, field_validator
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
+def normalize_whatsapp_number(number: str) -> str:
+    """
+    Normaliza o número para E.164 ("+5511999999999"): só dígitos, sem o
+    prefixo internacional 00, com "+" na frente.
+    """
+    digits = re.sub(r"\D", "", number or "")
+    if digits.startswith("00"):
+        digits = digits[2:]
+    return f"+{digits}" if digits else number
+
 class CustomerBase(BaseModel):
-    whatsapp_number: str = Field(pattern=r'^\+?[1-9]\d{10,14}$')
+    whatsapp_number: str = Field(pattern=r'^\+[1-9]\d{10,14}$')
     name: str = Field(..., min_length=3, max_length=100)
     email: Optional[EmailStr] = None
-    interaction_history: Optional[Dict[str, Any]] = None
+    interaction_history: Optional[List[Dict[str, Any]]] = None
+
+    @field_validator("whatsapp_number", mode="before")
+    @classmethod
+    def normalize_number(cls, value: Any) -> Any:
+        return normalize_whatsapp_number(value) if isinstance(value, str) else value
 
 class CustomerCreate(CustomerBase):
     pass
@@ -14,7 +30,7 @@ class CustomerCreate(CustomerBase):
 class CustomerUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=3, max_length=100)
     email: Optional[EmailStr] = None
-    interaction_history: Optional[Dict[str, Any]] = None
+    interaction_history: Optional[List[Dict[str, Any]]] = None
 
 class Customer(CustomerBase):
     id: int
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+class MessageCreate(BaseModel):
+    customer_id: int
+    content: Optional[str] = None
+    direction: str  # incoming, outgoing
+    message_type: str = "text"
+    processed_by_ai: bool = False
+    ai_response: Optional[Dict[str, Any]] = None
+    whatsapp_message_id: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+
+class Message(MessageCreate):
+    id: int
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class MessageStatusCreate(BaseModel):
+    message_id: str
+    recipient_id: Optional[str] = None
+    status: str
+    timestamp: Optional[datetime] = None
+    pricing_category: Optional[str] = None
+    error_code: Optional[int] = None
+
+class MessageStatus(MessageStatusCreate):
+    id: int
+
+    class Config:
+        from_attributes = True
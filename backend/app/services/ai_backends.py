@@ -0,0 +1,297 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+from collections import defaultdict, deque
+from types import SimpleNamespace
+from typing import Any, Callable, Deque, Dict, List, Optional, Pattern, Tuple
+import openai
+from app.core.config import settings
+from app.services.ai_gateway import request_key
+from app.services.intent_classifier import intent_classifier
+
+class AIBackend:
+    """
+    Interface dos provedores de modelo usados pelo AIService.
+
+    `chat_completion` recebe os mesmos parâmetros do endpoint de chat da
+    OpenAI e devolve um objeto com `choices[0].message.content` e
+    `choices[0].finish_reason`.
+    """
+    name = "base"
+
+    async def chat_completion(self, **params: Any) -> Any:
+        raise NotImplementedError
+
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        raise NotImplementedError
+
+def completion(content: str, finish_reason: str = "stop") -> Any:
+    """
+    Resposta no formato do cliente da OpenAI.
+    """
+    return SimpleNamespace(choices=[SimpleNamespace(
+        message=SimpleNamespace(role="assistant", content=content),
+        finish_reason=finish_reason
+    )])
+
+class OpenAIBackend(AIBackend):
+    name = "openai"
+
+    def __init__(self, api_key: str, timeout: float):
+        self.client = openai.AsyncOpenAI(api_key=api_key, timeout=timeout)
+
+    async def chat_completion(self, **params: Any) -> Any:
+        return await self.client.chat.completions.create(**params)
+
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        response = await self.client.embeddings.create(model=model, input=texts)
+        return [item.embedding for item in response.data]
+
+class LatencyModel:
+    """
+    Latência simulada: fixed, uniform ou lognormal em torno de `median_ms`.
+
+    A amostra depende só da semente e da requisição, então a mesma carga
+    produz os mesmos tempos em qualquer ordem de execução.
+    """
+    DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+    def __init__(self, distribution: str, median_ms: float, spread: float, seed: int = 0):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"distribuição de latência desconhecida: {distribution}")
+        self.distribution = distribution
+        self.median_ms = median_ms
+        self.spread = spread
+        self.seed = seed
+
+    def sample(self, key: str) -> float:
+        """
+        Latência, em segundos, da requisição identificada por `key`.
+        """
+        rng = random.Random(f"{self.seed}:{key}")
+        if self.distribution == "fixed" or self.median_ms <= 0:
+            ms = self.median_ms
+        elif self.distribution == "uniform":
+            ms = rng.uniform(
+                self.median_ms * (1 - self.spread), self.median_ms * (1 + self.spread)
+            )
+        else:
+            ms = rng.lognormvariate(math.log(self.median_ms), self.spread)
+        return max(ms, 0.0) / 1000
+
+# (padrão no prompt de sistema, padrão na mensagem, resposta)
+Rule = Tuple[Optional[Pattern], Optional[Pattern], Callable[[str, str], str]]
+
+LOCAL_REPLIES = [
+    "Claro! Posso te ajudar com isso.",
+    "Temos sim! Quer que eu te passe mais detalhes?",
+    "Vou verificar para você, só um momento.",
+    "Entendi! Me conta um pouco mais, por favor."
+]
+
+class LocalBackend(AIBackend):
+    """
+    Substituto determinístico do modelo para testes de carga e benchmarks.
+
+    As respostas seguem regras (padrão no prompt de sistema e/ou na mensagem
+    do cliente); as do roteiro em `script_path` (lista JSON de objetos com
+    "system", "user" e "content") têm precedência sobre as
+    padrão, que cobrem os prompts do AIService. Nada sai da máquina.
+    """
+    name = "local"
+
+    def __init__(self, latency: LatencyModel, script_path: str = "", dimensions: int = 64):
+        self.latency = latency
+        self.dimensions = dimensions
+        self.rules: List[Rule] = []
+        if script_path:
+            self.rules.extend(_load_script(script_path))
+        self.rules.extend(_default_rules())
+        self.calls = 0
+
+    async def chat_completion(self, **params: Any) -> Any:
+        self.calls += 1
+        await asyncio.sleep(self.latency.sample(request_key(params)))
+        messages = params.get("messages", [])
+        system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+        user = next(
+            (m["content"] for m in reversed(messages) if m["role"] == "user"), ""
+        )
+        for system_pattern, user_pattern, respond in self.rules:
+            if system_pattern and not system_pattern.search(system):
+                continue
+            if user_pattern and not user_pattern.search(user):
+                continue
+            content = respond(system, user)
+            break
+        else:
+            content = _pick(LOCAL_REPLIES, user)
+
+        # Respeita max_tokens como o modelo real (≈ 4 caracteres por token)
+        limit = params.get("max_tokens")
+        if limit and len(content) > limit * 4:
+            return completion(content[:limit * 4], "length")
+        return completion(content)
+
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        await asyncio.sleep(self.latency.sample(request_key({"input": texts})))
+        return [self._vector(text) for text in texts]
+
+    def _vector(self, text: str) -> List[float]:
+        # Saco de palavras com hashing: textos parecidos ficam próximos
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word.encode()).digest()
+            vector[digest[0] % self.dimensions] += 1.0 if digest[1] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+def _pick(options: List[str], text: str) -> str:
+    return options[int(hashlib.md5(text.encode()).hexdigest(), 16) % len(options)]
+
+def _analysis(system: str, user: str) -> str:
+    return json.dumps({
+        "reply": _pick(LOCAL_REPLIES, user),
+        "intent": (
+            "purchase_intent" if intent_classifier.has_purchase_intent(user) else "general"
+        ),
+        "sentiment": "NEUTRO",
+        "products": []
+    }, ensure_ascii=False)
+
+def _summary(system: str, user: str) -> str:
+    return " ".join(user.split())[-400:]
+
+def _default_rules() -> List[Rule]:
+    return [
+        (re.compile(r'"reply"'), None, _analysis),
+        (re.compile(r"Analise o sentimento"), None, lambda system, user: "NEUTRO"),
+        (re.compile(r"Extraia informações sobre produtos"), None, lambda system, user: '{"products": []}'),
+        (re.compile(r"Atualize o resumo"), None, _summary),
+    ]
+
+def _load_script(path: str) -> List[Rule]:
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    rules: List[Rule] = []
+    for entry in entries:
+        content = entry["content"]
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False)
+        rules.append((
+            re.compile(entry["system"]) if entry.get("system") else None,
+            re.compile(entry["user"], re.IGNORECASE) if entry.get("user") else None,
+            lambda system, user, content=content: content
+        ))
+    return rules
+
+class RecordingBackend(AIBackend):
+    """
+    Repassa as chamadas a outro provedor e grava requisição, resposta e
+    latência em JSON Lines, para reprodução com ReplayBackend.
+    """
+    name = "record"
+
+    def __init__(self, inner: AIBackend, path: str):
+        self.inner = inner
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    async def chat_completion(self, **params: Any) -> Any:
+        started_at = time.monotonic()
+        response = await self.inner.chat_completion(**params)
+        choice = response.choices[0]
+        self._write({
+            "kind": "chat",
+            "key": request_key(params),
+            "params": params,
+            "content": choice.message.content,
+            "finish_reason": choice.finish_reason,
+            "latency": time.monotonic() - started_at
+        })
+        return response
+
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        started_at = time.monotonic()
+        vectors = await self.inner.embed(texts, model)
+        self._write({
+            "kind": "embed",
+            "key": request_key({"model": model, "input": texts}),
+            "vectors": vectors,
+            "latency": time.monotonic() - started_at
+        })
+        return vectors
+
+    def _write(self, record: Dict[str, Any]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+class ReplayBackend(AIBackend):
+    """
+    Reproduz uma gravação do RecordingBackend, sem chamar o modelo.
+
+    Requisições repetidas recebem as respostas gravadas na ordem em que
+    ocorreram (a última se repete). Uma requisição sem gravação gera
+    LookupError.
+    """
+    name = "replay"
+
+    def __init__(self, path: str, replay_latency: bool = True):
+        self.replay_latency = replay_latency
+        self._records: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._records[record["key"]].append(record)
+        self.misses = 0
+
+    async def chat_completion(self, **params: Any) -> Any:
+        record = await self._next(request_key(params))
+        return completion(record["content"], record["finish_reason"])
+
+    async def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        record = await self._next(request_key({"model": model, "input": texts}))
+        return record["vectors"]
+
+    async def _next(self, key: str) -> Dict[str, Any]:
+        records = self._records.get(key)
+        if not records:
+            self.misses += 1
+            raise LookupError(f"requisição sem gravação: {key[:12]}")
+        record = records.popleft() if len(records) > 1 else records[0]
+        if self.replay_latency:
+            await asyncio.sleep(record["latency"])
+        return record
+
+def create_backend() -> AIBackend:
+    """
+    Provedor escolhido em AI_BACKEND: openai, local, record ou replay.
+    """
+    kind = settings.AI_BACKEND
+    if kind == "local":
+        return LocalBackend(
+            LatencyModel(
+                settings.AI_LOCAL_LATENCY,
+                settings.AI_LOCAL_LATENCY_MS,
+                settings.AI_LOCAL_LATENCY_SPREAD,
+                settings.AI_LOCAL_SEED
+            ),
+            script_path=settings.AI_LOCAL_SCRIPT_PATH
+        )
+    if kind == "replay":
+        return ReplayBackend(settings.AI_RECORDING_PATH)
+
+    backend = OpenAIBackend(settings.OPENAI_API_KEY, settings.AI_REQUEST_TIMEOUT_SECONDS)
+    if kind == "record":
+        return RecordingBackend(backend, settings.AI_RECORDING_PATH)
+    if kind != "openai":
+        raise ValueError(f"AI_BACKEND desconhecido: {kind}")
+    return backend
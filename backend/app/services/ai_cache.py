@@ -0,0 +1,165 @@
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.redis import get_redis
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza a mensagem: minúsculas, sem acentos, pontuação ou espaços extras.
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+class ResponseCache:
+    """
+    Cache de respostas da IA em dois níveis: LRU em memória e Redis.
+
+    A chave é o texto normalizado por vendedor (número do WhatsApp). Cada
+    resposta guarda a versão do catálogo em que foi gerada; a versão fica no
+    Redis e é incrementada a cada alteração de produto, o que invalida todas
+    as respostas anteriores. Sem acesso ao Redis o cache não é usado, pois não
+    há como conferir a versão. Mensagens com histórico de conversa não passam
+    pelo cache (ver AIService.process_message_with_ai) e são contadas em
+    `skipped_with_context`.
+    """
+    def __init__(
+        self,
+        ttl_seconds: int,
+        local_size: int,
+        disabled_sellers: List[str],
+        prefix: str = "ai:reply:"
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.local_size = local_size
+        self.disabled_sellers = set(disabled_sellers)
+        self.prefix = prefix
+        self.version_key = f"{prefix}catalog_version"
+        self._local: "OrderedDict[str, Tuple[Dict[str, Any], str, float]]" = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.skipped_with_context = 0
+
+    def enabled_for(self, seller: str) -> bool:
+        return self.ttl_seconds > 0 and seller not in self.disabled_sellers
+
+    async def lookup(
+        self, seller: str, text: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Retorna a resposta em cache (se ainda válida) e a versão atual do catálogo.
+
+        A versão deve ser repassada a `store`, para que uma resposta gerada
+        antes de uma alteração do catálogo não seja gravada como atual.
+        """
+        if not self.enabled_for(seller) or not normalize_text(text):
+            return None, None
+
+        key = self._key(seller, text)
+        try:
+            version, stored = await get_redis().mget(self.version_key, key)
+        except Exception as e:
+            print(f"Erro ao consultar cache de respostas no Redis: {str(e)}")
+            self.errors += 1
+            return None, None
+        version = version or "0"
+
+        now = time.monotonic()
+        local = self._local.get(key)
+        if local is not None and local[1] == version and local[2] > now:
+            self._local.move_to_end(key)
+            self.local_hits += 1
+            return local[0], version
+
+        if stored:
+            entry = json.loads(stored)
+            if entry.get("version") == version:
+                self._remember(key, entry["response"], version, now)
+                self.redis_hits += 1
+                return entry["response"], version
+
+        self.misses += 1
+        return None, version
+
+    async def store(
+        self,
+        seller: str,
+        text: str,
+        response: Dict[str, Any],
+        version: Optional[str]
+    ):
+        """
+        Guarda a resposta gerada na versão do catálogo obtida em `lookup`.
+        """
+        if version is None or not self.enabled_for(seller) or not normalize_text(text):
+            return
+
+        key = self._key(seller, text)
+        try:
+            await get_redis().set(
+                key,
+                json.dumps({"version": version, "response": response}),
+                ex=self.ttl_seconds
+            )
+        except Exception as e:
+            print(f"Erro ao gravar cache de respostas no Redis: {str(e)}")
+            self.errors += 1
+            return
+        self._remember(key, response, version, time.monotonic())
+
+    async def catalog_version(self) -> str:
+        """
+        Retorna a versão atual do catálogo.
+        """
+        return await get_redis().get(self.version_key) or "0"
+
+    async def bump_catalog_version(self) -> Optional[str]:
+        """
+        Invalida todas as respostas em cache (o catálogo mudou) e retorna a
+        nova versão (None se o Redis falhar).
+        """
+        self._local.clear()
+        try:
+            return str(await get_redis().incr(self.version_key))
+        except Exception as e:
+            print(f"Erro ao atualizar versão do catálogo no Redis: {str(e)}")
+            self.errors += 1
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.local_hits + self.redis_hits
+        total = hits + self.misses
+        return {
+            "hits": hits,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "skipped_with_context": self.skipped_with_context,
+            "errors": self.errors,
+            "hit_ratio": hits / total if total else 0.0,
+            "local_size": len(self._local)
+        }
+
+    def _key(self, seller: str, text: str) -> str:
+        digest = hashlib.sha1(normalize_text(text).encode()).hexdigest()
+        return f"{self.prefix}{seller}:{digest}"
+
+    def _remember(self, key: str, response: Dict[str, Any], version: str, now: float):
+        self._local[key] = (response, version, now + self.ttl_seconds)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+response_cache = ResponseCache(
+    ttl_seconds=settings.AI_CACHE_TTL_SECONDS,
+    local_size=settings.AI_CACHE_LOCAL_SIZE,
+    disabled_sellers=settings.AI_CACHE_DISABLED_SELLERS
+)
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.services.latency import LatencyTracker
+
+# Amostras necessárias antes de usar o p95 observado como limite de hedge
+MIN_HEDGE_SAMPLES = 20
+
+class AIGatewayBusy(Exception):
+    """
+    A chamada esperou mais que o limite por uma vaga de concorrência.
+    """
+
+class AIGateway:
+    """
+    Ponto único de saída para as chamadas ao modelo.
+
+    Requisições idênticas em andamento compartilham uma única chamada, e no
+    máximo `max_concurrency` chamadas rodam ao mesmo tempo; quem esperar mais
+    de `queue_timeout` segundos por uma vaga recebe AIGatewayBusy.
+
+    Com `hedge_after` definido, uma chamada que passa do p95 observado (ou de
+    `hedge_after`, enquanto não há amostras) ganha uma segunda requisição
+    idêntica, desde que haja vaga livre; vale a primeira que responder.
+    """
+    def __init__(
+        self,
+        create: Callable[..., Awaitable[Any]],
+        max_concurrency: int,
+        queue_timeout: float,
+        hedge_after: Optional[float] = None
+    ):
+        self.create = create
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.hedge_after = hedge_after
+        self.latency = LatencyTracker(500)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.in_flight = 0
+        self.queued = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.rejected = 0
+        self.errors = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    async def chat_completion(self, **params: Any) -> Any:
+        """
+        Executa (ou reaproveita, se idêntica e em andamento) uma chamada.
+        """
+        key = request_key(params)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = asyncio.ensure_future(self._call(params))
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._finish(key, f))
+        # Um chamador cancelado não cancela a chamada dos demais
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "coalesced": self.coalesced,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "latency": self.latency.stats()
+        }
+
+    async def _call(self, params: Dict[str, Any]) -> Any:
+        first = asyncio.ensure_future(self._attempt(params))
+        delay = self._hedge_delay()
+        if delay is None:
+            return await first
+
+        done, _ = await asyncio.wait([first], timeout=delay)
+        if done or self._get_semaphore().locked():
+            # Respondeu a tempo, ou não há folga para duplicar a chamada
+            return await first
+
+        self.hedged += 1
+        second = asyncio.ensure_future(self._attempt(params))
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+            # As duas falharam: vale o erro da original
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _attempt(self, params: Dict[str, Any]) -> Any:
+        semaphore = self._get_semaphore()
+        self.queued += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise AIGatewayBusy(
+                f"sem vaga para chamar o modelo após {self.queue_timeout}s"
+            )
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        started_at = time.monotonic()
+        try:
+            response = await self.create(**params)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+        self.latency.observe_since(started_at)
+        self.completed += 1
+        return response
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_after is None:
+            return None
+        if self.latency.count >= MIN_HEDGE_SAMPLES:
+            return self.latency.percentile(0.95)
+        return self.hedge_after
+
+    def _finish(self, key: str, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            # Evita aviso de exceção não lida quando todos desistiram
+            future.exception()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Criado sob demanda para ficar associado ao loop em execução
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+def request_key(params: Dict[str, Any]) -> str:
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
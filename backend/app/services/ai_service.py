@@ -1,10 +1,29 @@
-from typing import Dict, Any
-import openai
+import json
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from pydantic import ValidationError
 from app.core.config import settings
+from app.schemas.ai import Intent, MessageAnalysis, ProductMention
+from app.services.ai_backends import AIBackend, create_backend
+from app.services.ai_cache import response_cache
+from app.services.ai_gateway import AIGateway
+from app.services.intent_classifier import intent_classifier, CANNED_RESPONSES
+
+HOLDING_REPLY = "Recebi sua mensagem! Só um instante que já te respondo. 😊"
 
 class AIService:
-    def __init__(self):
-        openai.api_key = settings.OPENAI_API_KEY
+    def __init__(self, backend: Optional[AIBackend] = None):
+        # Provedor do modelo (ver AI_BACKEND): OpenAI, local, gravação ou reprodução
+        self.backend = backend or create_backend()
+        self.gateway = AIGateway(
+            create=self.backend.chat_completion,
+            max_concurrency=settings.AI_MAX_CONCURRENCY,
+            queue_timeout=settings.AI_QUEUE_TIMEOUT_SECONDS,
+            hedge_after=(
+                settings.AI_HEDGE_AFTER_SECONDS if settings.AI_HEDGE_ENABLED else None
+            )
+        )
+        self.holding_replies = 0
         
         self.system_prompt = """
         Você é um assistente virtual de uma loja online. Seu objetivo é ajudar os clientes com:
@@ -18,44 +37,107 @@ class AIService:
         Se identificar intenção de compra, retorne intent: purchase_intent.
         Se não souber responder algo, seja honesto e sugira falar com um atendente humano.
         """
+
+        self.analysis_prompt = self.system_prompt + """
+        Responda SOMENTE com um objeto JSON, sem texto fora dele, no formato:
+        {
+          "reply": "resposta para o cliente",
+          "intent": "purchase_intent | order_status | support | general",
+          "sentiment": "POSITIVO | NEGATIVO | NEUTRO",
+          "products": [
+            {"product_name": "nome", "quantity": 1, "specific_info": ["preço", "cor"]}
+          ]
+        }
+        Use "products": [] se nenhum produto for mencionado.
+        """
     
     async def process_message_with_ai(
         self,
-        message: str
+        message: str,
+        seller: Optional[str] = None,
+        products: Optional[List[Any]] = None,
+        context: Optional[List[Dict[str, str]]] = None
     ) -> Dict[str, Any]:
         """
         Processa uma mensagem usando IA para gerar uma resposta apropriada.
+
+        Saudações, agradecimentos e pedidos de catálogo são respondidos pelo
+        classificador local. Mensagens equivalentes (após normalização) e
+        sem histórico de conversa reutilizam a resposta em cache do vendedor
+        enquanto o catálogo não mudar. `products` são os itens do catálogo relevantes para a
+        mensagem e `context` o histórico da conversa (ver
+        conversation_context), ambos incluídos no prompt.
         """
-        try:
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": message}
-                ],
-                temperature=0.7,
-                max_tokens=150
-            )
-            
-            # Extrair a resposta
-            ai_message = response.choices[0].message.content
-            
-            # Verificar se há intenção de compra
-            purchase_keywords = [
-                "comprar", "preço", "valor", "quanto custa",
-                "produtos", "catálogo", "disponível"
-            ]
-            has_purchase_intent = any(
-                keyword in message.lower()
-                for keyword in purchase_keywords
-            )
-            
+        local = intent_classifier.classify(message)
+        if local is not None:
+            label, _ = local
             return {
                 "should_respond": True,
-                "response": ai_message,
-                "intent": "purchase_intent" if has_purchase_intent else "general",
-                "confidence": response.choices[0].finish_reason == "stop"
+                "response": CANNED_RESPONSES[label],
+                # O catálogo segue junto da resposta (ver respond_to_turn)
+                "intent": "purchase_intent" if label == "catalog" else label,
+                "confidence": True,
+                "source": "local",
+                "label": label
             }
+
+        seller = seller or settings.WHATSAPP_PHONE_NUMBER_ID
+        cached, catalog_version = None, None
+        if context:
+            # Com histórico, a mesma mensagem pode pedir outra resposta, e uma
+            # chave que incluísse o histórico quase nunca se repetiria: só as
+            # mensagens sem contexto (início da conversa) usam o cache
+            response_cache.skipped_with_context += 1
+        else:
+            cached, catalog_version = await response_cache.lookup(seller, message)
+        if cached is not None:
+            return cached
+
+        try:
+            if settings.AI_COMBINED_ANALYSIS:
+                analysis, complete = await self._request_analysis(
+                    message, products, context
+                )
+                result = {
+                    "should_respond": True,
+                    "response": analysis.reply,
+                    "intent": analysis.intent.value,
+                    "confidence": complete,
+                    "source": "llm",
+                    "sentiment": analysis.sentiment.value,
+                    "products": [p.model_dump() for p in analysis.products]
+                }
+            else:
+                response = await self.gateway.chat_completion(
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {"role": "system", "content": self.system_prompt},
+                        *catalog_context(products),
+                        *(context or []),
+                        {"role": "user", "content": message}
+                    ],
+                    temperature=0.7,
+                    max_tokens=150
+                )
+
+                # Extrair a resposta
+                ai_message = response.choices[0].message.content
+
+                # Verificar se há intenção de compra
+                has_purchase_intent = intent_classifier.has_purchase_intent(message)
+
+                result = {
+                    "should_respond": True,
+                    "response": ai_message,
+                    "intent": "purchase_intent" if has_purchase_intent else "general",
+                    "confidence": response.choices[0].finish_reason == "stop",
+                    "source": "llm"
+                }
+
+            if result["confidence"]:
+                # Respostas truncadas ou malformadas não são reaproveitadas
+                await response_cache.store(seller, message, result, catalog_version)
+            return result
         
         except Exception as e:
             print(f"Erro ao processar mensagem com IA: {str(e)}")
@@ -65,6 +147,95 @@ class AIService:
                 "intent": "error",
                 "confidence": 0
             }
+
+    def holding_reply(self) -> Dict[str, Any]:
+        """
+        Resposta imediata enquanto a resposta completa ainda está sendo gerada.
+        """
+        self.holding_replies += 1
+        return {
+            "should_respond": True,
+            "response": HOLDING_REPLY,
+            "intent": "general",
+            "confidence": True,
+            "source": "fallback"
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "holding_replies": self.holding_replies,
+            **self.gateway.stats()
+        }
+
+    async def analyze_message(
+        self,
+        message: str,
+        products: Optional[List[Any]] = None
+    ) -> MessageAnalysis:
+        """
+        Gera resposta, intenção, sentimento e produtos mencionados em uma
+        única chamada ao modelo.
+        """
+        analysis, _ = await self._request_analysis(message, products)
+        return analysis
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Gera embeddings para os textos (busca semântica no catálogo).
+        """
+        return await self.backend.embed(texts, settings.AI_EMBEDDING_MODEL)
+
+    async def summarize_conversation(
+        self,
+        summary: str,
+        turns: List[Dict[str, str]],
+        max_tokens: int
+    ) -> str:
+        """
+        Atualiza o resumo da conversa com as rodadas que saíram da janela.
+        """
+        transcript = "\n".join(
+            f"Cliente: {turn['user']}\nAssistente: {turn['assistant']}"
+            for turn in turns
+        )
+        response = await self.gateway.chat_completion(
+            model="gpt-3.5-turbo",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "Atualize o resumo de um atendimento de loja com as novas mensagens. Mantenha nomes, produtos, quantidades, pedidos e pendências; descarte cumprimentos. Responda apenas com o resumo, em português."
+                },
+                {
+                    "role": "user",
+                    "content": f"Resumo atual:\n{summary or '(vazio)'}\n\nNovas mensagens:\n{transcript}"
+                }
+            ],
+            temperature=0,
+            max_tokens=max_tokens
+        )
+        return (response.choices[0].message.content or "").strip()
+
+    async def _request_analysis(
+        self,
+        message: str,
+        products: Optional[List[Any]] = None,
+        context: Optional[List[Dict[str, str]]] = None
+    ) -> Tuple[MessageAnalysis, bool]:
+        response = await self.gateway.chat_completion(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": self.analysis_prompt},
+                *catalog_context(products),
+                *(context or []),
+                {"role": "user", "content": message}
+            ],
+            temperature=0.7,
+            max_tokens=300
+        )
+        content = response.choices[0].message.content or ""
+        analysis, valid = parse_analysis(content, message)
+        return analysis, valid and response.choices[0].finish_reason == "stop"
     
     async def analyze_sentiment(
         self,
@@ -74,7 +245,7 @@ class AIService:
         Analisa o sentimento da mensagem do cliente.
         """
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await self.gateway.chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {
@@ -103,19 +274,19 @@ class AIService:
     async def extract_product_info(
         self,
         message: str
-    ) -> Dict[str, Any]:
+    ) -> Optional[List[ProductMention]]:
         """
         Extrai informações sobre produtos mencionados na mensagem.
         """
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await self.gateway.chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {
                         "role": "system",
                         "content": """
                         Extraia informações sobre produtos mencionados na mensagem.
-                        Retorne um JSON com:
+                        Retorne um JSON com a chave "products", uma lista de objetos com:
                         - product_name: nome do produto mencionado
                         - quantity: quantidade mencionada (default: 1)
                         - specific_info: informações específicas solicitadas (preço, cor, tamanho, etc)
@@ -127,10 +298,91 @@ class AIService:
                 max_tokens=150
             )
             
-            return response.choices[0].message.content
+            data = _load_json(response.choices[0].message.content or "")
+            return parse_products(data if data is not None else {})
         
         except Exception as e:
             print(f"Erro ao extrair informações do produto: {str(e)}")
             return None
 
+def catalog_context(products: Optional[List[Any]]) -> List[Dict[str, str]]:
+    """
+    Mensagem de sistema com os produtos relevantes para a pergunta.
+    """
+    if not products:
+        return []
+    lines = [
+        f"- {p.name} (R$ {p.price:.2f}): {p.description[:200]}"
+        for p in products
+    ]
+    return [{
+        "role": "system",
+        "content": (
+            "Produtos do catálogo relacionados à mensagem (use apenas estes "
+            "preços):\n" + "\n".join(lines)
+        )
+    }]
+
+def parse_analysis(content: str, message: str) -> Tuple[MessageAnalysis, bool]:
+    """
+    Valida a saída do modelo; retorna a análise e se ela veio bem formada.
+
+    Com saída malformada, aproveita o que for possível: o texto vira a
+    resposta e a intenção de compra vem das palavras-chave.
+    """
+    data = _load_json(content)
+    if isinstance(data, dict):
+        try:
+            return MessageAnalysis.model_validate(
+                {**data, "products": parse_products(data)}
+            ), True
+        except ValidationError:
+            pass
+        reply = data.get("reply") if isinstance(data.get("reply"), str) else ""
+    else:
+        data = {}
+        reply = content.strip()
+
+    if not reply.strip():
+        raise ValueError("resposta do modelo sem texto para o cliente")
+
+    analysis = MessageAnalysis(
+        reply=reply,
+        intent=(
+            Intent.PURCHASE
+            if intent_classifier.has_purchase_intent(message)
+            else data.get("intent")
+        ),
+        sentiment=data.get("sentiment"),
+        products=parse_products(data)
+    )
+    return analysis, False
+
+def parse_products(data: Any) -> List[ProductMention]:
+    """
+    Converte a lista de produtos do modelo, descartando itens inválidos.
+    """
+    if isinstance(data, dict):
+        data = data.get("products", [data] if "product_name" in data else [])
+    if not isinstance(data, list):
+        return []
+
+    products = []
+    for item in data:
+        try:
+            products.append(ProductMention.model_validate(item))
+        except ValidationError:
+            continue
+    return products
+
+def _load_json(content: str) -> Any:
+    # O modelo às vezes envolve o JSON em ```json ... ``` ou em texto
+    match = re.search(r"[\[{].*[\]}]", content, re.DOTALL)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(0))
+    except ValueError:
+        return None
+
 ai_service = AIService() 
\ No newline at end of file
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set
+from sqlalchemy import exc
+
+# Falhas do banco em si (conexão, pool): o lote é repetido depois, inteiro
+TRANSIENT_ERRORS = (exc.OperationalError, exc.InterfaceError, exc.TimeoutError)
+
+class BatchWriter:
+    """
+    Acumula itens e os grava em lote, em uma thread separada para não
+    competir com o processamento das mensagens.
+
+    O lote é gravado quando atinge `max_size` itens ou a cada
+    `flush_interval` segundos, na ordem de chegada. Se o lote é recusado
+    (ex.: uma linha inválida), ele é dividido ao meio até isolar os itens
+    recusados, que são descartados e contados em `dropped`. Se o banco está
+    indisponível, o restante volta para o início do buffer e nova tentativa
+    é agendada com backoff exponencial (até `max_backoff` segundos). O buffer
+    guarda no máximo `max_size * 10` itens; o excedente é descartado.
+
+    As subclasses implementam `_write`, que grava uma lista de itens e
+    retorna quantos foram gravados.
+    """
+    label = "itens"
+
+    def __init__(self, max_size: int, flush_interval: float, max_backoff: float = 30.0):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self._items: List[Any] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self._timer: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._failures = 0
+        self._retry_at = 0.0
+        self.received = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.dropped = 0
+
+    def _enqueue(self, items: List[Any]):
+        """
+        Adiciona itens ao buffer e agenda a gravação.
+        """
+        if not items:
+            return
+        self._items.extend(items)
+        self.received += len(items)
+
+        backing_off = time.monotonic() < self._retry_at
+        if len(self._items) >= self.max_size and not backing_off:
+            task = asyncio.create_task(self.flush())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later(self.flush_interval))
+
+    async def flush(self):
+        """
+        Grava imediatamente todos os itens acumulados.
+        """
+        async with self._get_lock():
+            while self._items:
+                items = self._items[:self.max_size]
+                del self._items[:self.max_size]
+                pending = await self._write_batch(items)
+                if not pending:
+                    continue
+
+                self._requeue(pending)
+                self._failures += 1
+                delay = min(self.max_backoff, self.flush_interval * 2 ** self._failures)
+                self._retry_at = time.monotonic() + delay
+                # Só a nova tentativa com backoff fica agendada
+                if self._timer is not None and self._timer is not asyncio.current_task():
+                    self._timer.cancel()
+                self._timer = asyncio.create_task(self._flush_later(delay))
+                return
+
+            self._failures = 0
+            self._retry_at = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna os contadores do buffer.
+        """
+        return {
+            "buffered": len(self._items),
+            "received": self.received,
+            "written": self.written,
+            "batches": self.batches,
+            "errors": self.errors,
+            "dropped": self.dropped
+        }
+
+    def _write(self, items: List[Any]) -> int:
+        raise NotImplementedError
+
+    async def _write_batch(self, items: List[Any]) -> List[Any]:
+        """
+        Grava o lote isolando os itens recusados. Retorna os itens não
+        gravados por indisponibilidade do banco, na ordem original.
+        """
+        pending = [items]
+        while pending:
+            batch = pending.pop()
+            try:
+                written = await asyncio.to_thread(self._write, batch)
+            except TRANSIENT_ERRORS as e:
+                print(f"Erro ao gravar {self.label}: {str(e)}")
+                self.errors += 1
+                return [item for rest in [batch, *reversed(pending)] for item in rest]
+            except Exception as e:
+                self.errors += 1
+                if len(batch) == 1:
+                    print(f"Erro ao gravar {self.label}, item descartado: {str(e)}")
+                    self.dropped += 1
+                else:
+                    middle = len(batch) // 2
+                    pending += [batch[middle:], batch[:middle]]
+                continue
+            self.written += written
+            self.batches += 1
+        return []
+
+    def _requeue(self, items: List[Any]):
+        # Devolve os itens ao início do buffer, respeitando um limite de memória
+        room = max(self.max_size * 10 - len(self._items), 0)
+        if len(items) > room:
+            print(f"Buffer de {self.label} cheio, {len(items) - room} itens descartados")
+            self.dropped += len(items) - room
+            items = items[len(items) - room:]
+        self._items[:0] = items
+
+    async def _flush_later(self, delay: float):
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
@@ -0,0 +1,233 @@
+import asyncio
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.crud.crud_broadcast import broadcast as crud_broadcast
+from app.crud.crud_customer import customer as crud_customer
+from app.database import SessionLocal
+from app.models.models import Broadcast
+from app.services.outbound_scheduler import PRIORITY_BULK
+from app.services.whatsapp_service import whatsapp_service
+
+FINISHED_STATUSES = ("completed", "cancelled", "failed")
+
+class BroadcastService:
+    """
+    Executa disparos de template para um público de clientes.
+
+    O público é percorrido em lotes ordenados por id; cada lote é enviado com
+    concorrência limitada e seus resultados são gravados junto com o
+    checkpoint (último id processado) em uma única transação. Um disparo
+    interrompido é retomado a partir do checkpoint; um lock no Redis, renovado
+    enquanto o disparo roda, impede que dois processos executem o mesmo
+    disparo.
+
+    Falhas do banco são repetidas com backoff (a gravação de um lote já
+    enviado é repetida sem reenviar o lote); esgotadas as tentativas, o
+    disparo fica failed e pode ser retomado do checkpoint.
+    """
+    def __init__(self):
+        self.chunk_size = settings.BROADCAST_CHUNK_SIZE
+        self.concurrency = settings.BROADCAST_CONCURRENCY
+        self.lock_ttl = settings.BROADCAST_LOCK_TTL_SECONDS
+        self.db_retries = settings.BROADCAST_DB_RETRIES
+        self.retry_seconds = settings.BROADCAST_RETRY_SECONDS
+        self._jobs: Dict[int, asyncio.Task] = {}
+
+    def start(self, broadcast_id: int):
+        """
+        Inicia (ou retoma) a execução do disparo em segundo plano.
+        """
+        job = self._jobs.get(broadcast_id)
+        if job is not None and not job.done():
+            return
+        task = asyncio.create_task(self._run(broadcast_id))
+        self._jobs[broadcast_id] = task
+        task.add_done_callback(lambda t: self._jobs.pop(broadcast_id, None))
+
+    async def resume_unfinished(self):
+        """
+        Retoma os disparos que ficaram pendentes ou em execução.
+        """
+        for broadcast_id in await asyncio.to_thread(self._unfinished_ids):
+            self.start(broadcast_id)
+
+    async def stop(self):
+        """
+        Interrompe os disparos em execução; eles serão retomados pelo checkpoint.
+        """
+        jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+
+    async def _run(self, broadcast_id: int):
+        lock_key = f"broadcast:lock:{broadcast_id}"
+        token = uuid.uuid4().hex
+        if not await get_redis().set(lock_key, token, nx=True, ex=self.lock_ttl):
+            # Outro processo já está executando este disparo
+            return
+
+        heartbeat = asyncio.create_task(
+            self._hold_lock(lock_key, token, asyncio.current_task())
+        )
+        try:
+            while True:
+                broadcast, recipients = await self._with_retries(
+                    self._next_chunk, broadcast_id
+                )
+                if broadcast is None or not recipients:
+                    break
+
+                results = await self._send_chunk(broadcast, recipients)
+                # Os envios já saíram: só a gravação é repetida, nunca o lote
+                await self._with_retries(
+                    self._save_chunk, broadcast_id, results, recipients[-1][0]
+                )
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Erro ao executar disparo {broadcast_id}: {str(e)}")
+            await self._mark_failed(broadcast_id)
+
+        finally:
+            heartbeat.cancel()
+            redis = get_redis()
+            if await redis.get(lock_key) == token:
+                await redis.delete(lock_key)
+
+    async def _hold_lock(self, lock_key: str, token: str, job: asyncio.Task):
+        """
+        Renova o lock durante o disparo, inclusive com um lote em andamento
+        (ex.: atrasado por 429). Se outro processo assumiu o lock, interrompe
+        este disparo para não enviar o mesmo lote duas vezes.
+        """
+        while True:
+            await asyncio.sleep(self.lock_ttl / 3)
+            try:
+                redis = get_redis()
+                if await redis.get(lock_key) != token:
+                    print(f"Lock do disparo perdido ({lock_key}); interrompendo")
+                    job.cancel()
+                    return
+                await redis.expire(lock_key, self.lock_ttl)
+            except Exception as e:
+                print(f"Erro ao renovar lock do disparo: {str(e)}")
+
+    async def _with_retries(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Executa `func` (sessão síncrona) fora do loop de eventos, repetindo
+        falhas com backoff exponencial.
+        """
+        for attempt in range(self.db_retries + 1):
+            try:
+                return await asyncio.to_thread(func, *args)
+            except Exception as e:
+                if attempt == self.db_retries:
+                    raise
+                print(f"Erro no banco durante o disparo (tentativa {attempt + 1}): {str(e)}")
+                await asyncio.sleep(self.retry_seconds * 2 ** attempt)
+
+    async def _mark_failed(self, broadcast_id: int):
+        try:
+            await asyncio.to_thread(self._set_failed, broadcast_id)
+        except Exception as e:
+            print(f"Erro ao marcar disparo {broadcast_id} como falho: {str(e)}")
+
+    def _unfinished_ids(self) -> List[int]:
+        db = SessionLocal()
+        try:
+            return [b.id for b in crud_broadcast.get_unfinished(db)]
+        finally:
+            db.close()
+
+    def _set_failed(self, broadcast_id: int):
+        db = SessionLocal()
+        try:
+            broadcast = crud_broadcast.get(db, id=broadcast_id)
+            if broadcast is not None and broadcast.status not in FINISHED_STATUSES:
+                crud_broadcast.update_status(db, db_obj=broadcast, status="failed")
+        finally:
+            db.close()
+
+    def _next_chunk(
+        self, broadcast_id: int
+    ) -> Tuple[Optional[Broadcast], List[Tuple[int, str]]]:
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            broadcast = crud_broadcast.get(db, id=broadcast_id)
+            if broadcast is None or broadcast.status in FINISHED_STATUSES:
+                return None, []
+
+            if broadcast.status == "pending":
+                broadcast = crud_broadcast.update_status(db, db_obj=broadcast, status="running")
+
+            recipients = crud_customer.get_audience_after(
+                db,
+                after_id=broadcast.last_customer_id,
+                limit=self.chunk_size,
+                **(broadcast.audience or {})
+            )
+            if not recipients:
+                crud_broadcast.update_status(db, db_obj=broadcast, status="completed")
+            return broadcast, recipients
+        finally:
+            db.close()
+
+    async def _send_chunk(
+        self,
+        broadcast: Broadcast,
+        recipients: List[Tuple[int, str]]
+    ) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(customer_id: int, whatsapp_number: str) -> Dict[str, Any]:
+            result = {
+                "broadcast_id": broadcast.id,
+                "customer_id": customer_id,
+                "status": "sent",
+                "message_id": None,
+                "error": None
+            }
+            async with semaphore:
+                try:
+                    response = await whatsapp_service.send_template(
+                        phone_number=whatsapp_number,
+                        template_name=broadcast.template_name,
+                        language_code=broadcast.language_code,
+                        components=broadcast.components,
+                        priority=PRIORITY_BULK
+                    )
+                    messages = response.get("messages") or [{}]
+                    result["message_id"] = messages[0].get("id")
+                except Exception as e:
+                    result["status"] = "failed"
+                    result["error"] = str(e)
+            return result
+
+        return await asyncio.gather(*[
+            send(customer_id, whatsapp_number)
+            for customer_id, whatsapp_number in recipients
+        ])
+
+    def _save_chunk(
+        self,
+        broadcast_id: int,
+        results: List[Dict[str, Any]],
+        last_customer_id: int
+    ):
+        db = SessionLocal()
+        try:
+            broadcast = crud_broadcast.get(db, id=broadcast_id)
+            crud_broadcast.record_progress(
+                db,
+                db_obj=broadcast,
+                results=results,
+                last_customer_id=last_customer_id
+            )
+        finally:
+            db.close()
+
+broadcast_service = BroadcastService()
@@ -0,0 +1,407 @@
+import asyncio
+import heapq
+import itertools
+import math
+from collections import Counter
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from app.core.config import settings
+from app.services.ai_cache import normalize_text, response_cache
+
+try:
+    import numpy as np
+except ImportError:  # embeddings são opcionais
+    np = None
+
+# O nome pesa mais que a descrição na pontuação
+NAME_WEIGHT = 3
+# Acima disso a lista de um termo não é percorrida inteira (ver BM25Index.search)
+MAX_SCANNED_POSTINGS = 256
+# Palavras comuns nas perguntas que não ajudam a achar produtos
+STOPWORDS = {
+    "a", "o", "as", "os", "de", "do", "da", "dos", "das", "e", "em", "no", "na",
+    "um", "uma", "para", "pra", "com", "por", "que", "qual", "quais", "tem",
+    "voce", "voces", "vc", "vcs", "me", "eu", "quero", "queria", "gostaria",
+    "quanto", "custa", "preco", "valor", "ola", "oi", "bom", "dia", "boa",
+    "tarde", "noite", "ver", "sobre", "algum", "alguma", "esse", "essa"
+}
+
+@dataclass(frozen=True)
+class CatalogProduct:
+    id: int
+    owner_id: Optional[int]
+    name: str
+    description: str
+    price: float
+    image_url: Optional[str] = None
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in normalize_text(text or "").split() if t not in STOPWORDS]
+
+class BM25Index:
+    """
+    Índice invertido com pontuação BM25, atualizado documento a documento.
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._terms: Dict[int, Set[str]] = {}
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+        self._norms: Optional[Dict[int, float]] = None
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc_id: int, tokens: Sequence[str]):
+        self.remove(doc_id)
+        counts = Counter(tokens)
+        for term, count in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        self._terms[doc_id] = set(counts)
+        self._lengths[doc_id] = len(tokens)
+        self._total_length += len(tokens)
+        self._norms = None
+
+    def remove(self, doc_id: int):
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        self._norms = None
+        for term in self._terms.pop(doc_id, ()):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def search(self, tokens: Sequence[str], k: int) -> List[Tuple[int, float]]:
+        if not self._lengths:
+            return []
+        terms = sorted(
+            (term for term in set(tokens) if term in self._postings),
+            key=lambda term: len(self._postings[term])
+        )
+        if not terms:
+            return []
+
+        # Termos muito frequentes só pontuam candidatos trazidos pelos mais
+        # raros, para não percorrer listas enormes
+        scanned = [t for t in terms if len(self._postings[t]) <= MAX_SCANNED_POSTINGS]
+        scanned = scanned or terms[:1]
+        norms = self._get_norms()
+        scores: Dict[int, float] = {}
+        for term in scanned:
+            idf = self._idf(term)
+            # Só termos frequentes: uma amostra da lista basta, pois eles
+            # quase não distinguem os produtos entre si
+            postings = itertools.islice(self._postings[term].items(), MAX_SCANNED_POSTINGS)
+            for doc_id, tf in postings:
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norms[doc_id])
+        for term in terms:
+            if term in scanned:
+                continue
+            idf = self._idf(term)
+            postings = self._postings[term]
+            for doc_id in scores:
+                tf = postings.get(doc_id)
+                if tf:
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norms[doc_id])
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def _idf(self, term: str) -> float:
+        df = len(self._postings[term])
+        return math.log(1 + (len(self._lengths) - df + 0.5) / (df + 0.5))
+
+    def _get_norms(self) -> Dict[int, float]:
+        # Recalculado só na primeira busca após uma alteração
+        if self._norms is None:
+            average = self._total_length / len(self._lengths) or 1
+            self._norms = {
+                doc_id: self.k1 * (1 - self.b + self.b * length / average)
+                for doc_id, length in self._lengths.items()
+            }
+        return self._norms
+
+class VectorIndex:
+    """
+    Vetores de embeddings normalizados com busca por similaridade de cosseno.
+    """
+    def __init__(self):
+        self._vectors: Dict[int, "np.ndarray"] = {}
+        self._ids: List[int] = []
+        self._matrix: Optional["np.ndarray"] = None
+
+    def set(self, doc_id: int, vector: Sequence[float]):
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        self._vectors[doc_id] = array / norm if norm else array
+        self._matrix = None
+
+    def remove(self, doc_id: int):
+        if self._vectors.pop(doc_id, None) is not None:
+            self._matrix = None
+
+    def search(self, vector: Sequence[float], k: int) -> List[Tuple[int, float]]:
+        if not self._vectors:
+            return []
+        if self._matrix is None:
+            # Reconstruída só na primeira busca após uma alteração
+            self._ids = list(self._vectors)
+            self._matrix = np.stack([self._vectors[i] for i in self._ids])
+        query = np.asarray(vector, dtype=np.float32)
+        scores = self._matrix @ (query / (np.linalg.norm(query) or 1.0))
+        top = np.argsort(-scores)[:k]
+        return [(self._ids[i], float(scores[i])) for i in top]
+
+class CatalogIndex:
+    """
+    Índice em memória dos produtos ativos, por vendedor (owner_id).
+
+    A busca é BM25 sobre nome e descrição sem acentos; com embeddings
+    habilitados (e numpy disponível), o resultado é combinado com a busca por
+    cosseno via reciprocal rank fusion. Alterações feitas por este processo
+    entram no índice na hora e avançam a versão local (`advance_version`);
+    as de outros processos são percebidas pela versão do catálogo no Redis e
+    disparam uma reconstrução.
+    """
+    def __init__(
+        self,
+        refresh_interval: float,
+        embed: Optional[Callable[[List[str]], Awaitable[List[List[float]]]]] = None
+    ):
+        self.refresh_interval = refresh_interval
+        self.embed = embed if np is not None else None
+        self.loaded = False
+        self.version: Optional[str] = None
+        self._products: Dict[int, CatalogProduct] = {}
+        self._bm25: Dict[Optional[int], BM25Index] = {}
+        self._vectors: Dict[Optional[int], VectorIndex] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.rebuilds = 0
+
+    async def start(self):
+        """
+        Carrega o índice e inicia a verificação periódica da versão.
+        """
+        await self.refresh(force=True)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def refresh(self, force: bool = False):
+        """
+        Reconstrói o índice se a versão do catálogo mudou em outro processo.
+        """
+        try:
+            version = await response_cache.catalog_version()
+        except Exception as e:
+            print(f"Erro ao consultar versão do catálogo: {str(e)}")
+            version = None
+        if not force and self.loaded and version == self.version:
+            return
+
+        try:
+            products = await asyncio.to_thread(_load_active_products)
+        except Exception as e:
+            print(f"Erro ao carregar índice do catálogo: {str(e)}")
+            return
+
+        self._rebuild(products)
+        self.version = version
+        self.loaded = True
+        self.rebuilds += 1
+        if self.embed is not None:
+            await self._embed(products)
+
+    def upsert(self, product) -> None:
+        """
+        Atualiza um produto no índice (ou o remove, se inativo).
+        """
+        if not product.is_active:
+            self.remove(product.id)
+            return
+        entry = _to_entry(product)
+        previous = self._products.get(entry.id)
+        if previous is not None and previous.owner_id != entry.owner_id:
+            self.remove(entry.id)
+        self._products[entry.id] = entry
+        self._bm25.setdefault(entry.owner_id, BM25Index()).add(entry.id, _document(entry))
+        if self.embed is not None:
+            self._spawn(self._embed([entry]))
+
+    def remove(self, product_id: int):
+        entry = self._products.pop(product_id, None)
+        if entry is None:
+            return
+        self._bm25.get(entry.owner_id, BM25Index()).remove(product_id)
+        if entry.owner_id in self._vectors:
+            self._vectors[entry.owner_id].remove(product_id)
+
+    def advance_version(self, version: Optional[str]):
+        """
+        Registra a versão gerada por uma alteração já aplicada neste índice,
+        para que ela não dispare uma reconstrução. Se outro processo alterou
+        o catálogo no meio tempo, a versão local fica para trás e o próximo
+        refresh reconstrói o índice.
+        """
+        if version is None or self.version is None:
+            return
+        if int(version) == int(self.version) + 1:
+            self.version = version
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        owner_id: Optional[int] = None
+    ) -> List[CatalogProduct]:
+        """
+        Retorna os `k` produtos mais relevantes para o texto (BM25).
+        """
+        return [self._products[i] for i, _ in self._bm25_search(tokenize(query), k, owner_id)]
+
+    async def retrieve(
+        self,
+        query: str,
+        k: int = 5,
+        owner_id: Optional[int] = None
+    ) -> List[CatalogProduct]:
+        """
+        Como `search`, combinando com embeddings quando habilitados.
+        """
+        lexical = self._bm25_search(tokenize(query), k, owner_id)
+        if self.embed is None or not self._vectors:
+            return [self._products[i] for i, _ in lexical]
+
+        try:
+            vector = (await self.embed([query]))[0]
+        except Exception as e:
+            print(f"Erro ao gerar embedding da consulta: {str(e)}")
+            return [self._products[i] for i, _ in lexical]
+
+        semantic = []
+        for owner, index in self._vectors.items():
+            if owner_id is None or owner == owner_id:
+                semantic.extend(index.search(vector, k))
+        semantic.sort(key=lambda item: item[1], reverse=True)
+        return [
+            self._products[i]
+            for i in _rank_fusion([lexical, semantic[:k]], k)
+            if i in self._products
+        ]
+
+    def top(self, k: int = 5, owner_id: Optional[int] = None) -> List[CatalogProduct]:
+        """
+        Produtos para o catálogo genérico, quando a mensagem não cita nenhum.
+        """
+        products = (
+            p for p in self._products.values()
+            if owner_id is None or p.owner_id == owner_id
+        )
+        return heapq.nsmallest(k, products, key=lambda p: p.id)
+
+    def stats(self):
+        return {
+            "loaded": self.loaded,
+            "products": len(self._products),
+            "sellers": len(self._bm25),
+            "version": self.version,
+            "rebuilds": self.rebuilds,
+            "embeddings": self.embed is not None
+        }
+
+    def _bm25_search(
+        self,
+        tokens: List[str],
+        k: int,
+        owner_id: Optional[int]
+    ) -> List[Tuple[int, float]]:
+        if not tokens:
+            return []
+        if owner_id is not None:
+            index = self._bm25.get(owner_id)
+            return index.search(tokens, k) if index else []
+        results = [
+            hit for index in self._bm25.values() for hit in index.search(tokens, k)
+        ]
+        return heapq.nlargest(k, results, key=lambda item: item[1])
+
+    def _rebuild(self, products: List[CatalogProduct]):
+        bm25: Dict[Optional[int], BM25Index] = {}
+        for entry in products:
+            bm25.setdefault(entry.owner_id, BM25Index()).add(entry.id, _document(entry))
+        self._products = {entry.id: entry for entry in products}
+        self._bm25 = bm25
+        self._vectors = {}
+
+    async def _embed(self, products: List[CatalogProduct]):
+        try:
+            vectors = await self.embed([f"{p.name}. {p.description}" for p in products])
+        except Exception as e:
+            print(f"Erro ao gerar embeddings do catálogo: {str(e)}")
+            return
+        for entry, vector in zip(products, vectors):
+            if entry.id in self._products:
+                self._vectors.setdefault(entry.owner_id, VectorIndex()).set(entry.id, vector)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    def _spawn(self, coro: Awaitable[None]):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+def _document(entry: CatalogProduct) -> List[str]:
+    return tokenize(entry.name) * NAME_WEIGHT + tokenize(entry.description)
+
+def _to_entry(product) -> CatalogProduct:
+    return CatalogProduct(
+        id=product.id,
+        owner_id=product.owner_id,
+        name=product.name or "",
+        description=product.description or "",
+        price=product.price or 0.0,
+        image_url=getattr(product, "image_url", None)
+    )
+
+def _rank_fusion(rankings: List[List[Tuple[int, float]]], k: int, c: int = 60) -> List[int]:
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for position, (doc_id, _) in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1 / (c + position + 1)
+    return [doc_id for doc_id, _ in heapq.nlargest(k, scores.items(), key=lambda i: i[1])]
+
+def _load_active_products() -> List[CatalogProduct]:
+    from app.crud.crud_product import product as crud_product
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return [_to_entry(p) for p in crud_product.get_all_active(db)]
+    finally:
+        db.close()
+
+def _embedder() -> Optional[Callable[[List[str]], Awaitable[List[List[float]]]]]:
+    if not settings.CATALOG_EMBEDDINGS_ENABLED:
+        return None
+    if np is None:
+        print("CATALOG_EMBEDDINGS_ENABLED exige numpy; usando apenas BM25")
+        return None
+    from app.services.ai_service import ai_service
+    return ai_service.embed
+
+catalog_index = CatalogIndex(
+    refresh_interval=settings.CATALOG_INDEX_REFRESH_SECONDS,
+    embed=_embedder()
+)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+class _Burst:
+    def __init__(self, started_at: float):
+        self.items: List[Any] = []
+        self.started_at = started_at
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class MessageCoalescer:
+    """
+    Agrupa mensagens consecutivas de um cliente em uma única rodada.
+
+    Cada nova mensagem reinicia a janela de `window_seconds`; quando a janela
+    termina sem novas mensagens (ou após `max_delay_seconds` desde a primeira),
+    `flush` é chamado uma única vez com todos os itens acumulados.
+    """
+    def __init__(self, window_seconds: float, max_delay_seconds: float):
+        self.window_seconds = window_seconds
+        self.max_delay_seconds = max(max_delay_seconds, window_seconds)
+        self._bursts: Dict[str, _Burst] = {}
+        self._callbacks: Dict[str, Callable[[List[Any]], None]] = {}
+        self.received = 0
+        self.turns = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    def add(
+        self,
+        key: str,
+        item: Any,
+        flush: Callable[[List[Any]], None]
+    ):
+        """
+        Acumula `item` na rajada de `key` e reagenda o fechamento da janela.
+        """
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+
+        burst = self._bursts.get(key)
+        if burst is None:
+            burst = _Burst(now)
+            self._bursts[key] = burst
+        burst.items.append(item)
+        self._callbacks[key] = flush
+        self.received += 1
+
+        if burst.timer is not None:
+            burst.timer.cancel()
+        deadline = burst.started_at + self.max_delay_seconds
+        delay = max(0.0, min(self.window_seconds, deadline - now))
+        burst.timer = loop.call_later(delay, self._flush, key)
+
+    def flush_all(self):
+        """
+        Fecha imediatamente todas as rajadas pendentes (ex.: no desligamento).
+        """
+        for key in list(self._bursts):
+            self._flush(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna quantas mensagens viraram quantas rodadas.
+        """
+        return {
+            "window_seconds": self.window_seconds,
+            "messages": self.received,
+            "turns": self.turns,
+            "merged": self.received - self.turns - sum(
+                len(burst.items) for burst in self._bursts.values()
+            ),
+            "pending_bursts": len(self._bursts)
+        }
+
+    def _flush(self, key: str):
+        burst = self._bursts.pop(key, None)
+        flush = self._callbacks.pop(key, None)
+        if burst is None or flush is None:
+            return
+        if burst.timer is not None:
+            burst.timer.cancel()
+        self.turns += 1
+        flush(burst.items)
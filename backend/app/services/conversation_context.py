@@ -0,0 +1,177 @@
+import json
+import math
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.core.redis import get_redis
+
+# Aproximação para português sem depender de um tokenizador
+CHARS_PER_TOKEN = 4
+# Rodadas guardadas no máximo, em múltiplos da janela + lote do resumo
+HISTORY_LIMIT_FACTOR = 4
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+def truncate_tokens(text: str, tokens: int) -> str:
+    limit = tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[:max(limit - 1, 0)] + "…"
+
+class ConversationContext:
+    """
+    Contexto da conversa para o prompt: resumo acumulado + últimas rodadas.
+
+    As rodadas ficam em uma lista no Redis por cliente. Quando a janela de
+    `max_turns` rodadas enche, as `summary_every` mais antigas são
+    incorporadas ao resumo (que é atualizado, não refeito) e saem da lista,
+    antes de saírem da janela: toda rodada está no prompt ou no resumo.
+    O contexto montado nunca passa de `token_budget` tokens, qualquer que
+    seja o tamanho da conversa; se o resumo falhar repetidamente, a lista é
+    cortada em `max_history` rodadas, descartando as mais antigas.
+    """
+    def __init__(
+        self,
+        max_turns: int,
+        summary_every: int,
+        token_budget: int,
+        summary_tokens: int,
+        ttl_seconds: int,
+        summarize: Optional[Callable[[str, List[Dict[str, str]], int], Awaitable[str]]] = None,
+        prefix: str = "conversation:"
+    ):
+        self.max_turns = max_turns
+        self.summary_every = min(summary_every, max_turns)
+        self.max_history = HISTORY_LIMIT_FACTOR * (max_turns + self.summary_every)
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.ttl_seconds = ttl_seconds
+        self.summarize = summarize
+        self.prefix = prefix
+        self.summaries = 0
+        self.errors = 0
+
+    async def build(self, customer_id: int) -> List[Dict[str, str]]:
+        """
+        Monta as mensagens de contexto (resumo e rodadas recentes).
+        """
+        if self.max_turns <= 0:
+            return []
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.get(self._summary_key(customer_id))
+            pipe.lrange(self._turns_key(customer_id), -self.max_turns, -1)
+            summary, turns = await pipe.execute()
+        except Exception as e:
+            print(f"Erro ao carregar contexto da conversa: {str(e)}")
+            self.errors += 1
+            return []
+
+        budget = self.token_budget
+        messages: List[Dict[str, str]] = []
+        if summary:
+            content = "Resumo da conversa até aqui: " + truncate_tokens(
+                summary, min(self.summary_tokens, budget)
+            )
+            messages.append({"role": "system", "content": content})
+            budget -= estimate_tokens(content)
+
+        # Das mais recentes para as mais antigas, até esgotar o orçamento
+        recent: List[Dict[str, str]] = []
+        per_message = max(
+            (self.token_budget - self.summary_tokens) // (2 * self.max_turns), 1
+        )
+        for raw in reversed(turns):
+            turn = json.loads(raw)
+            pair = [
+                {"role": "user", "content": truncate_tokens(turn["user"], per_message)},
+                {"role": "assistant", "content": truncate_tokens(turn["assistant"], per_message)}
+            ]
+            cost = sum(estimate_tokens(m["content"]) for m in pair)
+            if cost > budget:
+                break
+            recent[:0] = pair
+            budget -= cost
+
+        return messages + recent
+
+    async def record(self, customer_id: int, user_text: str, reply: str) -> bool:
+        """
+        Registra uma rodada; retorna True se já é hora de atualizar o resumo.
+        """
+        if self.max_turns <= 0:
+            return False
+        key = self._turns_key(customer_id)
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.rpush(key, json.dumps({"user": user_text, "assistant": reply}))
+            pipe.ltrim(key, -self.max_history, -1)
+            pipe.expire(key, self.ttl_seconds)
+            length, _, _ = await pipe.execute()
+        except Exception as e:
+            print(f"Erro ao registrar rodada da conversa: {str(e)}")
+            self.errors += 1
+            return False
+        return length >= self.max_turns
+
+    async def compact(self, customer_id: int):
+        """
+        Incorpora as rodadas mais antigas ao resumo do cliente.
+        """
+        if self.summarize is None:
+            return
+        redis = get_redis()
+        lock_key = f"{self.prefix}{customer_id}:summarizing"
+        token = uuid.uuid4().hex
+        try:
+            if not await redis.set(lock_key, token, nx=True, ex=120):
+                return
+            try:
+                turns_key = self._turns_key(customer_id)
+                if await redis.llen(turns_key) < self.max_turns:
+                    return
+                oldest = [
+                    json.loads(raw)
+                    for raw in await redis.lrange(turns_key, 0, self.summary_every - 1)
+                ]
+                summary = await redis.get(self._summary_key(customer_id)) or ""
+                summary = await self.summarize(summary, oldest, self.summary_tokens)
+
+                pipe = redis.pipeline(transaction=True)
+                pipe.set(
+                    self._summary_key(customer_id),
+                    truncate_tokens(summary, self.summary_tokens),
+                    ex=self.ttl_seconds
+                )
+                pipe.ltrim(turns_key, len(oldest), -1)
+                await pipe.execute()
+                self.summaries += 1
+            finally:
+                if await redis.get(lock_key) == token:
+                    await redis.delete(lock_key)
+        except Exception as e:
+            print(f"Erro ao resumir conversa: {str(e)}")
+            self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"summaries": self.summaries, "errors": self.errors}
+
+    def _turns_key(self, customer_id: int) -> str:
+        return f"{self.prefix}{customer_id}:turns"
+
+    def _summary_key(self, customer_id: int) -> str:
+        return f"{self.prefix}{customer_id}:summary"
+
+def _summarizer() -> Optional[Callable[[str, List[Dict[str, str]], int], Awaitable[str]]]:
+    if settings.AI_CONTEXT_TURNS <= 0:
+        return None
+    from app.services.ai_service import ai_service
+    return ai_service.summarize_conversation
+
+conversation_context = ConversationContext(
+    max_turns=settings.AI_CONTEXT_TURNS,
+    summary_every=settings.AI_CONTEXT_SUMMARY_EVERY,
+    token_budget=settings.AI_CONTEXT_TOKEN_BUDGET,
+    summary_tokens=settings.AI_CONTEXT_SUMMARY_TOKENS,
+    ttl_seconds=settings.AI_CONTEXT_TTL_SECONDS,
+    summarize=_summarizer()
+)
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.crud.crud_customer import customer as crud_customer
+from app.database import SessionLocal, statement_counter
+from app.schemas.customer import normalize_whatsapp_number
+
+@dataclass(frozen=True)
+class CustomerRef:
+    """
+    Campos do cliente usados no processamento de mensagens.
+    """
+    id: int
+    whatsapp_number: str
+    name: Optional[str] = None
+
+class CustomerCache:
+    """
+    Cache número do WhatsApp -> cliente: LRU em memória com TTL e, com
+    `redis_ttl_seconds` > 0, um segundo nível no Redis compartilhado pelos
+    processos. Só o que falta nos dois níveis vai ao banco, em lote (busca ou
+    cria os clientes).
+
+    `invalidate` limpa a entrada local e a do Redis; nos demais processos a
+    cópia local expira em até `ttl_seconds`. O id de um número não muda, então
+    o atraso só afeta campos como o nome.
+    """
+    def __init__(
+        self,
+        size: int,
+        ttl_seconds: float,
+        redis_ttl_seconds: int = 0,
+        prefix: str = "customer:number:"
+    ):
+        self.size = size
+        self.ttl_seconds = ttl_seconds
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.prefix = prefix
+        self._local: "OrderedDict[str, Tuple[CustomerRef, float]]" = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.statements = 0
+
+    async def resolve(
+        self,
+        whatsapp_numbers: List[str],
+        defaults: Dict[str, Any]
+    ) -> Dict[str, CustomerRef]:
+        """
+        Resolve os números (como recebidos) em clientes, criando os que não
+        existem com `defaults`.
+        """
+        normalized = {
+            number: normalize_whatsapp_number(number) for number in whatsapp_numbers
+        }
+        found: Dict[str, CustomerRef] = {}
+        now = time.monotonic()
+        for number in dict.fromkeys(normalized.values()):
+            entry = self._local.get(number)
+            if entry is not None and entry[1] > now:
+                self._local.move_to_end(number)
+                found[number] = entry[0]
+                self.local_hits += 1
+
+        missing = [n for n in dict.fromkeys(normalized.values()) if n not in found]
+        if missing and self.redis_ttl_seconds > 0:
+            for ref in await self._from_redis(missing):
+                self._remember(ref, now)
+                found[ref.whatsapp_number] = ref
+                self.redis_hits += 1
+            missing = [n for n in missing if n not in found]
+
+        if missing:
+            self.misses += len(missing)
+            loaded = await asyncio.to_thread(self._load, missing, defaults)
+            for ref in loaded:
+                self._remember(ref, now)
+                found[ref.whatsapp_number] = ref
+            if self.redis_ttl_seconds > 0:
+                await self._to_redis(loaded)
+
+        return {
+            number: found[normal]
+            for number, normal in normalized.items()
+            if normal in found
+        }
+
+    async def invalidate(self, whatsapp_number: str):
+        """
+        Remove o número do cache (ex.: o cliente foi alterado).
+        """
+        number = normalize_whatsapp_number(whatsapp_number)
+        self._local.pop(number, None)
+        if self.redis_ttl_seconds <= 0:
+            return
+        try:
+            await get_redis().delete(self._key(number))
+        except Exception as e:
+            print(f"Erro ao invalidar cliente no Redis: {str(e)}")
+            self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.local_hits + self.redis_hits
+        total = hits + self.misses
+        return {
+            "size": len(self._local),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "statements": self.statements,
+            "hit_ratio": hits / total if total else 0.0
+        }
+
+    async def _from_redis(self, numbers: List[str]) -> List[CustomerRef]:
+        try:
+            values = await get_redis().mget(*[self._key(n) for n in numbers])
+        except Exception as e:
+            print(f"Erro ao consultar clientes no Redis: {str(e)}")
+            self.errors += 1
+            return []
+        return [CustomerRef(**json.loads(value)) for value in values if value]
+
+    async def _to_redis(self, refs: List[CustomerRef]):
+        if not refs:
+            return
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for ref in refs:
+                pipe.set(
+                    self._key(ref.whatsapp_number),
+                    json.dumps(asdict(ref)),
+                    ex=self.redis_ttl_seconds
+                )
+            await pipe.execute()
+        except Exception as e:
+            print(f"Erro ao gravar clientes no Redis: {str(e)}")
+            self.errors += 1
+
+    def _load(self, numbers: List[str], defaults: Dict[str, Any]) -> List[CustomerRef]:
+        db = SessionLocal()
+        with statement_counter.track() as sql:
+            try:
+                rows = crud_customer.get_or_create_many(
+                    db, whatsapp_numbers=numbers, defaults=defaults
+                )
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+                self.statements += sql["statements"]
+        return [
+            CustomerRef(id=row.id, whatsapp_number=row.whatsapp_number, name=row.name)
+            for row in rows.values()
+        ]
+
+    def _remember(self, ref: CustomerRef, now: float):
+        self._local[ref.whatsapp_number] = (ref, now + self.ttl_seconds)
+        self._local.move_to_end(ref.whatsapp_number)
+        while len(self._local) > self.size:
+            self._local.popitem(last=False)
+
+    def _key(self, whatsapp_number: str) -> str:
+        return f"{self.prefix}{whatsapp_number}"
+
+customer_cache = CustomerCache(
+    size=settings.CUSTOMER_CACHE_SIZE,
+    ttl_seconds=settings.CUSTOMER_CACHE_TTL_SECONDS,
+    redis_ttl_seconds=settings.CUSTOMER_CACHE_REDIS_TTL_SECONDS
+)
@@ -0,0 +1,94 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Any
+from app.core.config import settings
+from app.core.redis import get_redis
+
+class MessageDeduplicator:
+    """
+    Identifica mensagens do WhatsApp já recebidas pelo `id`.
+
+    Um LRU em memória responde às reentregas mais comuns sem ida ao Redis;
+    o Redis (SET NX com expiração) garante a deduplicação entre processos.
+    """
+    def __init__(
+        self,
+        ttl_seconds: int,
+        local_size: int,
+        prefix: str = "whatsapp:seen:"
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.local_size = local_size
+        self.prefix = prefix
+        self._local: "OrderedDict[str, float]" = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def is_duplicate(self, message_id: str) -> bool:
+        """
+        Retorna True se a mensagem já foi vista; caso contrário a registra.
+        """
+        now = time.monotonic()
+        expires_at = self._local.get(message_id)
+        if expires_at is not None and expires_at > now:
+            self._local.move_to_end(message_id)
+            self.local_hits += 1
+            return True
+
+        self._remember(message_id, now)
+
+        try:
+            first_time = await get_redis().set(
+                f"{self.prefix}{message_id}", "1", nx=True, ex=self.ttl_seconds
+            )
+        except Exception as e:
+            # Sem Redis, vale apenas o cache local
+            print(f"Erro ao consultar deduplicação no Redis: {str(e)}")
+            self.errors += 1
+            first_time = True
+
+        if not first_time:
+            self.redis_hits += 1
+            return True
+
+        self.misses += 1
+        return False
+
+    async def forget(self, message_id: str):
+        """
+        Remove o registro da mensagem para que uma reentrega seja aceita.
+        """
+        self._local.pop(message_id, None)
+        try:
+            await get_redis().delete(f"{self.prefix}{message_id}")
+        except Exception as e:
+            print(f"Erro ao remover deduplicação no Redis: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna os contadores de acertos (duplicatas descartadas) e falhas.
+        """
+        hits = self.local_hits + self.redis_hits
+        total = hits + self.misses
+        return {
+            "hits": hits,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": hits / total if total else 0.0,
+            "local_size": len(self._local)
+        }
+
+    def _remember(self, message_id: str, now: float):
+        self._local[message_id] = now + self.ttl_seconds
+        self._local.move_to_end(message_id)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+message_deduplicator = MessageDeduplicator(
+    ttl_seconds=settings.MESSAGE_DEDUP_TTL_SECONDS,
+    local_size=settings.MESSAGE_DEDUP_LOCAL_SIZE
+)
@@ -0,0 +1,75 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+class ConversationDispatcher:
+    """
+    Executa tarefas em paralelo entre clientes mantendo a ordem de cada cliente.
+
+    Tarefas com a mesma chave (número do WhatsApp) rodam estritamente em
+    sequência; chaves diferentes rodam em paralelo até `max_concurrency`.
+    """
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tails: Dict[str, asyncio.Task] = {}
+        self.in_flight = 0
+        self.completed = 0
+
+    def submit(
+        self,
+        key: str,
+        job: Callable[[], Awaitable[Any]]
+    ) -> asyncio.Task:
+        """
+        Agenda `job` depois da última tarefa pendente da mesma chave.
+        """
+        previous = self._tails.get(key)
+        task = asyncio.create_task(self._run(previous, job))
+        self._tails[key] = task
+        task.add_done_callback(lambda t: self._release(key, t))
+        return task
+
+    async def drain(self):
+        """
+        Aguarda a conclusão de todas as tarefas agendadas.
+        """
+        while self._tails:
+            await asyncio.wait(list(self._tails.values()))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retorna contadores de execução do despachante.
+        """
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "active_conversations": len(self._tails),
+            "completed": self.completed
+        }
+
+    async def _run(
+        self,
+        previous: Optional[asyncio.Task],
+        job: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        if previous is not None:
+            # Aguarda a tarefa anterior sem propagar uma eventual falha dela
+            await asyncio.wait([previous])
+
+        async with self._get_semaphore():
+            self.in_flight += 1
+            try:
+                return await job()
+            finally:
+                self.in_flight -= 1
+                self.completed += 1
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Criado sob demanda para ficar associado ao loop em execução
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _release(self, key: str, task: asyncio.Task):
+        if self._tails.get(key) is task:
+            del self._tails[key]
@@ -0,0 +1,402 @@
+"""
+Classificação local de intenções, executada antes da chamada ao LLM.
+
+Saudações, agradecimentos e pedidos de catálogo são respondidos sem OpenAI.
+Há duas etapas: palavras-chave (Aho-Corasick sobre o texto normalizado) para
+mensagens totalmente cobertas por elas e, para as demais, um modelo TF-IDF +
+regressão logística treinado com as mensagens armazenadas. O que nenhuma das
+duas resolve com confiança segue para o LLM.
+
+Treino (a partir de backend/):
+    python -m app.services.intent_classifier
+"""
+import json
+import math
+import os
+import random
+from collections import Counter, deque
+from itertools import groupby
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.services.ai_cache import normalize_text
+
+LOCAL_INTENTS = ("catalog", "thanks", "greeting")  # em ordem de prioridade
+OTHER = "other"
+
+KEYWORDS: Dict[str, List[str]] = {
+    "greeting": [
+        "oi", "ola", "opa", "eai", "e ai", "hello", "hey", "bom dia", "boa tarde",
+        "boa noite", "tudo bem", "tudo bom", "como vai", "oie", "salve"
+    ],
+    "thanks": [
+        "obrigado", "obrigada", "brigado", "brigada", "obg", "valeu", "vlw",
+        "agradeco", "muito obrigado", "muito obrigada", "grato", "grata"
+    ],
+    "catalog": [
+        "catalogo", "produtos", "cardapio", "lista de produtos", "o que voces vendem",
+        "o que vcs vendem", "o que voces tem", "o que vcs tem", "quais produtos",
+        "ver produtos", "mostra os produtos", "opcoes"
+    ],
+    # Intenção de compra nas respostas do LLM
+    "purchase": [
+        "comprar", "preco", "valor", "quanto custa", "produtos", "catalogo",
+        "disponivel"
+    ]
+}
+
+# Palavras que não mudam o sentido de uma mensagem curta
+FILLER = {
+    "a", "o", "as", "os", "de", "do", "da", "dos", "das", "me", "mim", "eu",
+    "voce", "voces", "vc", "vcs", "pessoal", "gente", "ai", "la", "ae", "por",
+    "favor", "pf", "pfv", "muito", "mto", "quero", "queria", "gostaria", "ver",
+    "seu", "sua", "seus", "suas", "manda", "mande", "mostra", "mostrar", "pode",
+    "poderia", "tem", "ok", "blz", "beleza", "sim", "entao", "e", "pra", "para",
+    "moco", "moca", "amigo", "amiga", "ne", "tbm", "tambem", "pelo", "pela"
+}
+
+CANNED_RESPONSES = {
+    "greeting": "Olá! 😊 Como posso ajudar você hoje?",
+    "thanks": "Por nada! Se precisar de algo mais, é só chamar. 😊",
+    "catalog": "Claro! Vou te mostrar nossos produtos."
+}
+
+SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ("oi", "greeting"), ("olá, tudo bem?", "greeting"), ("bom dia!", "greeting"),
+    ("boa tarde pessoal", "greeting"), ("boa noite", "greeting"),
+    ("opa, tudo bom?", "greeting"), ("oie", "greeting"), ("e aí, como vai?", "greeting"),
+    ("oi boa tarde", "greeting"), ("olá bom dia", "greeting"),
+    ("obrigado!", "thanks"), ("muito obrigada", "thanks"), ("valeu!", "thanks"),
+    ("obg", "thanks"), ("vlw, ajudou muito", "thanks"), ("agradeço a atenção", "thanks"),
+    ("brigado pela ajuda", "thanks"), ("ok, obrigado", "thanks"),
+    ("show, valeu demais", "thanks"), ("obrigada pela atenção", "thanks"),
+    ("quero ver o catálogo", "catalog"), ("quais produtos vocês têm?", "catalog"),
+    ("me manda o catálogo", "catalog"), ("o que vocês vendem?", "catalog"),
+    ("tem cardápio?", "catalog"), ("mostra os produtos", "catalog"),
+    ("quais são as opções?", "catalog"), ("queria ver os produtos disponíveis", "catalog"),
+    ("me mostra o que vocês têm", "catalog"), ("lista de produtos por favor", "catalog"),
+    ("quanto custa o tênis azul tamanho 42?", OTHER),
+    ("meu pedido ainda não chegou", OTHER), ("vocês entregam em Campinas?", OTHER),
+    ("quero trocar o tamanho da camiseta", OTHER), ("aceita pix?", OTHER),
+    ("qual o prazo de entrega para o CEP 01310-100?", OTHER),
+    ("a camiseta preta tem no tamanho G?", OTHER),
+    ("quero cancelar minha compra", OTHER), ("o produto veio com defeito", OTHER),
+    ("posso parcelar no cartão?", OTHER), ("qual o valor do frete?", OTHER),
+    ("quero falar com um atendente", OTHER), ("como faço para rastrear o pedido?", OTHER),
+    ("vocês têm loja física?", OTHER), ("o boleto venceu, e agora?", OTHER),
+    ("quero comprar duas unidades do kit", OTHER)
+]
+
+class KeywordMatcher:
+    """
+    Autômato de Aho-Corasick: encontra todas as palavras-chave em uma passada.
+    """
+    def __init__(self, keywords: Dict[str, List[str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+
+        for label, patterns in keywords.items():
+            for pattern in patterns:
+                self._add(normalize_text(pattern), label)
+        self._build()
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Retorna (início, fim, rótulo) das palavras inteiras encontradas no
+        texto já normalizado.
+        """
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, label in self._out[state]:
+                start, end = index - length + 1, index + 1
+                if (start == 0 or text[start - 1] == " ") and (
+                    end == len(text) or text[end] == " "
+                ):
+                    matches.append((start, end, label))
+        return matches
+
+    def labels(self, text: str) -> Set[str]:
+        return {label for _, _, label in self.find(text)}
+
+    def _add(self, pattern: str, label: str):
+        state = 0
+        for char in pattern:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._out[state].append((len(pattern), label))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in self._goto[state].items():
+                queue.append(target)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[target] = self._goto[fail].get(char, 0)
+                self._out[target] = self._out[target] + self._out[self._fail[target]]
+
+class IntentModel:
+    """
+    TF-IDF (unigramas e bigramas) + regressão logística multinomial.
+
+    Vetores esparsos em dicionários: o modelo é pequeno o bastante para não
+    exigir numpy/scikit-learn no servidor.
+    """
+    def __init__(self):
+        self.labels: List[str] = []
+        self.idf: Dict[str, float] = {}
+        self.weights: Dict[str, Dict[str, float]] = {}
+        self.bias: Dict[str, float] = {}
+
+    def fit(
+        self,
+        texts: List[str],
+        labels: List[str],
+        epochs: int = 40,
+        learning_rate: float = 0.5,
+        l2: float = 1e-4,
+        seed: int = 42
+    ) -> "IntentModel":
+        documents = [_features(normalize_text(text)) for text in texts]
+        self.labels = sorted(set(labels))
+        frequency = Counter(term for doc in documents for term in set(doc))
+        self.idf = {
+            term: math.log((1 + len(documents)) / (1 + count)) + 1
+            for term, count in frequency.items()
+        }
+        self.weights = {label: {} for label in self.labels}
+        self.bias = {label: 0.0 for label in self.labels}
+
+        samples = [(self._vectorize(doc), label) for doc, label in zip(documents, labels)]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(samples)
+            rate = learning_rate / (1 + epoch * 0.1)
+            for vector, label in samples:
+                probabilities = self._softmax(vector)
+                for candidate in self.labels:
+                    gradient = probabilities[candidate] - (1.0 if candidate == label else 0.0)
+                    weights = self.weights[candidate]
+                    for term, value in vector.items():
+                        weight = weights.get(term, 0.0)
+                        weights[term] = weight - rate * (gradient * value + l2 * weight)
+                    self.bias[candidate] -= rate * gradient
+        return self
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """
+        Retorna a probabilidade de cada rótulo para um texto já normalizado.
+        """
+        return self._softmax(self._vectorize(_features(text)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "labels": self.labels,
+            "idf": self.idf,
+            "weights": self.weights,
+            "bias": self.bias
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IntentModel":
+        model = cls()
+        model.labels = data["labels"]
+        model.idf = data["idf"]
+        model.weights = data["weights"]
+        model.bias = data["bias"]
+        return model
+
+    def _vectorize(self, terms: Counter) -> Dict[str, float]:
+        vector = {
+            term: count * self.idf[term]
+            for term, count in terms.items()
+            if term in self.idf
+        }
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {term: value / norm for term, value in vector.items()} if norm else {}
+
+    def _softmax(self, vector: Dict[str, float]) -> Dict[str, float]:
+        scores = {
+            label: self.bias[label] + sum(
+                self.weights[label].get(term, 0.0) * value
+                for term, value in vector.items()
+            )
+            for label in self.labels
+        }
+        top = max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exps.values())
+        return {label: value / total for label, value in exps.items()}
+
+class IntentClassifier:
+    """
+    Decide se uma mensagem pode ser respondida localmente.
+    """
+    def __init__(self, model_path: str, threshold: float, enabled: bool = True):
+        self.threshold = threshold
+        self.enabled = enabled
+        self.matcher = KeywordMatcher(KEYWORDS)
+        self.model: Optional[IntentModel] = None
+        self.keyword_hits = 0
+        self.model_hits = 0
+        self.passed = 0
+
+        if model_path and os.path.exists(model_path):
+            try:
+                with open(model_path) as f:
+                    self.model = IntentModel.from_dict(json.load(f))
+            except Exception as e:
+                print(f"Erro ao carregar modelo de intenções: {str(e)}")
+
+    def classify(self, message: str) -> Optional[Tuple[str, str]]:
+        """
+        Retorna (rótulo, origem) para mensagens respondíveis sem LLM, ou None.
+        """
+        if not self.enabled:
+            return None
+
+        text = normalize_text(message)
+        if not text:
+            self.passed += 1
+            return None
+
+        label = self._by_keywords(text)
+        if label is not None:
+            self.keyword_hits += 1
+            return label, "keywords"
+
+        if self.model is not None:
+            probabilities = self.model.predict_proba(text)
+            label = max(probabilities, key=probabilities.get)
+            if label in LOCAL_INTENTS and probabilities[label] >= self.threshold:
+                self.model_hits += 1
+                return label, "model"
+
+        self.passed += 1
+        return None
+
+    def has_purchase_intent(self, message: str) -> bool:
+        return "purchase" in self.matcher.labels(normalize_text(message))
+
+    def stats(self) -> Dict[str, Any]:
+        local = self.keyword_hits + self.model_hits
+        total = local + self.passed
+        return {
+            "keyword_hits": self.keyword_hits,
+            "model_hits": self.model_hits,
+            "passed_to_llm": self.passed,
+            "avoided_ratio": local / total if total else 0.0,
+            "model_loaded": self.model is not None
+        }
+
+    def _by_keywords(self, text: str) -> Optional[str]:
+        # Só vale se as palavras-chave cobrem toda a mensagem (fora as de
+        # preenchimento): "oi, qual o prazo de entrega?" vai para o LLM
+        covered = [False] * len(text)
+        labels = set()
+        for start, end, label in self.matcher.find(text):
+            if label in LOCAL_INTENTS:
+                labels.add(label)
+                covered[start:end] = [True] * (end - start)
+        if not labels:
+            return None
+
+        position = 0
+        for token in text.split(" "):
+            if not covered[position] and token not in FILLER:
+                return None
+            position += len(token) + 1
+
+        return next(label for label in LOCAL_INTENTS if label in labels)
+
+def _features(text: str) -> Counter:
+    tokens = text.split()
+    return Counter(tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])])
+
+def training_pairs(histories: Iterable[List[Dict[str, Any]]]) -> Iterable[Tuple[str, str]]:
+    """
+    Extrai (texto da rodada, rótulo) do histórico de interações.
+
+    O rótulo vem da resposta seguinte: respostas do LLM dão "other". O
+    rótulo de uma resposta local foi previsto pelo próprio modelo, então não
+    é usado (o modelo reforçaria os próprios erros); essas respostas, assim
+    como as de históricos antigos sem a origem registrada, só viram exemplo
+    quando as palavras-chave (escritas à mão) cobrem a mensagem toda.
+    """
+    matcher_only = IntentClassifier(model_path="", threshold=1.0)
+    for history in histories:
+        fragments: List[str] = []
+        for interaction in history or []:
+            if interaction.get("type") == "message_received":
+                if interaction.get("content"):
+                    fragments.append(interaction["content"])
+                continue
+            if interaction.get("type") != "message_sent" or not fragments:
+                continue
+            # Mensagens em rajada são respondidas juntas (ver coalescer): o
+            # exemplo é o texto da rodada inteira, como o classificador o vê
+            received = "\n".join(fragments)
+
+            source = interaction.get("source")
+            if source == "fallback":
+                # Resposta de espera: vale a resposta completa que vem depois
+                continue
+            if source == "llm":
+                yield received, OTHER
+            else:
+                result = matcher_only.classify(received)
+                if result is not None:
+                    yield received, result[0]
+            fragments = []
+
+def train_from_history(db, limit: Optional[int] = None) -> IntentModel:
+    """
+    Treina o modelo com os exemplos base e o histórico dos clientes.
+    """
+    from app.crud.crud_message import row_to_interaction
+    from app.models.models import Message
+
+    query = (
+        db.query(Message)
+        .order_by(Message.customer_id, Message.created_at, Message.id)
+        .yield_per(1000)
+    )
+    histories = (
+        [row_to_interaction(message) for message in messages]
+        for _, messages in groupby(query, key=lambda message: message.customer_id)
+    )
+    pairs = list(training_pairs(histories))
+    if limit is not None:
+        pairs = pairs[-limit:]
+    pairs = SEED_EXAMPLES + pairs
+    return IntentModel().fit([text for text, _ in pairs], [label for _, label in pairs])
+
+intent_classifier = IntentClassifier(
+    model_path=settings.AI_INTENT_MODEL_PATH,
+    threshold=settings.AI_INTENT_THRESHOLD,
+    enabled=settings.AI_LOCAL_INTENTS_ENABLED
+)
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        model = train_from_history(db)
+    finally:
+        db.close()
+
+    os.makedirs(os.path.dirname(settings.AI_INTENT_MODEL_PATH) or ".", exist_ok=True)
+    with open(settings.AI_INTENT_MODEL_PATH, "w") as f:
+        json.dump(model.to_dict(), f)
+    print(f"Modelo de intenções salvo em {settings.AI_INTENT_MODEL_PATH}")
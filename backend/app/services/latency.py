@@ -0,0 +1,44 @@
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+class LatencyTracker:
+    """
+    Mantém as últimas `size` latências observadas e seus percentis.
+    """
+    def __init__(self, size: int = 1000):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+
+    def observe_since(self, started_at: float):
+        """
+        Registra o tempo decorrido desde `started_at` (time.monotonic()).
+        """
+        self.observe(time.monotonic() - started_at)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Retorna o percentil `p` (0 a 1) em segundos, ou None sem amostras.
+        """
+        if not self._samples:
+            return None
+        samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Retorna p50, p95 e máximo em milissegundos.
+        """
+        if not self._samples:
+            return {"count": self.count, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+
+        return {
+            "count": self.count,
+            "p50_ms": round(self.percentile(0.50) * 1000, 1),
+            "p95_ms": round(self.percentile(0.95) * 1000, 1),
+            "max_ms": round(max(self._samples) * 1000, 1)
+        }
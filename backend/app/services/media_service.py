@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import httpx
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.services.whatsapp_service import whatsapp_service
+
+class MediaService:
+    """
+    Mantém as imagens de produtos hospedadas na Graph API.
+
+    Cada imagem é enviada uma única vez para o endpoint de mídia e o ID
+    retornado fica em cache pelo hash do conteúdo (a Meta mantém as mídias por
+    30 dias). A associação URL -> hash também fica em cache, para que um envio
+    não precise baixar a imagem, e é invalidada quando o produto troca de
+    imagem. A cópia em memória guarda no máximo `local_size` chaves (LRU).
+    """
+    def __init__(self):
+        self.media_ttl = settings.WHATSAPP_MEDIA_TTL_SECONDS
+        self.url_ttl = settings.WHATSAPP_MEDIA_URL_TTL_SECONDS
+        self.local_size = settings.WHATSAPP_MEDIA_LOCAL_SIZE
+        self._local: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self.hits = 0
+        self.uploads = 0
+        self.errors = 0
+
+    async def send_image(
+        self,
+        phone_number: str,
+        image_url: str,
+        caption: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Envia uma imagem pelo ID de mídia em cache; em caso de falha, pelo link.
+        """
+        try:
+            media_id = await self.get_media_id(image_url)
+        except Exception as e:
+            print(f"Erro ao obter mídia da imagem {image_url}: {str(e)}")
+            self.errors += 1
+            media_id = None
+
+        return await whatsapp_service.send_image(
+            phone_number=phone_number,
+            image_url=image_url,
+            caption=caption,
+            media_id=media_id
+        )
+
+    async def get_media_id(self, image_url: str) -> str:
+        """
+        Retorna o ID de mídia da imagem, fazendo o upload apenas se necessário.
+        """
+        content_hash = await self._get(self._url_key(image_url), self.url_ttl)
+        if content_hash:
+            media_id = await self._get(self._media_key(content_hash), self.media_ttl)
+            if media_id:
+                self.hits += 1
+                return media_id
+
+        # Envios simultâneos da mesma imagem aguardam um único upload
+        future = self._inflight.get(image_url)
+        if future is None:
+            future = asyncio.ensure_future(self._upload(image_url))
+            self._inflight[image_url] = future
+            future.add_done_callback(lambda f: self._inflight.pop(image_url, None))
+        return await asyncio.shield(future)
+
+    async def invalidate(self, image_url: Optional[str]):
+        """
+        Descarta a associação URL -> mídia (ex.: produto trocou de imagem).
+        """
+        if not image_url:
+            return
+        key = self._url_key(image_url)
+        self._local.pop(key, None)
+        try:
+            await get_redis().delete(key)
+        except Exception as e:
+            print(f"Erro ao invalidar mídia no Redis: {str(e)}")
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "uploads": self.uploads, "errors": self.errors}
+
+    async def _upload(self, image_url: str) -> str:
+        # Cliente separado: o da Graph API leva o token de acesso
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=settings.WHATSAPP_TIMEOUT_SECONDS
+            )
+        response = await self._client.get(image_url)
+        response.raise_for_status()
+        content = response.content
+        content_hash = hashlib.sha256(content).hexdigest()
+
+        media_id = await self._get(self._media_key(content_hash), self.media_ttl)
+        if media_id:
+            self.hits += 1
+        else:
+            mime_type = response.headers.get("Content-Type", "image/jpeg").split(";")[0]
+            media_id = await whatsapp_service.upload_media(
+                content, mime_type, filename=content_hash[:16]
+            )
+            self.uploads += 1
+            await self._set(self._media_key(content_hash), media_id, self.media_ttl)
+
+        await self._set(self._url_key(image_url), content_hash, self.url_ttl)
+        return media_id
+
+    async def _get(self, key: str, ttl: int) -> Optional[str]:
+        cached = self._local.get(key)
+        if cached and cached[1] > time.monotonic():
+            self._local.move_to_end(key)
+            return cached[0]
+        try:
+            value = await get_redis().get(key)
+        except Exception as e:
+            print(f"Erro ao consultar mídia no Redis: {str(e)}")
+            return None
+        if value:
+            # A cópia local não vive mais que o TTL do tipo de chave
+            self._remember(key, value, ttl)
+        return value
+
+    async def _set(self, key: str, value: str, ttl: int):
+        self._remember(key, value, ttl)
+        try:
+            await get_redis().set(key, value, ex=ttl)
+        except Exception as e:
+            print(f"Erro ao gravar mídia no Redis: {str(e)}")
+
+    def _remember(self, key: str, value: str, ttl: int):
+        self._local[key] = (value, time.monotonic() + ttl)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    def _url_key(self, image_url: str) -> str:
+        return f"whatsapp:media:url:{hashlib.sha1(image_url.encode()).hexdigest()}"
+
+    def _media_key(self, content_hash: str) -> str:
+        return f"whatsapp:media:id:{content_hash}"
+
+media_service = MediaService()
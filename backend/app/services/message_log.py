@@ -0,0 +1,57 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+from app.core.config import settings
+from app.crud.crud_customer import customer as crud_customer
+from app.database import SessionLocal, statement_counter
+from app.services.batch_writer import BatchWriter
+
+class MessageLog(BatchWriter):
+    """
+    Acumula as interações dos clientes e as grava em lote na tabela messages.
+
+    Mesmo esquema do StatusBuffer (ver BatchWriter). A ordem de chegada é
+    mantida, então as interações de um cliente são gravadas na ordem em que
+    ocorreram. Cada lote é uma unidade de trabalho: duas instruções e um
+    commit; as instruções por mensagem aparecem em `stats()`.
+    """
+    label = "interações"
+
+    def __init__(self, max_size: int, flush_interval: float):
+        super().__init__(max_size, flush_interval)
+        self.statements = 0
+
+    def add(self, customer_id: int, interaction: Dict[str, Any]):
+        """
+        Adiciona uma interação (com timestamp) ao buffer.
+        """
+        self._enqueue([(customer_id, interaction)])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **super().stats(),
+            "statements": self.statements,
+            "statements_per_message": (
+                self.statements / self.written if self.written else 0.0
+            )
+        }
+
+    def _write(self, items: List[Tuple[int, Dict[str, Any]]]) -> int:
+        interactions: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for customer_id, interaction in items:
+            interactions[customer_id].append(interaction)
+
+        db = SessionLocal()
+        with statement_counter.track() as sql:
+            try:
+                return crud_customer.append_interactions(db, interactions=interactions)
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+                self.statements += sql["statements"]
+
+message_log = MessageLog(
+    max_size=settings.MESSAGE_LOG_MAX_SIZE,
+    flush_interval=settings.MESSAGE_LOG_FLUSH_SECONDS
+)
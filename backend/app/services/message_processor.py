@@ -0,0 +1,466 @@
+import asyncio
+import time
+from datetime import datetime
+from functools import partial
+from typing import Dict, Any, Iterator, List, Optional
+from app.core.config import settings
+from app.database import SessionLocal
+from app.crud.crud_product import product as crud_product
+from app.services.catalog_index import catalog_index
+from app.services.dedup import message_deduplicator
+from app.services.coalescer import MessageCoalescer
+from app.services.customer_cache import CustomerRef, customer_cache
+from app.services.conversation_context import conversation_context
+from app.services.dispatcher import ConversationDispatcher
+from app.services.latency import LatencyTracker
+from app.services.media_service import media_service
+from app.services.message_log import message_log
+from app.services.status_buffer import status_buffer
+from app.services.whatsapp_service import whatsapp_service
+from app.services.ai_service import ai_service
+
+dispatcher = ConversationDispatcher(settings.MESSAGE_MAX_CONCURRENCY)
+# Tarefas de segundo plano, em ordem por cliente (ex.: resumo da conversa)
+interaction_log = ConversationDispatcher(settings.MESSAGE_MAX_CONCURRENCY)
+turn_latency = LatencyTracker()
+
+# Tempo mínimo dado à IA, mesmo com o SLA já consumido (ex.: pelo agrupamento)
+MIN_AI_BUDGET_SECONDS = 1.0
+coalescer = MessageCoalescer(
+    window_seconds=settings.MESSAGE_COALESCE_WINDOW_SECONDS,
+    max_delay_seconds=settings.MESSAGE_COALESCE_MAX_DELAY_SECONDS
+)
+
+def validate_entries(data: Any) -> List[Dict[str, Any]]:
+    """
+    Valida o payload do webhook e retorna a lista de entradas.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("esperado um objeto JSON")
+
+    entries = data.get("entry", [])
+    if not isinstance(entries, list) or not all(
+        isinstance(entry, dict) for entry in entries
+    ):
+        raise ValueError("campo 'entry' deve ser uma lista de objetos")
+
+    return entries
+
+def iter_messages(entries: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Percorre as mensagens recebidas contidas nas entradas do webhook.
+    """
+    for entry in entries:
+        for change in entry.get("changes") or []:
+            for message in (change.get("value") or {}).get("messages") or []:
+                yield message
+
+def iter_statuses(entries: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Percorre os status de entrega (sent, delivered, read, failed) das entradas.
+    """
+    for entry in entries:
+        for change in entry.get("changes") or []:
+            for status in (change.get("value") or {}).get("statuses") or []:
+                yield status
+
+async def drop_duplicates(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Remove das entradas as mensagens reentregues pelo WhatsApp.
+    """
+    for entry in entries:
+        for change in entry.get("changes") or []:
+            value = change.get("value") or {}
+            messages = value.get("messages")
+            if not messages:
+                continue
+
+            duplicates = await asyncio.gather(*[
+                message_deduplicator.is_duplicate(message["id"])
+                if message.get("id") else _not_duplicate()
+                for message in messages
+            ])
+            value["messages"] = [
+                message
+                for message, duplicate in zip(messages, duplicates)
+                if not duplicate
+            ]
+
+    return entries
+
+async def _not_duplicate() -> bool:
+    return False
+
+async def release_messages(entries: List[Dict[str, Any]]):
+    """
+    Libera as mensagens na deduplicação (ex.: falha ao enfileirar), permitindo
+    que a reentrega do WhatsApp seja processada.
+    """
+    await asyncio.gather(*[
+        message_deduplicator.forget(message["id"])
+        for message in iter_messages(entries)
+        if message.get("id")
+    ])
+
+async def process_entries(
+    entries: List[Dict[str, Any]],
+    wait_for_replies: bool = False
+):
+    """
+    Processa todas as mensagens contidas nas entradas do webhook.
+
+    Os status de entrega vão para o buffer de gravação em lote. Mensagens do
+    mesmo cliente são processadas em ordem; clientes diferentes são atendidos
+    em paralelo pelo despachante. A vaga na fila do cliente é tomada antes de
+    qualquer espera: os clientes do payload são resolvidos em lote em
+    paralelo e cada tarefa aguarda essa busca já na sua vez, então uma busca
+    mais lenta não deixa uma mensagem posterior passar à frente.
+
+    Com `wait_for_replies` (fila de webhooks), só retorna depois que as
+    rodadas agrupadas que incluem essas mensagens forem respondidas, para que
+    a entrada não seja confirmada na fila antes disso.
+    """
+    statuses = list(iter_statuses(entries))
+    if statuses:
+        status_buffer.add(statuses)
+
+    messages = list(iter_messages(entries))
+    if not messages:
+        return
+
+    loop = asyncio.get_running_loop()
+    replies = [
+        loop.create_future() if wait_for_replies else None for _ in messages
+    ]
+    lookup = asyncio.ensure_future(resolve_customers(messages))
+    tasks = [
+        dispatcher.submit(
+            message.get("from", ""),
+            partial(handle_looked_up_message, message, lookup, replied)
+        )
+        for message, replied in zip(messages, replies)
+    ]
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if wait_for_replies:
+        await asyncio.gather(*replies)
+
+async def handle_looked_up_message(
+    message: Dict[str, Any],
+    lookup: "asyncio.Future[Dict[str, CustomerRef]]",
+    replied: Optional[asyncio.Future] = None
+):
+    """
+    Processa a mensagem com o cliente vindo da busca em lote do payload.
+    """
+    customers = await asyncio.shield(lookup)
+    await handle_message(message, customers.get(message.get("from")), replied)
+
+async def resolve_customers(messages: List[Dict[str, Any]]) -> Dict[str, CustomerRef]:
+    """
+    Busca ou cria, em lote, os clientes remetentes das mensagens (via cache).
+    """
+    try:
+        return await customer_cache.resolve(
+            [m["from"] for m in messages if m.get("from")],
+            defaults={"name": "Cliente WhatsApp"}
+        )
+    except Exception as e:
+        print(f"Erro ao resolver clientes em lote: {str(e)}")
+        return {}
+
+async def handle_message(
+    message: Dict[str, Any],
+    customer: Optional[CustomerRef] = None,
+    replied: Optional[asyncio.Future] = None
+):
+    """
+    Processa uma mensagem recebida do WhatsApp.
+
+    `customer` pode vir já resolvido (ver resolve_customers); nesse caso não
+    há nova consulta. O registro da interação não atrasa a resposta.
+    `replied` é concluído quando a rodada com a mensagem termina (ou falha).
+    """
+    received_at = time.monotonic()
+    try:
+        # Extrair informações da mensagem
+        whatsapp_number = message["from"]
+        message_text = message.get("text", {}).get("body", "")
+
+        if customer is None:
+            # Buscar ou criar cliente
+            customer = (await resolve_customers([message])).get(whatsapp_number)
+            if customer is None:
+                raise ValueError(f"cliente não resolvido para {whatsapp_number}")
+
+        # Registrar interação
+        log_interaction(customer.id, {
+            "type": "message_received",
+            "content": message_text,
+            "message_id": message["id"]
+        })
+
+        if coalescer.enabled:
+            # A resposta sai quando a janela do cliente fechar
+            coalescer.add(
+                whatsapp_number,
+                (message_text, customer, received_at, replied),
+                partial(schedule_turn, whatsapp_number)
+            )
+            replied = None  # concluído pela rodada agrupada
+        else:
+            await respond_to_turn(customer, whatsapp_number, message_text, received_at)
+
+    except Exception as e:
+        print(f"Erro ao processar mensagem: {str(e)}")
+    finally:
+        complete_replies([replied])
+
+def schedule_turn(whatsapp_number: str, items: List[Any]):
+    """
+    Agenda, na fila do cliente, a resposta às mensagens agrupadas da rajada.
+    """
+    message_text = "\n".join(text for text, _, _, _ in items if text)
+    customer = items[-1][1]
+    received_at = items[0][2]
+    replies = [replied for _, _, _, replied in items]
+    dispatcher.submit(
+        whatsapp_number,
+        partial(
+            handle_turn, whatsapp_number, message_text, customer, received_at, replies
+        )
+    )
+
+async def handle_turn(
+    whatsapp_number: str,
+    message_text: str,
+    customer: CustomerRef,
+    received_at: Optional[float] = None,
+    replies: Optional[List[Optional[asyncio.Future]]] = None
+):
+    """
+    Responde a uma rodada agrupada.
+    """
+    try:
+        await respond_to_turn(customer, whatsapp_number, message_text, received_at)
+    except Exception as e:
+        print(f"Erro ao responder mensagem: {str(e)}")
+    finally:
+        complete_replies(replies or [])
+
+def complete_replies(replies: List[Optional[asyncio.Future]]):
+    for replied in replies:
+        if replied is not None and not replied.done():
+            replied.set_result(None)
+
+async def respond_to_turn(
+    customer: CustomerRef,
+    whatsapp_number: str,
+    message_text: str,
+    received_at: Optional[float] = None
+):
+    """
+    Gera a resposta da IA para o texto do cliente e a envia.
+
+    Os produtos relevantes para a mensagem vêm do índice do catálogo e vão
+    para o prompt; havendo intenção de compra, seguem na mesma mensagem da
+    resposta. O prompt leva o contexto da conversa (resumo e últimas
+    rodadas). Se a IA não responder dentro do SLA, o cliente recebe uma
+    resposta de espera e a resposta completa segue depois, na fila do cliente.
+    """
+    products, context = await asyncio.gather(
+        retrieve_products(message_text),
+        conversation_context.build(customer.id)
+    )
+    catalog = asyncio.create_task(build_catalog(products))
+    # Processar mensagem com IA
+    ai_task = asyncio.ensure_future(
+        ai_service.process_message_with_ai(
+            message_text, products=products, context=context
+        )
+    )
+    follow_up = False
+    try:
+        try:
+            ai_response = await asyncio.wait_for(
+                asyncio.shield(ai_task), reply_budget(received_at)
+            )
+        except asyncio.TimeoutError:
+            follow_up = True
+            dispatcher.submit(
+                whatsapp_number,
+                partial(
+                    send_follow_up,
+                    customer, whatsapp_number, message_text, ai_task, catalog
+                )
+            )
+            ai_response = ai_service.holding_reply()
+
+        await deliver_reply(customer, whatsapp_number, ai_response, catalog, received_at)
+        if not follow_up:
+            await remember_turn(customer.id, message_text, ai_response)
+    finally:
+        if not follow_up:
+            ai_task.cancel()
+            catalog.cancel()
+
+def reply_budget(received_at: Optional[float]) -> float:
+    """
+    Tempo restante, dentro do SLA, para a IA responder.
+    """
+    budget = settings.AI_REPLY_SLA_SECONDS
+    if received_at is not None:
+        budget -= time.monotonic() - received_at
+    return max(budget, MIN_AI_BUDGET_SECONDS)
+
+async def send_follow_up(
+    customer: CustomerRef,
+    whatsapp_number: str,
+    message_text: str,
+    ai_task: asyncio.Future,
+    catalog: asyncio.Task
+):
+    """
+    Envia a resposta completa que passou do SLA.
+    """
+    try:
+        ai_response = await ai_task
+        await deliver_reply(customer, whatsapp_number, ai_response, catalog)
+        await remember_turn(customer.id, message_text, ai_response)
+    except Exception as e:
+        print(f"Erro ao enviar resposta complementar: {str(e)}")
+    finally:
+        catalog.cancel()
+
+async def deliver_reply(
+    customer: CustomerRef,
+    whatsapp_number: str,
+    ai_response: Dict[str, Any],
+    catalog: asyncio.Task,
+    received_at: Optional[float] = None
+):
+    """
+    Envia a resposta (com o catálogo, se houver intenção de compra) e a
+    registra; as fotos dos produtos do catálogo seguem em seguida.
+    """
+    if not ai_response["should_respond"]:
+        return
+
+    reply = ai_response["response"]
+    catalog_products: List[Any] = []
+    if ai_response.get("intent") == "purchase_intent":
+        catalog_products = await catalog
+        catalog_message = format_catalog(catalog_products)
+        if catalog_message:
+            reply = f"{reply}\n\n{catalog_message}"
+
+    # Enviar resposta
+    response = await whatsapp_service.send_message(
+        phone_number=whatsapp_number,
+        message=reply
+    )
+    if received_at is not None:
+        turn_latency.observe_since(received_at)
+
+    # Registrar resposta
+    log_interaction(customer.id, {
+        "type": "message_sent",
+        "content": reply,
+        "message_id": (response.get("messages") or [{}])[0].get("id"),
+        "intent": ai_response.get("intent"),
+        "source": ai_response.get("source"),
+        "label": ai_response.get("label"),
+        "sentiment": ai_response.get("sentiment"),
+        "products": ai_response.get("products")
+    })
+    await send_product_images(whatsapp_number, catalog_products)
+
+async def send_product_images(whatsapp_number: str, products: List[Any]):
+    """
+    Envia as fotos dos produtos do catálogo pelo ID de mídia em cache (ver
+    MediaService), sem novo upload das imagens já enviadas.
+    """
+    with_image = [p for p in products if getattr(p, "image_url", None)]
+    for product in with_image[:settings.CATALOG_MAX_IMAGES]:
+        try:
+            await media_service.send_image(
+                phone_number=whatsapp_number,
+                image_url=product.image_url,
+                caption=f"{product.name}: R$ {product.price:.2f}"
+            )
+        except Exception as e:
+            print(f"Erro ao enviar foto do produto {product.id}: {str(e)}")
+
+async def remember_turn(
+    customer_id: int,
+    message_text: str,
+    ai_response: Dict[str, Any]
+):
+    """
+    Guarda a rodada no contexto da conversa; o resumo é atualizado em
+    segundo plano, na fila de gravações do cliente.
+    """
+    if not ai_response["should_respond"] or ai_response.get("intent") == "error":
+        return
+    if await conversation_context.record(
+        customer_id, message_text, ai_response["response"]
+    ):
+        interaction_log.submit(
+            str(customer_id), partial(conversation_context.compact, customer_id)
+        )
+
+async def retrieve_products(message_text: str) -> List[Any]:
+    """
+    Busca no índice os produtos relacionados à mensagem.
+    """
+    if not catalog_index.loaded:
+        return []
+    try:
+        return await catalog_index.retrieve(message_text, settings.CATALOG_TOP_K)
+    except Exception as e:
+        print(f"Erro ao buscar produtos no índice: {str(e)}")
+        return []
+
+async def build_catalog(products: List[Any]) -> List[Any]:
+    """
+    Produtos do catálogo da resposta: os encontrados ou, sem eles, alguns
+    dos produtos ativos.
+    """
+    if products:
+        return products
+    if catalog_index.loaded:
+        return catalog_index.top(settings.CATALOG_TOP_K)
+    return await asyncio.to_thread(load_catalog_products)
+
+def load_catalog_products() -> List[Any]:
+    """
+    Busca alguns dos produtos ativos, direto do banco.
+    """
+    db = SessionLocal()
+    try:
+        return crud_product.get_active(db, limit=settings.CATALOG_TOP_K)
+    except Exception as e:
+        print(f"Erro ao buscar catálogo: {str(e)}")
+        return []
+    finally:
+        db.close()
+
+def format_catalog(products: List[Any]) -> Optional[str]:
+    if not products:
+        return None
+    product_list = "\n".join([
+        f"• {p.name}: R$ {p.price:.2f}"
+        for p in products
+    ])
+    return (
+        "Aqui estão alguns dos nossos produtos:\n\n"
+        f"{product_list}\n\n"
+        "Gostaria de mais informações sobre algum deles?"
+    )
+
+def log_interaction(customer_id: int, interaction_data: Dict[str, Any]):
+    """
+    Registra uma interação em segundo plano (gravação em lote, na ordem em
+    que ocorreu).
+    """
+    interaction_data["timestamp"] = datetime.utcnow().isoformat()
+    message_log.add(customer_id, interaction_data)
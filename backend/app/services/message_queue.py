@@ -0,0 +1,109 @@
+import json
+from typing import Dict, Any, List, Optional, Tuple
+from redis.exceptions import ResponseError
+from app.core.config import settings
+from app.core.redis import get_redis
+
+class WebhookQueue:
+    """
+    Fila durável (Redis Streams) com as entradas brutas recebidas no webhook.
+    """
+    def __init__(self):
+        self.stream = settings.WEBHOOK_STREAM
+        self.group = settings.WEBHOOK_CONSUMER_GROUP
+        self.maxlen = settings.WEBHOOK_STREAM_MAXLEN
+
+    async def enqueue(self, entries: List[Dict[str, Any]]) -> List[str]:
+        """
+        Grava as entradas do payload na stream e retorna os IDs gerados.
+        """
+        pipe = get_redis().pipeline(transaction=False)
+        for entry in entries:
+            pipe.xadd(
+                self.stream,
+                {"entry": json.dumps(entry)},
+                maxlen=self.maxlen,
+                approximate=True
+            )
+        return await pipe.execute()
+
+    async def ensure_group(self) -> None:
+        """
+        Cria o grupo de consumidores (e a stream) caso ainda não existam.
+        """
+        try:
+            await get_redis().xgroup_create(
+                self.stream, self.group, id="0", mkstream=True
+            )
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def read(
+        self,
+        consumer: str,
+        count: int,
+        block_ms: int = 5000
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Lê novas entradas destinadas a este consumidor.
+        """
+        response = await get_redis().xreadgroup(
+            self.group,
+            consumer,
+            {self.stream: ">"},
+            count=count,
+            block=block_ms
+        )
+        if not response:
+            return []
+        _, items = response[0]
+        return self._decode(items)
+
+    async def claim_stale(
+        self,
+        consumer: str,
+        count: int
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Assume entradas pendentes de consumidores que pararam sem confirmar.
+        """
+        response = await get_redis().xautoclaim(
+            self.stream,
+            self.group,
+            consumer,
+            min_idle_time=settings.WEBHOOK_CLAIM_IDLE_MS,
+            start_id="0-0",
+            count=count
+        )
+        return self._decode(response[1])
+
+    async def ack(self, *stream_ids: str) -> None:
+        """
+        Confirma o processamento das entradas.
+        """
+        if stream_ids:
+            await get_redis().xack(self.stream, self.group, *stream_ids)
+
+    async def depth(self) -> Optional[int]:
+        """
+        Retorna o número de entradas entregues e ainda não confirmadas
+        (None se o Redis não responder).
+        """
+        try:
+            pending = await get_redis().xpending(self.stream, self.group)
+        except ResponseError:
+            return 0
+        except Exception as e:
+            print(f"Erro ao consultar fila de webhooks: {str(e)}")
+            return None
+        return pending["pending"]
+
+    def _decode(self, items) -> List[Tuple[str, Dict[str, Any]]]:
+        return [
+            (stream_id, json.loads(fields["entry"]))
+            for stream_id, fields in items
+            if fields and "entry" in fields
+        ]
+
+webhook_queue = WebhookQueue()
@@ -0,0 +1,268 @@
+import asyncio
+import itertools
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+import httpx
+from app.core.config import settings
+
+PRIORITY_CONVERSATION = 0
+PRIORITY_BULK = 1
+
+RETRYABLE_STATUS = {429}
+# Falhas em que a requisição não chegou à Meta: reenviar não duplica a mensagem
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+class AmbiguousDeliveryError(Exception):
+    """
+    O envio falhou depois de a requisição chegar à Meta (timeout de leitura,
+    conexão interrompida, 5xx): a mensagem pode ter sido aceita. Não há
+    reenvio, para não entregar a mesma mensagem duas vezes.
+    """
+    def __init__(self, message: str, response: Optional[httpx.Response] = None):
+        super().__init__(message)
+        self.response = response
+
+class TokenBucket:
+    """
+    Balde de fichas: `rate` envios por segundo com rajadas de até `capacity`.
+    """
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """
+        Reserva uma ficha e retorna quantos segundos esperar antes de usá-la.
+        """
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+        self.tokens -= 1
+
+        wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def pause(self, seconds: float):
+        """
+        Suspende o consumo de fichas (ex.: após um 429 da Meta).
+        """
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = min(self.tokens, 0)
+
+class _Lane:
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self.pump: Optional[asyncio.Task] = None
+        self.retrying = 0
+        self.in_flight = 0
+        self.sent = 0
+        self.retried = 0
+        self.throttled = 0
+        self.failed = 0
+        self.ambiguous = 0
+
+class _Request:
+    def __init__(self, send: Callable[[], Awaitable[httpx.Response]], future: asyncio.Future):
+        self.send = send
+        self.future = future
+        self.attempts = 0
+
+class OutboundScheduler:
+    """
+    Agenda os envios para a Graph API respeitando o limite de vazão por número.
+
+    Cada phone_number_id tem uma fila com prioridade (respostas de conversa
+    antes de envios em massa) drenada por um balde de fichas. Só é reenviado
+    o que com certeza não foi aceito: 429 e falhas de conexão, com backoff
+    exponencial com jitter, respeitando o Retry-After; um 429 também pausa o
+    balde do número. Timeouts de leitura e 5xx falham com
+    AmbiguousDeliveryError, sem reenvio.
+    """
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lanes: Dict[str, _Lane] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._sequence = itertools.count()
+
+    async def submit(
+        self,
+        key: str,
+        send: Callable[[], Awaitable[httpx.Response]],
+        priority: int = PRIORITY_CONVERSATION
+    ) -> httpx.Response:
+        """
+        Enfileira um envio e retorna a resposta final (após eventuais retentativas).
+        """
+        lane = self._get_lane(key)
+        request = _Request(send, asyncio.get_running_loop().create_future())
+        lane.queue.put_nowait((priority, next(self._sequence), request))
+        return await request.future
+
+    def queue_depth(self, key: Optional[str] = None) -> int:
+        """
+        Retorna quantos envios aguardam (na fila ou em backoff).
+        """
+        if key is not None:
+            lanes = [self._lanes[key]] if key in self._lanes else []
+        else:
+            lanes = list(self._lanes.values())
+        return sum(lane.queue.qsize() + lane.retrying for lane in lanes)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna os contadores por phone_number_id.
+        """
+        return {
+            key: {
+                "queued": lane.queue.qsize(),
+                "retrying": lane.retrying,
+                "in_flight": lane.in_flight,
+                "sent": lane.sent,
+                "retried": lane.retried,
+                "throttled": lane.throttled,
+                "failed": lane.failed,
+                "ambiguous": lane.ambiguous
+            }
+            for key, lane in self._lanes.items()
+        }
+
+    def _get_lane(self, key: str) -> _Lane:
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = _Lane(TokenBucket(self.rate, self.burst))
+            self._lanes[key] = lane
+        if lane.pump is None or lane.pump.done():
+            lane.pump = asyncio.create_task(self._pump(lane))
+        return lane
+
+    async def _pump(self, lane: _Lane):
+        while True:
+            priority, _, request = await lane.queue.get()
+            if request.future.done():
+                continue
+
+            wait = lane.bucket.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            self._spawn(self._attempt(lane, priority, request))
+
+    async def _attempt(self, lane: _Lane, priority: int, request: _Request):
+        if request.future.done():
+            return
+
+        request.attempts += 1
+        lane.in_flight += 1
+        try:
+            response = await request.send()
+            error = None
+        except NOT_SENT_ERRORS as e:
+            response, error = None, e
+        except httpx.TransportError as e:
+            self._fail_ambiguous(lane, request, AmbiguousDeliveryError(
+                f"Envio sem confirmação da Graph API: {e!r}"
+            ))
+            return
+        except Exception as e:
+            lane.failed += 1
+            if not request.future.done():
+                request.future.set_exception(e)
+            return
+        finally:
+            lane.in_flight -= 1
+
+        if response is not None and response.status_code >= 500:
+            self._fail_ambiguous(lane, request, AmbiguousDeliveryError(
+                f"Graph API respondeu {response.status_code}", response=response
+            ))
+            return
+
+        retryable = error is not None or response.status_code in RETRYABLE_STATUS
+        if not retryable or request.attempts > self.max_retries:
+            if error is not None:
+                lane.failed += 1
+                if not request.future.done():
+                    request.future.set_exception(error)
+                return
+            if retryable:
+                lane.failed += 1
+            else:
+                lane.sent += 1
+            if not request.future.done():
+                request.future.set_result(response)
+            return
+
+        delay = self._backoff(request.attempts, response)
+        if response is not None and response.status_code == 429:
+            lane.throttled += 1
+            lane.bucket.pause(delay)
+
+        lane.retried += 1
+        lane.retrying += 1
+        self._spawn(self._requeue(lane, priority, request, delay))
+
+    def _fail_ambiguous(self, lane: _Lane, request: _Request, error: AmbiguousDeliveryError):
+        lane.failed += 1
+        lane.ambiguous += 1
+        if not request.future.done():
+            request.future.set_exception(error)
+
+    async def _requeue(self, lane: _Lane, priority: int, request: _Request, delay: float):
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            lane.retrying -= 1
+        lane.queue.put_nowait((priority, next(self._sequence), request))
+
+    def _backoff(self, attempts: int, response: Optional[httpx.Response]) -> float:
+        # Full jitter: aleatório entre 0 e o teto exponencial
+        delay = random.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        )
+        retry_after = _parse_retry_after(response)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _spawn(self, coro: Awaitable[Any]):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+def _parse_retry_after(response: Optional[httpx.Response]) -> Optional[float]:
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+outbound_scheduler = OutboundScheduler(
+    rate=settings.WHATSAPP_RATE_PER_SECOND,
+    burst=settings.WHATSAPP_RATE_BURST,
+    max_retries=settings.WHATSAPP_MAX_RETRIES,
+    backoff_base=settings.WHATSAPP_BACKOFF_BASE_SECONDS,
+    backoff_max=settings.WHATSAPP_BACKOFF_MAX_SECONDS
+)
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.crud.crud_message_status import message_status as crud_message_status
+from app.database import SessionLocal
+from app.services.batch_writer import BatchWriter
+
+def parse_status(status: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Converte um status do webhook (sent, delivered, read, failed) em uma linha.
+    """
+    if not status.get("id") or not status.get("status"):
+        return None
+
+    timestamp = None
+    if status.get("timestamp"):
+        try:
+            timestamp = datetime.fromtimestamp(int(status["timestamp"]), tz=timezone.utc)
+        except (ValueError, TypeError, OverflowError, OSError):
+            # Um timestamp inválido não pode derrubar o payload inteiro
+            print(f"Timestamp inválido no status {status['id']}: {status['timestamp']!r}")
+
+    errors = status.get("errors") or []
+    return {
+        "message_id": status["id"],
+        "recipient_id": status.get("recipient_id"),
+        "status": status["status"],
+        "timestamp": timestamp,
+        "pricing_category": (status.get("pricing") or {}).get("category"),
+        "error_code": errors[0].get("code") if errors else None
+    }
+
+class StatusBuffer(BatchWriter):
+    """
+    Acumula status de entrega e os grava em lote (ver BatchWriter).
+    """
+    label = "status de mensagens"
+
+    def add(self, statuses: List[Dict[str, Any]]):
+        """
+        Adiciona status brutos do webhook ao buffer.
+        """
+        rows = []
+        for status in statuses:
+            try:
+                row = parse_status(status)
+            except Exception as e:
+                print(f"Erro ao interpretar status de mensagem: {str(e)}")
+                continue
+            if row:
+                rows.append(row)
+        self._enqueue(rows)
+
+    def _write(self, rows: List[Dict[str, Any]]) -> int:
+        db = SessionLocal()
+        try:
+            return crud_message_status.create_many(db, rows=rows)
+        finally:
+            db.close()
+
+status_buffer = StatusBuffer(
+    max_size=settings.STATUS_BUFFER_MAX_SIZE,
+    flush_interval=settings.STATUS_BUFFER_FLUSH_SECONDS
+)
@@ -0,0 +1,199 @@
+import asyncio
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.services.whatsapp_service import whatsapp_service
+
+PLACEHOLDER = re.compile(r"\{\{\s*[\w.]+\s*\}\}")
+MEDIA_HEADER_FORMATS = ("IMAGE", "VIDEO", "DOCUMENT", "LOCATION")
+
+class TemplateError(ValueError):
+    """
+    Template inexistente, não aprovado ou com parâmetros incompatíveis.
+    """
+
+class TemplateCache:
+    """
+    Cache dos templates de mensagem por WHATSAPP_BUSINESS_ID.
+
+    Dentro de `ttl` a lista é servida do cache; até `stale_ttl` ela continua
+    sendo servida enquanto uma atualização roda em segundo plano
+    (stale-while-revalidate). Buscas simultâneas compartilham uma única
+    chamada à Graph API.
+    """
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[List[Dict[str, Any]]]],
+        ttl: float,
+        stale_ttl: float,
+        min_refresh_interval: float = 30.0
+    ):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._entries: Dict[str, Tuple[List[Dict[str, Any]], float]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.fetches = 0
+        self.errors = 0
+
+    async def get_templates(self, key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Retorna os templates, buscando na Graph API apenas quando necessário.
+        """
+        key = key or settings.WHATSAPP_BUSINESS_ID
+        entry = self._entries.get(key)
+        if entry is not None:
+            templates, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                return templates
+            if age < self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh_in_background(key)
+                return templates
+
+        return await self._refresh(key)
+
+    async def validate(
+        self,
+        template_name: str,
+        language_code: str = "pt_BR",
+        components: Optional[List[Dict[str, Any]]] = None,
+        key: Optional[str] = None
+    ):
+        """
+        Confere nome, idioma e quantidade de parâmetros sem chamar a Meta.
+
+        Levanta TemplateError se o envio certamente falharia. Se os templates
+        não puderem ser carregados, a validação fica a cargo da Meta.
+        """
+        key = key or settings.WHATSAPP_BUSINESS_ID
+        try:
+            templates = await self.get_templates(key)
+            template = _find(templates, template_name, language_code)
+            if template is None and self._can_refresh(key):
+                # Pode ser um template aprovado depois da última busca
+                template = _find(await self._refresh(key), template_name, language_code)
+        except Exception as e:
+            print(f"Erro ao carregar templates para validação: {str(e)}")
+            return
+
+        if template is None:
+            raise TemplateError(
+                f"Template '{template_name}' ({language_code}) não encontrado"
+            )
+        if template.get("status", "APPROVED") != "APPROVED":
+            raise TemplateError(
+                f"Template '{template_name}' não está aprovado ({template['status']})"
+            )
+
+        expected = expected_parameters(template)
+        sent = sent_parameters(components or [])
+        for slot in sorted(set(expected) | set(sent)):
+            if expected.get(slot, 0) != sent.get(slot, 0):
+                raise TemplateError(
+                    f"Template '{template_name}' espera {expected.get(slot, 0)} "
+                    f"parâmetro(s) em {slot}, recebeu {sent.get(slot, 0)}"
+                )
+
+    def invalidate(self, key: Optional[str] = None):
+        self._entries.pop(key or settings.WHATSAPP_BUSINESS_ID, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "fetches": self.fetches,
+            "errors": self.errors
+        }
+
+    def _can_refresh(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is None or time.monotonic() - entry[1] >= self.min_refresh_interval
+
+    async def _refresh(self, key: str) -> List[Dict[str, Any]]:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(key))
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def _refresh_in_background(self, key: str):
+        if key in self._inflight:
+            return
+        task = asyncio.ensure_future(self._refresh(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f"Erro ao atualizar templates: {str(task.exception())}")
+
+    async def _fetch(self, key: str) -> List[Dict[str, Any]]:
+        self.fetches += 1
+        try:
+            templates = await self.fetch()
+        except Exception:
+            self.errors += 1
+            raise
+        self._entries[key] = (templates, time.monotonic())
+        return templates
+
+def _find(
+    templates: List[Dict[str, Any]],
+    name: str,
+    language_code: str
+) -> Optional[Dict[str, Any]]:
+    for template in templates:
+        if template.get("name") == name and template.get("language") == language_code:
+            return template
+    return None
+
+def expected_parameters(template: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Conta os parâmetros esperados por componente do template.
+    """
+    expected: Dict[str, int] = {}
+    for component in template.get("components", []):
+        kind = component.get("type", "").upper()
+        if kind == "HEADER":
+            if component.get("format", "TEXT").upper() in MEDIA_HEADER_FORMATS:
+                expected["header"] = 1
+            else:
+                expected["header"] = len(PLACEHOLDER.findall(component.get("text", "")))
+        elif kind == "BODY":
+            expected["body"] = len(PLACEHOLDER.findall(component.get("text", "")))
+        elif kind == "BUTTONS":
+            for index, button in enumerate(component.get("buttons", [])):
+                count = len(PLACEHOLDER.findall(button.get("url", "")))
+                if count:
+                    expected[f"button {index}"] = count
+    return {slot: count for slot, count in expected.items() if count}
+
+def sent_parameters(components: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Conta os parâmetros enviados por componente.
+    """
+    sent: Dict[str, int] = {}
+    for component in components:
+        kind = component.get("type", "").lower()
+        count = len(component.get("parameters", []))
+        if kind == "button":
+            kind = f"button {int(component.get('index', 0))}"
+        if count:
+            sent[kind] = sent.get(kind, 0) + count
+    return sent
+
+template_cache = TemplateCache(
+    fetch=whatsapp_service.get_templates,
+    ttl=settings.WHATSAPP_TEMPLATES_TTL_SECONDS,
+    stale_ttl=settings.WHATSAPP_TEMPLATES_STALE_SECONDS
+)
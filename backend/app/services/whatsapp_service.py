@@ -1,10 +1,11 @@
 import httpx
 from typing import Dict, Any, List, Optional
 from app.core.config import settings
+from app.services.outbound_scheduler import outbound_scheduler, PRIORITY_CONVERSATION
 
 class WhatsAppService:
     def __init__(self):
-        self.base_url = "https://graph.facebook.com/v17.0"
+        self.base_url = settings.WHATSAPP_API_BASE_URL
         self.phone_number_id = settings.WHATSAPP_PHONE_NUMBER_ID
         self.access_token = settings.WHATSAPP_ACCESS_TOKEN
         self.verify_token = settings.WHATSAPP_VERIFY_TOKEN
@@ -13,36 +14,91 @@ class WhatsAppService:
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
         }
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Cliente HTTP compartilhado usado em todos os envios.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+    
+    async def start(self):
+        """
+        Abre o cliente HTTP compartilhado.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+    
+    async def close(self):
+        """
+        Fecha o cliente HTTP compartilhado e suas conexões.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def _build_client(self) -> httpx.AsyncClient:
+        # Um único pool por processo: HTTP/2 e keep-alive evitam um novo
+        # handshake TCP+TLS com a Graph API a cada envio
+        return httpx.AsyncClient(
+            http2=settings.WHATSAPP_HTTP2,
+            # Content-Type fica por conta de cada requisição (JSON ou multipart)
+            headers={"Authorization": self.headers["Authorization"]},
+            limits=httpx.Limits(
+                max_connections=settings.WHATSAPP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.WHATSAPP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.WHATSAPP_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            timeout=httpx.Timeout(
+                settings.WHATSAPP_TIMEOUT_SECONDS,
+                connect=settings.WHATSAPP_CONNECT_TIMEOUT_SECONDS
+            )
+        )
+    
+    async def _post_message(
+        self,
+        payload: Dict[str, Any],
+        priority: int = PRIORITY_CONVERSATION
+    ) -> Dict[str, Any]:
+        # O agendador aplica o limite de vazão do número e as retentativas
+        response = await outbound_scheduler.submit(
+            self.phone_number_id,
+            lambda: self.client.post(
+                f"{self.base_url}/{self.phone_number_id}/messages",
+                json=payload
+            ),
+            priority=priority
+        )
+        response.raise_for_status()
+        return response.json()
     
     async def send_message(
         self,
         phone_number: str,
-        message: str
+        message: str,
+        priority: int = PRIORITY_CONVERSATION
     ) -> Dict[str, Any]:
         """
         Envia uma mensagem de texto via WhatsApp.
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/{self.phone_number_id}/messages",
-                headers=self.headers,
-                json={
-                    "messaging_product": "whatsapp",
-                    "recipient_type": "individual",
-                    "to": phone_number,
-                    "type": "text",
-                    "text": {"body": message}
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self._post_message({
+            "messaging_product": "whatsapp",
+            "recipient_type": "individual",
+            "to": phone_number,
+            "type": "text",
+            "text": {"body": message}
+        }, priority=priority)
     
     async def send_template(
         self,
         phone_number: str,
         template_name: str,
         language_code: str = "pt_BR",
-        components: Optional[List[Dict[str, Any]]] = None
+        components: Optional[List[Dict[str, Any]]] = None,
+        priority: int = PRIORITY_CONVERSATION
     ) -> Dict[str, Any]:
         """
         Envia uma mensagem de template via WhatsApp.
@@ -55,32 +111,47 @@ class WhatsAppService:
         if components:
             template_data["components"] = components
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/{self.phone_number_id}/messages",
-                headers=self.headers,
-                json={
-                    "messaging_product": "whatsapp",
-                    "recipient_type": "individual",
-                    "to": phone_number,
-                    "type": "template",
-                    "template": template_data
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self._post_message({
+            "messaging_product": "whatsapp",
+            "recipient_type": "individual",
+            "to": phone_number,
+            "type": "template",
+            "template": template_data
+        }, priority=priority)
     
     async def get_templates(self) -> List[Dict[str, Any]]:
         """
         Lista os templates disponíveis.
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/{settings.WHATSAPP_BUSINESS_ID}/message_templates",
-                headers=self.headers
-            )
+        templates = []
+        url = f"{self.base_url}/{settings.WHATSAPP_BUSINESS_ID}/message_templates"
+        params = {"limit": 100}
+        while url:
+            response = await self.client.get(url, params=params)
             response.raise_for_status()
-            return response.json().get("data", [])
+            data = response.json()
+            templates.extend(data.get("data", []))
+            # A URL "next" já traz o cursor e os parâmetros da consulta
+            url = data.get("paging", {}).get("next")
+            params = None
+        return templates
+    
+    async def upload_media(
+        self,
+        content: bytes,
+        mime_type: str,
+        filename: str = "media"
+    ) -> str:
+        """
+        Envia um arquivo para a Graph API e retorna o ID da mídia.
+        """
+        response = await self.client.post(
+            f"{self.base_url}/{self.phone_number_id}/media",
+            data={"messaging_product": "whatsapp", "type": mime_type},
+            files={"file": (filename, content, mime_type)}
+        )
+        response.raise_for_status()
+        return response.json()["id"]
     
     async def mark_message_as_read(
         self,
@@ -89,18 +160,11 @@ class WhatsAppService:
         """
         Marca uma mensagem como lida.
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/{self.phone_number_id}/messages",
-                headers=self.headers,
-                json={
-                    "messaging_product": "whatsapp",
-                    "status": "read",
-                    "message_id": message_id
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self._post_message({
+            "messaging_product": "whatsapp",
+            "status": "read",
+            "message_id": message_id
+        })
     
     async def send_location(
         self,
@@ -123,47 +187,34 @@ class WhatsAppService:
         if address:
             location_data["address"] = address
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/{self.phone_number_id}/messages",
-                headers=self.headers,
-                json={
-                    "messaging_product": "whatsapp",
-                    "recipient_type": "individual",
-                    "to": phone_number,
-                    "type": "location",
-                    "location": location_data
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self._post_message({
+            "messaging_product": "whatsapp",
+            "recipient_type": "individual",
+            "to": phone_number,
+            "type": "location",
+            "location": location_data
+        })
     
     async def send_image(
         self,
         phone_number: str,
-        image_url: str,
-        caption: Optional[str] = None
+        image_url: Optional[str] = None,
+        caption: Optional[str] = None,
+        media_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Envia uma imagem via WhatsApp.
+        Envia uma imagem via WhatsApp, por link ou por ID de mídia já enviada.
         """
-        image_data = {"link": image_url}
+        image_data = {"id": media_id} if media_id else {"link": image_url}
         if caption:
             image_data["caption"] = caption
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/{self.phone_number_id}/messages",
-                headers=self.headers,
-                json={
-                    "messaging_product": "whatsapp",
-                    "recipient_type": "individual",
-                    "to": phone_number,
-                    "type": "image",
-                    "image": image_data
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        return await self._post_message({
+            "messaging_product": "whatsapp",
+            "recipient_type": "individual",
+            "to": phone_number,
+            "type": "image",
+            "image": image_data
+        })
 
 whatsapp_service = WhatsAppService() 
\ No newline at end of file
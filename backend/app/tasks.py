@@ -0,0 +1,94 @@
+"""
+Worker que consome a fila de webhooks do WhatsApp.
+
+Uso: python -m app.tasks
+"""
+import asyncio
+import os
+import socket
+import time
+from typing import Dict, Any, Set
+from app.core.config import settings
+from app.core.redis import close_redis
+from app.services.catalog_index import catalog_index
+from app.services.message_queue import webhook_queue
+from app.services.message_processor import (
+    coalescer,
+    dispatcher,
+    interaction_log,
+    process_entries
+)
+from app.services.message_log import message_log
+from app.services.status_buffer import status_buffer
+from app.services.media_service import media_service
+from app.services.whatsapp_service import whatsapp_service
+
+CLAIM_INTERVAL_SECONDS = 30
+
+async def handle_entry(stream_id: str, entry: Dict[str, Any]):
+    """
+    Processa uma entrada da fila e confirma o processamento só depois que as
+    rodadas com suas mensagens forem respondidas (inclusive as agrupadas).
+    """
+    await process_entries([entry], wait_for_replies=True)
+    await webhook_queue.ack(stream_id)
+
+async def run_worker(concurrency: int):
+    """
+    Consome a fila mantendo no máximo `concurrency` entradas em processamento.
+
+    Entradas não confirmadas (ex.: worker finalizado no meio do
+    processamento) são reassumidas após WEBHOOK_CLAIM_IDLE_MS.
+    """
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    await webhook_queue.ensure_group()
+    await whatsapp_service.start()
+    await catalog_index.start()
+
+    running: Set[asyncio.Task] = set()
+    last_claim = 0.0
+
+    try:
+        while True:
+            free_slots = concurrency - len(running)
+            if free_slots <= 0:
+                await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            batch = []
+            if time.monotonic() - last_claim >= CLAIM_INTERVAL_SECONDS:
+                batch = await webhook_queue.claim_stale(consumer, count=free_slots)
+                last_claim = time.monotonic()
+
+            if not batch:
+                batch = await webhook_queue.read(consumer, count=free_slots)
+
+            for stream_id, entry in batch:
+                task = asyncio.create_task(handle_entry(stream_id, entry))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                task.add_done_callback(_report_failure)
+
+    finally:
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        # Responde às rajadas ainda abertas antes de encerrar
+        coalescer.flush_all()
+        await dispatcher.drain()
+        await interaction_log.drain()
+        await catalog_index.stop()
+        await message_log.flush()
+        await status_buffer.flush()
+        await whatsapp_service.close()
+        await media_service.close()
+        await close_redis()
+
+def _report_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        print(f"Erro ao processar entrada da fila: {str(task.exception())}")
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run_worker(settings.WEBHOOK_WORKER_CONCURRENCY))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,23 @@
+"""
+Variáveis mínimas para importar a aplicação fora do ambiente completo.
+"""
+import os
+
+DEFAULTS = {
+    "POSTGRES_SERVER": "localhost",
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_DB": "whatsapp_sales",
+    "SECRET_KEY": "benchmark",
+    "WHATSAPP_ACCESS_TOKEN": "benchmark",
+    "WHATSAPP_PHONE_NUMBER_ID": "1000000000",
+    "WHATSAPP_BUSINESS_ID": "2000000000",
+    "WHATSAPP_VERIFY_TOKEN": "benchmark",
+    "OPENAI_API_KEY": "sk-benchmark",
+    "MERCADO_PAGO_ACCESS_TOKEN": "benchmark",
+    "MERCADO_PAGO_PUBLIC_KEY": "benchmark",
+}
+
+def configure(**overrides: str):
+    for key, value in {**DEFAULTS, **overrides}.items():
+        os.environ.setdefault(key, value)
@@ -0,0 +1,52 @@
+"""
+Servidor local que imita os endpoints da Graph API usados pelo WhatsAppService.
+"""
+import asyncio
+import itertools
+import threading
+import time
+from typing import Optional
+import uvicorn
+from fastapi import FastAPI
+
+def build_app(delay_ms: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    counter = itertools.count(1)
+
+    @app.post("/{phone_number_id}/messages")
+    async def messages(phone_number_id: str):
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+        return {
+            "messaging_product": "whatsapp",
+            "messages": [{"id": f"wamid.standin.{next(counter)}"}]
+        }
+
+    @app.get("/{business_id}/message_templates")
+    async def templates(business_id: str):
+        return {"data": []}
+
+    return app
+
+def start(
+    port: int,
+    delay_ms: float = 0.0,
+    ssl_keyfile: Optional[str] = None,
+    ssl_certfile: Optional[str] = None
+) -> uvicorn.Server:
+    """
+    Sobe o servidor em uma thread e retorna quando estiver aceitando conexões.
+    """
+    config = uvicorn.Config(
+        build_app(delay_ms),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+        ssl_keyfile=ssl_keyfile,
+        ssl_certfile=ssl_certfile
+    )
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
@@ -0,0 +1,99 @@
+"""
+Mede a vazão do classificador local de intenções e a fração de chamadas ao
+LLM evitadas em um conjunto sintético de mensagens.
+
+Uso (a partir de backend/):
+    python -m benchmarks.intent_classifier --messages 50000
+
+Com --model o classificador usa o modelo treinado; sem ele, um modelo treinado
+só com os exemplos base.
+"""
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from benchmarks import _env
+
+GREETINGS = [
+    "oi", "Olá!", "bom dia", "Boa tarde, tudo bem?", "opa", "oie tudo bom",
+    "e aí", "boa tardee", "bom diaaa"
+]
+THANKS = [
+    "obrigado", "Muito obrigada!", "valeu", "vlw", "obg!!", "agradeço",
+    "ok, obrigado", "show, agradecida"
+]
+CATALOG = [
+    "quero ver o catálogo", "quais produtos vocês têm?", "me manda os produtos",
+    "o que vocês vendem?", "tem cardápio?", "mostra as opções", "vcs vendem o que?"
+]
+QUESTIONS = [
+    "quanto custa a camiseta preta tamanho M?", "meu pedido 1234 ainda não chegou",
+    "vocês entregam em Curitiba?", "aceita pix ou só cartão?",
+    "oi, qual o prazo de entrega para o CEP 30140-071?",
+    "o tênis azul tem no 39?", "quero trocar o produto que veio com defeito",
+    "dá pra parcelar em 3x?", "bom dia, o kit presente ainda está disponível?",
+    "obrigado, e o frete pra Recife?", "quero comprar 2 unidades do boné"
+]
+MIX = [(GREETINGS, 0.2), (THANKS, 0.15), (CATALOG, 0.1), (QUESTIONS, 0.55)]
+
+def corpus(size: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    groups = [group for group, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    return [rng.choice(rng.choices(groups, weights)[0]) for _ in range(size)]
+
+def throughput(label: str, function: Callable[[str], object], messages: List[str]):
+    started = time.perf_counter()
+    for message in messages:
+        function(message)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<36} {len(messages) / elapsed:12,.0f} msg/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--model", help="caminho do modelo treinado (JSON)")
+    args = parser.parse_args()
+
+    _env.configure(AI_INTENT_MODEL_PATH=args.model or "")
+
+    from app.services.intent_classifier import (
+        IntentClassifier,
+        IntentModel,
+        SEED_EXAMPLES
+    )
+
+    messages = corpus(args.messages)
+    purchase_keywords = [
+        "comprar", "preço", "valor", "quanto custa",
+        "produtos", "catálogo", "disponível"
+    ]
+
+    keywords_only = IntentClassifier(model_path="", threshold=1.0)
+    classifier = IntentClassifier(model_path=args.model or "", threshold=0.85)
+    if classifier.model is None:
+        classifier.model = IntentModel().fit(
+            [text for text, _ in SEED_EXAMPLES],
+            [label for _, label in SEED_EXAMPLES]
+        )
+
+    print("Intenção de compra (pós-LLM)")
+    throughput(
+        "  varredura linear (anterior)",
+        lambda m: any(k in m.lower() for k in purchase_keywords),
+        messages
+    )
+    throughput("  Aho-Corasick", keywords_only.has_purchase_intent, messages)
+
+    print("Classificação antes do LLM")
+    throughput("  palavras-chave", keywords_only.classify, messages)
+    throughput("  palavras-chave + modelo", classifier.classify, messages)
+
+    print("Chamadas ao LLM evitadas")
+    for label, instance in (("palavras-chave", keywords_only), ("palavras-chave + modelo", classifier)):
+        stats = instance.stats()
+        print(f"  {label:<34} {stats['avoided_ratio']:6.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Mede a vazão e a latência do caminho de resposta (índice do catálogo, IA e
+envio) sem rede externa: a IA é o backend local (AI_BACKEND=local) e a Graph
+API é o servidor local de graph_stand_in.
+
+Uso (a partir de backend/):
+    python -m benchmarks.message_path --turns 2000 --customers 200 --latency-ms 800
+
+O resultado é reproduzível para a mesma semente. Banco e Redis ficam de fora:
+o registro das interações é desligado, assim como o cache de respostas e o
+contexto da conversa.
+"""
+import argparse
+import asyncio
+import random
+import time
+from functools import partial
+from types import SimpleNamespace
+
+from benchmarks import _env
+from benchmarks.intent_classifier import corpus
+
+PRODUCTS = [
+    ("Camiseta preta", "Camiseta de algodão, tamanhos P ao GG", 49.9),
+    ("Tênis azul", "Tênis de corrida, numeração 34 a 44", 259.0),
+    ("Boné", "Boné aba curva ajustável", 39.9),
+    ("Kit presente", "Caneca, chaveiro e cartão", 89.0),
+    ("Calça jeans", "Jeans reta, lavagem escura", 149.9),
+]
+
+async def run(args):
+    from app.services import message_processor
+    from app.services.catalog_index import catalog_index
+    from app.services.ai_service import ai_service
+    from app.services.whatsapp_service import whatsapp_service
+
+    message_processor.log_interaction = lambda *args: None
+    for product_id, (name, description, price) in enumerate(PRODUCTS, start=1):
+        catalog_index.upsert(SimpleNamespace(
+            id=product_id, owner_id=1, name=name, description=description,
+            price=price, is_active=True
+        ))
+    catalog_index.loaded = True
+
+    rng = random.Random(args.seed)
+    messages = corpus(args.turns, seed=args.seed)
+    turns = [
+        (f"55119{rng.randrange(args.customers):08d}", text) for text in messages
+    ]
+
+    await whatsapp_service.start()
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            message_processor.dispatcher.submit(
+                number,
+                partial(
+                    message_processor.respond_to_turn,
+                    SimpleNamespace(id=int(number[-8:])), number, text, time.monotonic()
+                )
+            )
+            for number, text in turns
+        ])
+        await message_processor.dispatcher.drain()
+        elapsed = time.perf_counter() - started
+    finally:
+        await whatsapp_service.close()
+
+    latency = message_processor.turn_latency.stats()
+    ai = ai_service.stats()
+    print(f"rodadas            {len(turns):>10}")
+    print(f"vazão              {len(turns) / elapsed:>10.1f} rodadas/s")
+    print(f"latência p50       {latency['p50_ms']:>10.1f} ms")
+    print(f"latência p95       {latency['p95_ms']:>10.1f} ms")
+    print(f"chamadas ao modelo {ai['completed']:>10}")
+    print(f"respostas de espera{ai['holding_replies']:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--latency", default="lognormal", help="fixed, uniform ou lognormal")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="mediana da latência da IA")
+    parser.add_argument("--spread", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=16, help="chamadas simultâneas ao modelo")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    _env.configure(
+        WHATSAPP_API_BASE_URL=f"http://127.0.0.1:{args.port}",
+        AI_BACKEND="local",
+        AI_LOCAL_LATENCY=args.latency,
+        AI_LOCAL_LATENCY_MS=str(args.latency_ms),
+        AI_LOCAL_LATENCY_SPREAD=str(args.spread),
+        AI_LOCAL_SEED=str(args.seed),
+        AI_MAX_CONCURRENCY=str(args.concurrency),
+        AI_CACHE_TTL_SECONDS="0",
+        AI_CONTEXT_TURNS="0",
+        MESSAGE_COALESCE_WINDOW_SECONDS="0"
+    )
+
+    from benchmarks import graph_stand_in
+    graph_stand_in.start(args.port)
+
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
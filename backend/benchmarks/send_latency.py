@@ -0,0 +1,97 @@
+"""
+Compara a latência de envio do WhatsAppService com um cliente HTTP novo por
+envio (comportamento anterior) e com o cliente compartilhado do serviço.
+
+Uso (a partir de backend/):
+    python -m benchmarks.send_latency --requests 500 --concurrency 10
+
+Com --ssl-certfile/--ssl-keyfile o servidor local usa TLS, o que torna o custo
+do handshake visível; aponte SSL_CERT_FILE para o certificado para que o
+httpx confie nele.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+from benchmarks import _env
+
+def percentile(samples: List[float], pct: int) -> float:
+    return statistics.quantiles(samples, n=100)[pct - 1]
+
+async def measure(
+    send: Callable[[], Awaitable[object]],
+    requests: int,
+    concurrency: int
+) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await send()
+            samples.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*[one() for _ in range(requests)])
+    return samples
+
+def report(label: str, samples: List[float]):
+    print(
+        f"{label:<28} p50={percentile(samples, 50):7.2f}ms "
+        f"p95={percentile(samples, 95):7.2f}ms "
+        f"média={statistics.mean(samples):7.2f}ms"
+    )
+
+async def run(args):
+    import httpx
+    from app.services.whatsapp_service import whatsapp_service
+
+    payload = {
+        "messaging_product": "whatsapp",
+        "recipient_type": "individual",
+        "to": "5511999999999",
+        "type": "text",
+        "text": {"body": "benchmark"}
+    }
+    url = f"{whatsapp_service.base_url}/{whatsapp_service.phone_number_id}/messages"
+
+    async def new_client_per_send():
+        async with httpx.AsyncClient() as client:
+            response = await client.post(url, headers=whatsapp_service.headers, json=payload)
+            response.raise_for_status()
+
+    async def shared_client():
+        await whatsapp_service.send_message("5511999999999", "benchmark")
+
+    await whatsapp_service.start()
+    try:
+        # Aquecimento
+        await measure(shared_client, 20, args.concurrency)
+
+        report("cliente novo por envio", await measure(new_client_per_send, args.requests, args.concurrency))
+        report("cliente compartilhado", await measure(shared_client, args.requests, args.concurrency))
+    finally:
+        await whatsapp_service.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay-ms", type=float, default=0.0, help="latência simulada no servidor")
+    parser.add_argument("--ssl-keyfile")
+    parser.add_argument("--ssl-certfile")
+    args = parser.parse_args()
+
+    scheme = "https" if args.ssl_certfile else "http"
+    _env.configure(WHATSAPP_API_BASE_URL=f"{scheme}://127.0.0.1:{args.port}")
+
+    from benchmarks import graph_stand_in
+    graph_stand_in.start(args.port, args.delay_ms, args.ssl_keyfile, args.ssl_certfile)
+
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.settings import settings
-from app.routers import auth, products, orders, whatsapp
+from app.routers import auth, products, orders, customers, whatsapp, broadcasts
+from app.core.redis import close_redis
+from app.services.broadcast_service import broadcast_service
+from app.services.catalog_index import catalog_index
+from app.services.media_service import media_service
+from app.services.message_log import message_log
+from app.services.message_processor import coalescer, dispatcher, interaction_log
+from app.services.status_buffer import status_buffer
+from app.services.whatsapp_service import whatsapp_service
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await whatsapp_service.start()
+    await catalog_index.start()
+    await broadcast_service.resume_unfinished()
+    yield
+    await broadcast_service.stop()
+    # Responde às rajadas ainda abertas e às rodadas na fila: essas mensagens
+    # já foram confirmadas ao WhatsApp e não serão reentregues
+    coalescer.flush_all()
+    await dispatcher.drain()
+    await interaction_log.drain()
+    await catalog_index.stop()
+    await message_log.flush()
+    await status_buffer.flush()
+    await whatsapp_service.close()
+    await media_service.close()
+    await close_redis()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -15,13 +44,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # cursor da próxima página nas listagens
 )
 
 # Incluir routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
 app.include_router(products.router, prefix=f"{settings.API_V1_STR}/products", tags=["products"])
 app.include_router(orders.router, prefix=f"{settings.API_V1_STR}/orders", tags=["orders"])
+app.include_router(customers.router, prefix=f"{settings.API_V1_STR}/customers", tags=["customers"])
 app.include_router(whatsapp.router, prefix=f"{settings.API_V1_STR}/whatsapp", tags=["whatsapp"])
+app.include_router(broadcasts.router, prefix=f"{settings.API_V1_STR}/broadcasts", tags=["broadcasts"])
 
 @app.get("/")
 async def root():
@@ -0,0 +1,136 @@
+import sys
+import time
+
+import pytest
+from redis.exceptions import ResponseError
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        return [
+            await getattr(self.redis, name)(*args, **kwargs)
+            for name, args, kwargs in self.calls
+        ]
+
+class FakeRedis:
+    """
+    Redis em memória com os comandos usados pelos serviços (sem expiração).
+    """
+    def __init__(self):
+        self.keys = {}
+        self.lists = {}
+        self.streams = {}
+        self.groups = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.keys.get(key)
+
+    async def mget(self, *keys):
+        return [self.keys.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.keys:
+            return None
+        self.keys[key] = value
+        return True
+
+    async def delete(self, *keys):
+        return sum(
+            self.keys.pop(key, None) is not None or self.lists.pop(key, None) is not None
+            for key in keys
+        )
+
+    async def expire(self, key, seconds):
+        return key in self.keys or key in self.lists
+
+    async def incr(self, key):
+        self.keys[key] = str(int(self.keys.get(key, "0")) + 1)
+        return int(self.keys[key])
+
+    async def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+        return len(self.lists[key])
+
+    async def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    async def lrange(self, key, start, end):
+        items = self.lists.get(key, [])
+        start = max(len(items) + start, 0) if start < 0 else start
+        end = len(items) + end if end < 0 else end
+        return items[start:end + 1]
+
+    async def ltrim(self, key, start, end):
+        self.lists[key] = await self.lrange(key, start, end)
+
+    async def xadd(self, stream, fields, maxlen=None, approximate=True):
+        entries = self.streams.setdefault(stream, [])
+        stream_id = f"{len(entries) + 1}-0"
+        entries.append((stream_id, dict(fields)))
+        return stream_id
+
+    async def xgroup_create(self, stream, group, id="$", mkstream=False):
+        if (stream, group) in self.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        self.streams.setdefault(stream, [])
+        self.groups[(stream, group)] = {"delivered": 0, "pending": {}}
+
+    async def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        response = []
+        for stream in streams:
+            state = self._group(stream, group)
+            items = self.streams[stream][state["delivered"]:][:count]
+            state["delivered"] += len(items)
+            for stream_id, _ in items:
+                state["pending"][stream_id] = (consumer, time.monotonic())
+            if items:
+                response.append((stream, items))
+        return response
+
+    async def xautoclaim(
+        self, stream, group, consumer, min_idle_time, start_id="0-0", count=100
+    ):
+        state = self._group(stream, group)
+        now = time.monotonic()
+        entries = dict(self.streams[stream])
+        claimed = []
+        for stream_id, (_, delivered_at) in list(state["pending"].items()):
+            if len(claimed) < count and (now - delivered_at) * 1000 >= min_idle_time:
+                state["pending"][stream_id] = (consumer, now)
+                claimed.append((stream_id, entries[stream_id]))
+        return ["0-0", claimed, []]
+
+    async def xack(self, stream, group, *stream_ids):
+        pending = self._group(stream, group)["pending"]
+        return sum(pending.pop(stream_id, None) is not None for stream_id in stream_ids)
+
+    async def xpending(self, stream, group):
+        return {"pending": len(self._group(stream, group)["pending"])}
+
+    def _group(self, stream, group):
+        if (stream, group) not in self.groups:
+            raise ResponseError("NOGROUP No such key or consumer group")
+        return self.groups[(stream, group)]
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """
+    Substitui get_redis em todos os módulos da aplicação já importados.
+    """
+    redis = FakeRedis()
+    for name, module in list(sys.modules.items()):
+        if name.startswith("app.") and hasattr(module, "get_redis"):
+            monkeypatch.setattr(module, "get_redis", lambda: redis)
+    return redis
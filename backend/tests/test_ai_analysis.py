@@ -0,0 +1,34 @@
+import pytest
+
+from app.schemas.ai import Intent, Sentiment
+from app.services.ai_service import parse_analysis
+
+def test_parses_fenced_json():
+    content = """```json
+    {"reply": "Temos sim!", "intent": "purchase_intent", "sentiment": "positivo",
+     "products": [{"product_name": "Camiseta", "quantity": 2, "specific_info": "cor"}]}
+    ```"""
+    analysis, valid = parse_analysis(content, "tem camiseta?")
+    assert valid
+    assert analysis.intent == Intent.PURCHASE
+    assert analysis.sentiment == Sentiment.POSITIVO
+    assert analysis.products[0].quantity == 2
+    assert analysis.products[0].specific_info == ["cor"]
+
+def test_prose_output_becomes_the_reply():
+    analysis, valid = parse_analysis("Claro, custa R$ 10.", "quanto custa?")
+    assert not valid
+    assert analysis.reply == "Claro, custa R$ 10."
+    assert analysis.intent == Intent.PURCHASE
+    assert analysis.products == []
+
+def test_invalid_products_are_dropped():
+    content = '{"reply": "Ok", "intent": "x", "products": [{"quantity": 1}, {"product_name": "Boné"}]}'
+    analysis, valid = parse_analysis(content, "oi")
+    assert valid
+    assert analysis.intent == Intent.GENERAL
+    assert [p.product_name for p in analysis.products] == ["Boné"]
+
+def test_output_without_reply_is_an_error():
+    with pytest.raises(ValueError):
+        parse_analysis('{"intent": "general"}', "oi")
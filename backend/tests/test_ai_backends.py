@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from app.schemas.ai import Intent
+from app.services.ai_backends import (
+    LatencyModel,
+    LocalBackend,
+    RecordingBackend,
+    ReplayBackend
+)
+from app.services.ai_service import AIService
+
+def test_latency_is_reproducible_and_follows_distribution():
+    model = LatencyModel("lognormal", median_ms=100, spread=0.5, seed=3)
+    samples = sorted(model.sample(str(i)) for i in range(2000))
+
+    assert samples == sorted(
+        LatencyModel("lognormal", 100, 0.5, seed=3).sample(str(i)) for i in range(2000)
+    )
+    assert 0.09 < samples[1000] < 0.11
+    assert LatencyModel("fixed", 20, 0.5).sample("x") == 0.02
+    with pytest.raises(ValueError):
+        LatencyModel("normal", 20, 0.5)
+
+def test_local_backend_serves_ai_service_offline():
+    service = AIService(backend=LocalBackend(LatencyModel("fixed", 0, 0)))
+
+    analysis = asyncio.run(service.analyze_message("quanto custa a camiseta?"))
+
+    assert analysis.intent == Intent.PURCHASE
+    assert analysis.reply
+    assert service.stats()["backend"] == "local"
+
+def test_replay_reproduces_recording(tmp_path):
+    path = str(tmp_path / "ai.jsonl")
+    recorder = RecordingBackend(LocalBackend(LatencyModel("fixed", 0, 0)), path)
+    params = {"model": "gpt-3.5-turbo", "messages": [{"role": "user", "content": "oi"}]}
+
+    async def scenario():
+        recorded = await recorder.chat_completion(**params)
+        vectors = await recorder.embed(["camiseta preta"], "text-embedding-ada-002")
+        replay = ReplayBackend(path, replay_latency=False)
+        replayed = await replay.chat_completion(**params)
+        replayed_vectors = await replay.embed(["camiseta preta"], "text-embedding-ada-002")
+        with pytest.raises(LookupError):
+            await replay.chat_completion(**{**params, "temperature": 0})
+        return recorded, replayed, vectors, replayed_vectors
+
+    recorded, replayed, vectors, replayed_vectors = asyncio.run(scenario())
+    assert replayed.choices[0].message.content == recorded.choices[0].message.content
+    assert replayed.choices[0].finish_reason == "stop"
+    assert replayed_vectors == vectors
@@ -0,0 +1,50 @@
+import asyncio
+
+from app.services.ai_cache import ResponseCache, normalize_text
+
+REPLY = {"should_respond": True, "response": "Custa R$ 10", "intent": "general"}
+
+def make_cache(disabled=()):
+    return ResponseCache(ttl_seconds=60, local_size=10, disabled_sellers=list(disabled))
+
+def test_normalize_text():
+    assert normalize_text("  Qual o PREÇO?? ") == "qual o preco"
+    assert normalize_text("tem disponível!") == normalize_text("Tem disponivel")
+
+def test_equivalent_messages_share_reply(fake_redis):
+    cache = make_cache()
+
+    async def scenario():
+        cached, version = await cache.lookup("123", "Qual o preço?")
+        await cache.store("123", "Qual o preço?", REPLY, version)
+        hit, _ = await cache.lookup("123", "qual o preco")
+        other_seller, _ = await cache.lookup("456", "qual o preco")
+        return cached, hit, other_seller
+
+    cached, hit, other_seller = asyncio.run(scenario())
+    assert cached is None
+    assert hit == REPLY
+    assert other_seller is None
+
+def test_catalog_change_invalidates_replies(fake_redis):
+    cache = make_cache()
+
+    async def scenario():
+        _, version = await cache.lookup("123", "qual o preço")
+        await cache.store("123", "qual o preço", REPLY, version)
+        # Um segundo processo (sem cache local) altera o catálogo
+        await ResponseCache(60, 10, []).bump_catalog_version()
+        return await cache.lookup("123", "qual o preço")
+
+    cached, version = asyncio.run(scenario())
+    assert cached is None
+    assert version == "1"
+
+def test_seller_opt_out(fake_redis):
+    cache = make_cache(disabled=["123"])
+
+    async def scenario():
+        await cache.store("123", "oi", REPLY, "0")
+        return await cache.lookup("123", "oi")
+
+    assert asyncio.run(scenario()) == (None, None)
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app.services.ai_gateway import AIGateway, AIGatewayBusy
+
+def test_identical_requests_share_one_call():
+    calls = []
+
+    async def create(**params):
+        calls.append(params)
+        await asyncio.sleep(0.05)
+        return "resposta"
+
+    async def scenario():
+        gateway = AIGateway(create, max_concurrency=4, queue_timeout=1)
+        messages = [{"role": "user", "content": "oi"}]
+        results = await asyncio.gather(*[
+            gateway.chat_completion(model="m", messages=messages) for _ in range(10)
+        ])
+        return results, gateway.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert results == ["resposta"] * 10
+    assert len(calls) == 1
+    assert stats["coalesced"] == 9
+
+def test_concurrency_is_capped_and_queue_times_out():
+    peak = 0
+    running = 0
+
+    async def create(**params):
+        nonlocal peak, running
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.1)
+        running -= 1
+        return params["n"]
+
+    async def scenario():
+        gateway = AIGateway(create, max_concurrency=2, queue_timeout=0.15)
+        results = await asyncio.gather(
+            *[gateway.chat_completion(n=i) for i in range(6)],
+            return_exceptions=True
+        )
+        return results, gateway.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert peak == 2
+    assert results[:4] == [0, 1, 2, 3]
+    assert all(isinstance(r, AIGatewayBusy) for r in results[4:])
+    assert stats["rejected"] == 2
+    assert stats["queued"] == 0 and stats["in_flight"] == 0
+
+def test_slow_call_is_hedged():
+    delays = [1.0, 0.02]
+
+    async def create(**params):
+        await asyncio.sleep(delays.pop(0))
+        return "resposta"
+
+    async def scenario():
+        gateway = AIGateway(create, max_concurrency=4, queue_timeout=1, hedge_after=0.05)
+        started = asyncio.get_running_loop().time()
+        result = await gateway.chat_completion(model="m")
+        return result, asyncio.get_running_loop().time() - started, gateway.stats()
+
+    result, elapsed, stats = asyncio.run(scenario())
+    assert result == "resposta"
+    assert elapsed < 0.5
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+    assert stats["in_flight"] == 0
@@ -0,0 +1,181 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+
+from app.crud.crud_broadcast import broadcast as crud_broadcast
+from app.schemas.broadcast import BroadcastCreate
+from app.services import broadcast_service as service_module
+from app.services.broadcast_service import BroadcastService
+
+@pytest.mark.parametrize("payload", [
+    {"template_name": "promo"},
+    {"template_name": "promo", "audience": {}},
+    {"template_name": "promo", "audience": {"customer_ids": [1], "active_within_days": 30}},
+])
+def test_audience_must_be_explicit(payload):
+    with pytest.raises(ValidationError):
+        BroadcastCreate(**payload)
+
+def test_single_audience_filter_is_accepted():
+    broadcast = BroadcastCreate(template_name="promo", audience={"active_within_days": 30})
+    assert broadcast.audience.model_dump(exclude_none=True) == {"active_within_days": 30}
+
+class FakeSession:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+    def add(self, obj):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+class FakeStore:
+    """
+    Disparo, público e destinatários em memória, no lugar dos CRUDs.
+    """
+    def __init__(self, customers):
+        self.customers = [(i, f"+55119999900{i:02d}") for i in customers]
+        self.broadcast = SimpleNamespace(
+            id=1, status="pending", last_customer_id=0, sent=0, failed=0,
+            template_name="promo", language_code="pt_BR", components=None, audience={}
+        )
+        self.recipients = []
+        self.save_errors = 0
+
+    def get(self, db, id):
+        return self.broadcast
+
+    def update_status(self, db, db_obj, status):
+        db_obj.status = status
+        return db_obj
+
+    def get_audience_after(self, db, after_id, limit):
+        return [c for c in self.customers if c[0] > after_id][:limit]
+
+    def record_progress(self, db, db_obj, results, last_customer_id):
+        if self.save_errors:
+            self.save_errors -= 1
+            raise RuntimeError("banco indisponível")
+        self.recipients.extend(r["customer_id"] for r in results)
+        db_obj.last_customer_id = last_customer_id
+
+def make_service(monkeypatch, store, on_send=None):
+    sent = []
+
+    async def send_template(phone_number, **kwargs):
+        sent.append(int(phone_number[-2:]))
+        if on_send:
+            await on_send(len(sent))
+        return {"messages": [{"id": f"wamid.{len(sent)}"}]}
+
+    monkeypatch.setattr(service_module, "crud_broadcast", store)
+    monkeypatch.setattr(service_module, "crud_customer", store)
+    monkeypatch.setattr(service_module, "SessionLocal", lambda **kwargs: FakeSession())
+    monkeypatch.setattr(service_module.whatsapp_service, "send_template", send_template)
+
+    service = BroadcastService()
+    service.chunk_size = 2
+    service.db_retries = 1
+    service.retry_seconds = 0
+    return service, sent
+
+def test_failed_run_resumes_from_checkpoint(monkeypatch, fake_redis):
+    store = FakeStore(range(1, 6))
+    service, sent = make_service(monkeypatch, store)
+
+    async def scenario():
+        await service._run(1)
+        # O segundo lote não pôde ser lido: o disparo falha no checkpoint 2
+        failed = (store.broadcast.status, store.broadcast.last_customer_id, list(sent))
+        store.broadcast.status = "pending"
+        await service._run(1)
+        return failed
+
+    calls = []
+    original = store.get_audience_after
+
+    def audience(db, after_id, limit):
+        # O banco cai ao ler o segundo lote (e na retentativa)
+        calls.append(after_id)
+        if len(calls) in (2, 3):
+            raise RuntimeError("banco indisponível")
+        return original(db, after_id, limit)
+
+    store.get_audience_after = audience
+    failed = asyncio.run(scenario())
+
+    assert failed == ("failed", 2, [1, 2])
+    assert sent == [1, 2, 3, 4, 5]
+    assert store.recipients == [1, 2, 3, 4, 5]
+    assert store.broadcast.status == "completed"
+    assert fake_redis.keys == {}
+
+def test_failed_save_is_retried_without_resending(monkeypatch, fake_redis):
+    store = FakeStore(range(1, 4))
+    store.save_errors = 1
+    service, sent = make_service(monkeypatch, store)
+
+    asyncio.run(service._run(1))
+
+    assert sent == [1, 2, 3]
+    assert store.recipients == [1, 2, 3]
+    assert store.broadcast.status == "completed"
+
+def test_cancel_stops_before_the_next_chunk(monkeypatch, fake_redis):
+    store = FakeStore(range(1, 6))
+
+    async def cancel_during_first_chunk(count):
+        if count == 1:
+            store.broadcast.status = "cancelled"
+
+    service, sent = make_service(monkeypatch, store, on_send=cancel_during_first_chunk)
+    asyncio.run(service._run(1))
+
+    # O lote em andamento é concluído e gravado; nada depois dele
+    assert sent == [1, 2]
+    assert store.recipients == [1, 2]
+    assert store.broadcast.status == "cancelled"
+
+def test_lock_is_renewed_while_a_chunk_is_in_flight(monkeypatch, fake_redis):
+    store = FakeStore(range(1, 2))
+    renewals = []
+    expire = fake_redis.expire
+
+    async def count_renewals(key, seconds):
+        renewals.append(key)
+        return await expire(key, seconds)
+
+    async def slow_send(count):
+        await asyncio.sleep(0.2)
+
+    fake_redis.expire = count_renewals
+    service, sent = make_service(monkeypatch, store, on_send=slow_send)
+    service.lock_ttl = 0.09
+
+    asyncio.run(service._run(1))
+
+    assert sent == [1]
+    assert len(renewals) >= 4
+
+def test_chunk_results_are_recorded_in_one_statement():
+    db = FakeSession()
+    broadcast = SimpleNamespace(sent=0, failed=0, last_customer_id=0)
+    results = [
+        {"broadcast_id": 1, "customer_id": i, "status": status, "message_id": None, "error": None}
+        for i, status in [(1, "sent"), (2, "failed"), (3, "sent")]
+    ]
+
+    crud_broadcast.record_progress(db, db_obj=broadcast, results=results, last_customer_id=3)
+
+    assert len(db.statements) == 1 and db.commits == 1
+    assert (broadcast.sent, broadcast.failed, broadcast.last_customer_id) == (2, 1, 3)
@@ -0,0 +1,70 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.services import catalog_index as catalog_index_module
+from app.services.ai_cache import response_cache
+from app.services.catalog_index import CatalogIndex
+
+def product(id, name, description, owner_id=1, price=10.0, is_active=True):
+    return SimpleNamespace(
+        id=id, owner_id=owner_id, name=name, description=description,
+        price=price, is_active=is_active
+    )
+
+def make_index():
+    index = CatalogIndex(refresh_interval=60)
+    index.loaded = True
+    index.upsert(product(1, "Camiseta Básica", "Camiseta de algodão, várias cores"))
+    index.upsert(product(2, "Tênis de Corrida", "Tênis leve para corrida e caminhada"))
+    index.upsert(product(3, "Boné Aba Reta", "Boné ajustável", owner_id=2))
+    return index
+
+def test_search_is_accent_insensitive_and_ranked():
+    index = make_index()
+    assert [p.id for p in index.search("quanto custa o tenis?")] == [2]
+    assert [p.id for p in index.search("CAMISETA de algodao")][0] == 1
+
+def test_search_per_seller():
+    index = make_index()
+    assert index.search("boné", owner_id=1) == []
+    assert [p.id for p in index.search("boné", owner_id=2)] == [3]
+
+def test_incremental_updates():
+    index = make_index()
+    index.upsert(product(2, "Tênis de Corrida", "Tênis leve", price=199.9, is_active=False))
+    assert index.search("tenis") == []
+    index.upsert(product(4, "Sandália", "Sandália de couro"))
+    assert [p.id for p in index.search("sandalia couro")] == [4]
+    index.remove(4)
+    assert index.search("sandalia") == []
+
+def test_lookup_is_sub_millisecond():
+    index = CatalogIndex(refresh_interval=60)
+    for i in range(2000):
+        index.upsert(product(i, f"Produto {i} modelo {i % 50}", f"Descrição do item {i} cor {i % 7}"))
+    started = time.perf_counter()
+    for _ in range(100):
+        index.search("produto modelo 7 cor azul")
+    assert (time.perf_counter() - started) / 100 < 0.001
+
+def test_local_changes_do_not_trigger_a_rebuild(fake_redis, monkeypatch):
+    loads = []
+    monkeypatch.setattr(
+        catalog_index_module, "_load_active_products", lambda: loads.append(1) or []
+    )
+    index = CatalogIndex(refresh_interval=60)
+
+    async def scenario():
+        await index.refresh(force=True)
+        index.upsert(product(1, "Camiseta Básica", "Camiseta de algodão"))
+        index.advance_version(await response_cache.bump_catalog_version())
+        await index.refresh()
+        # Alteração feita por outro processo: a versão local fica para trás
+        await response_cache.bump_catalog_version()
+        await index.refresh()
+
+    asyncio.run(scenario())
+
+    assert len(loads) == 2
+    assert index.version == "2"
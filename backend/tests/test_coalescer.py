@@ -0,0 +1,55 @@
+import asyncio
+
+from app.services.coalescer import MessageCoalescer
+
+def test_burst_is_flushed_once():
+    async def scenario():
+        coalescer = MessageCoalescer(window_seconds=0.05, max_delay_seconds=1)
+        flushed = []
+
+        for text in ["oi", "tudo bem?", "quanto custa a camiseta?"]:
+            coalescer.add("5511999999999", text, flushed.append)
+            await asyncio.sleep(0.01)
+
+        await asyncio.sleep(0.1)
+        return flushed, coalescer.stats()
+
+    flushed, stats = asyncio.run(scenario())
+    assert flushed == [["oi", "tudo bem?", "quanto custa a camiseta?"]]
+    assert stats["turns"] == 1
+    assert stats["merged"] == 2
+
+def test_customers_are_flushed_separately():
+    async def scenario():
+        coalescer = MessageCoalescer(window_seconds=0.02, max_delay_seconds=1)
+        flushed = []
+        coalescer.add("5511999999991", "oi", flushed.append)
+        coalescer.add("5511999999992", "olá", flushed.append)
+        await asyncio.sleep(0.05)
+        return flushed
+
+    assert sorted(asyncio.run(scenario())) == [["oi"], ["olá"]]
+
+def test_max_delay_caps_the_window():
+    async def scenario():
+        coalescer = MessageCoalescer(window_seconds=0.05, max_delay_seconds=0.08)
+        flushed = []
+        for i in range(6):
+            coalescer.add("5511999999999", i, flushed.append)
+            await asyncio.sleep(0.03)
+        await asyncio.sleep(0.1)
+        return flushed
+
+    flushed = asyncio.run(scenario())
+    assert len(flushed) >= 2
+    assert [i for batch in flushed for i in batch] == list(range(6))
+
+def test_flush_all():
+    async def scenario():
+        coalescer = MessageCoalescer(window_seconds=10, max_delay_seconds=10)
+        flushed = []
+        coalescer.add("5511999999999", "oi", flushed.append)
+        coalescer.flush_all()
+        return flushed, coalescer.stats()["pending_bursts"]
+
+    assert asyncio.run(scenario()) == ([["oi"]], 0)
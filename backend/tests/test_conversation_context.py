@@ -0,0 +1,63 @@
+import asyncio
+
+from app.services.conversation_context import ConversationContext, estimate_tokens
+
+def test_context_stays_within_budget_and_summarizes_incrementally(fake_redis):
+    summarized = []
+
+    async def summarize(summary, turns, max_tokens):
+        summarized.append((summary, [turn["user"] for turn in turns]))
+        return f"{summary} +{len(turns)}".strip()
+
+    context = ConversationContext(
+        max_turns=3, summary_every=2, token_budget=200,
+        summary_tokens=40, ttl_seconds=60, summarize=summarize
+    )
+
+    async def scenario():
+        sizes = []
+        for turn in range(10):
+            if await context.record(1, f"pergunta {turn} " + "x" * 400, f"resposta {turn}"):
+                await context.compact(1)
+            messages = await context.build(1)
+            sizes.append(sum(estimate_tokens(m["content"]) for m in messages))
+            # Toda rodada está no resumo ou entre as recentes
+            recent = [m for m in messages if m["role"] == "assistant"]
+            assert sum(len(turns) for _, turns in summarized) + len(recent) == turn + 1
+        return sizes, messages
+
+    sizes, messages = asyncio.run(scenario())
+
+    assert max(sizes) <= 200
+    # Cada resumo parte do anterior e recebe as rodadas mais antigas da janela
+    assert summarized == [
+        ("", ["pergunta 0 " + "x" * 400, "pergunta 1 " + "x" * 400]),
+        ("+2", ["pergunta 2 " + "x" * 400, "pergunta 3 " + "x" * 400]),
+        ("+2 +2", ["pergunta 4 " + "x" * 400, "pergunta 5 " + "x" * 400]),
+        ("+2 +2 +2", ["pergunta 6 " + "x" * 400, "pergunta 7 " + "x" * 400]),
+    ]
+    assert messages[0]["role"] == "system" and messages[0]["content"].endswith("+2 +2 +2 +2")
+    assert [m["content"] for m in messages if m["role"] == "assistant"] == [
+        "resposta 8", "resposta 9"
+    ]
+
+def test_turns_are_capped_when_summaries_keep_failing(fake_redis):
+    async def summarize(summary, turns, max_tokens):
+        raise RuntimeError("modelo indisponível")
+
+    context = ConversationContext(
+        max_turns=3, summary_every=2, token_budget=200,
+        summary_tokens=40, ttl_seconds=60, summarize=summarize
+    )
+
+    async def scenario():
+        for turn in range(100):
+            if await context.record(1, f"pergunta {turn}", f"resposta {turn}"):
+                await context.compact(1)
+        return await fake_redis.llen("conversation:1:turns"), await context.build(1)
+
+    length, messages = asyncio.run(scenario())
+
+    assert length == context.max_history == 20
+    assert messages[-1]["content"] == "resposta 99"
+    assert context.stats()["errors"] > 0
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.crud.crud_customer import customer as crud_customer
+
+DEFAULTS = {"name": "Cliente WhatsApp"}
+
+class FakeQuery:
+    def __init__(self, session):
+        self.session = session
+        self.numbers = []
+
+    def filter(self, criterion):
+        self.numbers = criterion.right.value
+        return self
+
+    def all(self):
+        return [
+            self.session.table[number]
+            for number in self.numbers
+            if number in self.session.table
+        ]
+
+class FakeSession:
+    """
+    Tabela de clientes em memória; `racing` são números inseridos por outra
+    requisição entre o SELECT e o INSERT.
+    """
+    def __init__(self, existing, racing=()):
+        self.table = {}
+        self.racing = list(racing)
+        self.queries = 0
+        self.inserts = []
+        self.commits = 0
+        for number in existing:
+            self._add(number)
+
+    def query(self, *columns):
+        self.queries += 1
+        return FakeQuery(self)
+
+    def execute(self, statement):
+        for number in self.racing:
+            self._add(number)
+        params = statement.compile(dialect=postgresql.dialect()).params
+        numbers = [
+            value for key, value in params.items() if key.startswith("whatsapp_number")
+        ]
+        self.inserts.append(numbers)
+        inserted = [self._add(n) for n in numbers if n not in self.table]
+        return SimpleNamespace(all=lambda: inserted)
+
+    def commit(self):
+        self.commits += 1
+
+    def _add(self, number):
+        row = SimpleNamespace(id=len(self.table) + 1, whatsapp_number=number, name="Cliente")
+        self.table[number] = row
+        return row
+
+def test_existing_and_new_senders_in_one_select_and_one_insert():
+    db = FakeSession(existing=["+5511999990001"])
+    numbers = ["5511999990001", "+55 11 99999-0002", "5511999990002", "5511999990003"]
+
+    customers = crud_customer.get_or_create_many(
+        db, whatsapp_numbers=numbers, defaults=DEFAULTS
+    )
+
+    assert set(customers) == set(numbers)
+    assert customers["5511999990001"].id == 1
+    # Duplicatas (mesmo número em formatos diferentes) viram um único cliente
+    assert customers["+55 11 99999-0002"] is customers["5511999990002"]
+    assert db.queries == 1
+    assert db.inserts == [["+5511999990002", "+5511999990003"]]
+    assert db.commits == 1
+
+def test_all_known_senders_skip_the_insert():
+    db = FakeSession(existing=["+5511999990001", "+5511999990002"])
+
+    customers = crud_customer.get_or_create_many(
+        db, whatsapp_numbers=["5511999990001", "5511999990002"], defaults=DEFAULTS
+    )
+
+    assert [c.id for c in customers.values()] == [1, 2]
+    assert db.queries == 1 and db.inserts == [] and db.commits == 0
+
+def test_senders_inserted_concurrently_are_read_back():
+    db = FakeSession(existing=[], racing=["+5511999990001"])
+
+    customers = crud_customer.get_or_create_many(
+        db, whatsapp_numbers=["5511999990001", "5511999990002"], defaults=DEFAULTS
+    )
+
+    assert customers["5511999990001"].id == 1
+    assert customers["5511999990002"].id == 2
+    # Uma segunda consulta só para o número que conflitou
+    assert db.queries == 2
@@ -0,0 +1,34 @@
+import asyncio
+
+from app.services.customer_cache import CustomerCache, CustomerRef
+
+def make_cache(monkeypatch, loads):
+    cache = CustomerCache(size=2, ttl_seconds=60, redis_ttl_seconds=300)
+
+    def load(numbers, defaults):
+        loads.append(numbers)
+        return [CustomerRef(id=int(n[-3:]), whatsapp_number=n) for n in numbers]
+
+    monkeypatch.setattr(cache, "_load", load)
+    return cache
+
+def test_hot_numbers_skip_the_database(monkeypatch, fake_redis):
+    loads = []
+    cache = make_cache(monkeypatch, loads)
+    other_process = make_cache(monkeypatch, loads)
+
+    async def scenario():
+        first = await cache.resolve(["5511999999101", "+55 11 99999-9101"], {})
+        again = await cache.resolve(["5511999999101"], {})
+        shared = await other_process.resolve(["5511999999101"], {})
+        await cache.invalidate("5511999999101")
+        reloaded = await other_process.resolve(["5511999999102"], {})
+        after_invalidate = await cache.resolve(["5511999999101"], {})
+        return first, again, shared, reloaded, after_invalidate
+
+    first, again, shared, reloaded, after_invalidate = asyncio.run(scenario())
+
+    assert first["5511999999101"].id == 101 and first["+55 11 99999-9101"].id == 101
+    assert again["5511999999101"] == shared["5511999999101"] == first["5511999999101"]
+    assert loads == [["+5511999999101"], ["+5511999999102"], ["+5511999999101"]]
+    assert cache.stats()["local_hits"] == 1 and other_process.stats()["redis_hits"] == 1
@@ -0,0 +1,32 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.customer import Customer, CustomerCreate, normalize_whatsapp_number
+
+def test_numbers_are_normalized_to_e164():
+    assert normalize_whatsapp_number("5511999999999") == "+5511999999999"
+    assert normalize_whatsapp_number("+55 (11) 99999-9999") == "+5511999999999"
+    assert normalize_whatsapp_number("0055 11 99999 9999") == "+5511999999999"
+
+    customer = CustomerCreate(whatsapp_number="55 11 99999-9999", name="Cliente WhatsApp")
+    assert customer.whatsapp_number == "+5511999999999"
+    with pytest.raises(ValidationError):
+        CustomerCreate(whatsapp_number="12345", name="Cliente WhatsApp")
+
+def test_customer_with_history_serializes():
+    history = [
+        {"type": "message_received", "content": "oi", "timestamp": "2026-10-17T12:00:00"},
+        {"type": "message_sent", "content": "Olá!", "source": "local", "label": "greeting"}
+    ]
+    row = SimpleNamespace(
+        id=1, whatsapp_number="+5511999999999", name="Cliente WhatsApp", email=None,
+        interaction_history=history, last_interaction=None,
+        created_at=datetime(2026, 10, 17, 12, 0)
+    )
+
+    customer = Customer.model_validate(row)
+
+    assert customer.model_dump(mode="json")["interaction_history"] == history
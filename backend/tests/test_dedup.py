@@ -0,0 +1,82 @@
+import asyncio
+import copy
+
+import pytest
+
+from app.services.dedup import MessageDeduplicator
+
+def test_redelivered_message_is_dropped(fake_redis):
+    async def scenario():
+        deduplicator = MessageDeduplicator(ttl_seconds=60, local_size=10)
+        first = await deduplicator.is_duplicate("wamid.1")
+        second = await deduplicator.is_duplicate("wamid.1")
+        return first, second, deduplicator.stats()
+
+    first, second, stats = asyncio.run(scenario())
+    assert first is False
+    assert second is True
+    assert stats["local_hits"] == 1
+    assert stats["misses"] == 1
+
+def test_duplicate_seen_by_another_process(fake_redis):
+    async def scenario():
+        worker_a = MessageDeduplicator(ttl_seconds=60, local_size=10)
+        worker_b = MessageDeduplicator(ttl_seconds=60, local_size=10)
+        await worker_a.is_duplicate("wamid.2")
+        return await worker_b.is_duplicate("wamid.2"), worker_b.stats()
+
+    duplicate, stats = asyncio.run(scenario())
+    assert duplicate is True
+    assert stats["redis_hits"] == 1
+
+def test_forget_allows_reprocessing(fake_redis):
+    async def scenario():
+        deduplicator = MessageDeduplicator(ttl_seconds=60, local_size=10)
+        await deduplicator.is_duplicate("wamid.3")
+        await deduplicator.forget("wamid.3")
+        return await deduplicator.is_duplicate("wamid.3")
+
+    assert asyncio.run(scenario()) is False
+
+def test_local_cache_is_bounded(fake_redis):
+    async def scenario():
+        deduplicator = MessageDeduplicator(ttl_seconds=60, local_size=2)
+        for i in range(5):
+            await deduplicator.is_duplicate(f"wamid.{i}")
+        return deduplicator.stats()["local_size"]
+
+    assert asyncio.run(scenario()) == 2
+
+def test_failed_inline_webhook_releases_its_messages(fake_redis, monkeypatch):
+    from fastapi import HTTPException
+
+    from app.routers import whatsapp
+
+    payload = {"entry": [{"changes": [{"value": {"messages": [
+        {"id": "wamid.9", "from": "5511999999999", "text": {"body": "oi"}}
+    ]}}]}]}
+    processed = []
+
+    async def process_entries(entries):
+        processed.extend(
+            message["id"]
+            for change in entries[0]["changes"]
+            for message in change["value"]["messages"]
+        )
+        raise RuntimeError("banco indisponível")
+
+    class FakeRequest:
+        async def json(self):
+            return copy.deepcopy(payload)
+
+    monkeypatch.setattr(whatsapp.settings, "WEBHOOK_MODE", "inline")
+    monkeypatch.setattr(whatsapp, "process_entries", process_entries)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                await whatsapp.whatsapp_webhook(FakeRequest())
+
+    asyncio.run(scenario())
+    # A reentrega da Meta é processada de novo, não descartada
+    assert processed == ["wamid.9", "wamid.9"]
@@ -0,0 +1,76 @@
+import asyncio
+
+from app.services.dispatcher import ConversationDispatcher
+
+def test_same_customer_runs_in_order():
+    async def scenario():
+        dispatcher = ConversationDispatcher(max_concurrency=4)
+        processed = []
+
+        async def job(value, delay):
+            await asyncio.sleep(delay)
+            processed.append(value)
+
+        tasks = [
+            dispatcher.submit("5511999999999", lambda v=v, d=d: job(v, d))
+            for v, d in [(1, 0.03), (2, 0.01), (3, 0.0)]
+        ]
+        await asyncio.gather(*tasks)
+        return processed
+
+    assert asyncio.run(scenario()) == [1, 2, 3]
+
+def test_different_customers_run_concurrently():
+    async def scenario():
+        dispatcher = ConversationDispatcher(max_concurrency=10)
+        peak = 0
+
+        async def job():
+            nonlocal peak
+            peak = max(peak, dispatcher.in_flight)
+            await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[
+            dispatcher.submit(f"55119999900{i:02d}", job) for i in range(10)
+        ])
+        return peak, dispatcher.stats()
+
+    peak, stats = asyncio.run(scenario())
+    assert peak == 10
+    assert stats["completed"] == 10
+    assert stats["active_conversations"] == 0
+
+def test_concurrency_limit_is_respected():
+    async def scenario():
+        dispatcher = ConversationDispatcher(max_concurrency=3)
+        peak = 0
+
+        async def job():
+            nonlocal peak
+            peak = max(peak, dispatcher.in_flight)
+            await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[
+            dispatcher.submit(f"55119999900{i:02d}", job) for i in range(12)
+        ])
+        return peak
+
+    assert asyncio.run(scenario()) == 3
+
+def test_failure_does_not_block_following_messages():
+    async def scenario():
+        dispatcher = ConversationDispatcher(max_concurrency=2)
+        processed = []
+
+        async def failing():
+            raise RuntimeError("falha")
+
+        async def job():
+            processed.append("ok")
+
+        first = dispatcher.submit("5511999999999", failing)
+        second = dispatcher.submit("5511999999999", job)
+        await asyncio.gather(first, second, return_exceptions=True)
+        return processed
+
+    assert asyncio.run(scenario()) == ["ok"]
@@ -0,0 +1,65 @@
+from app.services.intent_classifier import (
+    IntentClassifier,
+    IntentModel,
+    KeywordMatcher,
+    SEED_EXAMPLES,
+    training_pairs
+)
+
+def test_keyword_matcher_finds_whole_words():
+    matcher = KeywordMatcher({"greeting": ["oi", "bom dia"], "thanks": ["valeu"]})
+    assert matcher.labels("bom dia valeu") == {"greeting", "thanks"}
+    assert matcher.labels("oitava") == set()
+
+def test_short_messages_are_answered_locally():
+    classifier = IntentClassifier(model_path="", threshold=0.85)
+    assert classifier.classify("Olá, tudo bem?") == ("greeting", "keywords")
+    assert classifier.classify("Muito obrigada!!") == ("thanks", "keywords")
+    assert classifier.classify("Bom dia, quero ver o catálogo") == ("catalog", "keywords")
+
+def test_questions_go_to_the_llm():
+    classifier = IntentClassifier(model_path="", threshold=0.85)
+    classifier.model = IntentModel().fit(
+        [text for text, _ in SEED_EXAMPLES],
+        [label for _, label in SEED_EXAMPLES]
+    )
+    for message in [
+        "oi, qual o prazo de entrega?",
+        "obrigado, e o frete pra Recife?",
+        "quanto custa a camiseta preta?"
+    ]:
+        assert classifier.classify(message) is None
+    assert classifier.stats()["passed_to_llm"] == 3
+
+def test_training_pairs_use_the_reply_source():
+    history = [
+        {"type": "message_received", "content": "boa tardee"},
+        {"type": "message_sent", "source": "local", "label": "greeting"},
+        {"type": "message_received", "content": "boa tarde"},
+        {"type": "message_sent", "source": "local", "label": "greeting"},
+        {"type": "message_received", "content": "tem no azul?"},
+        {"type": "message_sent", "source": "llm"},
+        {"type": "message_received", "content": "valeu"},
+        {"type": "message_sent"}
+    ]
+    # "boa tardee" só tem o rótulo previsto pelo modelo: fica de fora
+    assert list(training_pairs([history])) == [
+        ("boa tarde", "greeting"),
+        ("tem no azul?", "other"),
+        ("valeu", "thanks")
+    ]
+
+def test_training_pairs_label_the_whole_coalesced_turn():
+    history = [
+        {"type": "message_received", "content": "oi"},
+        {"type": "message_received", "content": "boa tarde"},
+        {"type": "message_sent", "source": "local", "label": "greeting"},
+        {"type": "message_received", "content": "vcs tem"},
+        {"type": "message_received", "content": "camiseta azul M?"},
+        {"type": "message_sent", "source": "fallback"},
+        {"type": "message_sent", "source": "llm"}
+    ]
+    assert list(training_pairs([history])) == [
+        ("oi\nboa tarde", "greeting"),
+        ("vcs tem\ncamiseta azul M?", "other")
+    ]
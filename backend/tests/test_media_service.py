@@ -0,0 +1,95 @@
+import asyncio
+
+import httpx
+
+from app.services import media_service as media
+from app.services.media_service import MediaService
+
+def make_service(monkeypatch, images):
+    uploads = []
+
+    async def upload_media(content, mime_type, filename=None):
+        await asyncio.sleep(0.01)
+        uploads.append(content)
+        return f"media-{len(uploads)}"
+
+    monkeypatch.setattr(media.whatsapp_service, "upload_media", upload_media)
+
+    service = MediaService()
+    service._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(
+                200,
+                content=images[str(request.url)],
+                headers={"Content-Type": "image/png"}
+            )
+        )
+    )
+    return service, uploads
+
+def test_concurrent_sends_upload_once(monkeypatch, fake_redis):
+    service, uploads = make_service(monkeypatch, {"https://cdn/a.png": b"a"})
+
+    async def scenario():
+        ids = await asyncio.gather(*[
+            service.get_media_id("https://cdn/a.png") for _ in range(5)
+        ])
+        again = await service.get_media_id("https://cdn/a.png")
+        await service.close()
+        return ids, again
+
+    ids, again = asyncio.run(scenario())
+    assert set(ids) == {"media-1"}
+    assert again == "media-1"
+    assert len(uploads) == 1
+    assert service.stats()["hits"] == 1
+
+def test_same_content_under_new_url_reuses_media(monkeypatch, fake_redis):
+    images = {"https://cdn/a.png": b"a", "https://cdn/b.png": b"a"}
+    service, uploads = make_service(monkeypatch, images)
+
+    async def scenario():
+        first = await service.get_media_id("https://cdn/a.png")
+        await service.invalidate("https://cdn/a.png")
+        second = await service.get_media_id("https://cdn/b.png")
+        await service.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert len(uploads) == 1
+
+def test_local_copy_is_bounded(monkeypatch, fake_redis):
+    images = {f"https://cdn/{i}.png": str(i).encode() for i in range(5)}
+    service, uploads = make_service(monkeypatch, images)
+    service.local_size = 4
+
+    async def scenario():
+        for url in images:
+            await service.get_media_id(url)
+        await service.close()
+
+    asyncio.run(scenario())
+    # Duas chaves por imagem (URL e conteúdo); só as mais recentes ficam
+    assert len(service._local) == 4
+    assert service._url_key("https://cdn/4.png") in service._local
+
+def test_second_send_reuses_media_id(monkeypatch, fake_redis):
+    service, uploads = make_service(monkeypatch, {"https://cdn/a.png": b"a"})
+    sent = []
+
+    async def send_image(phone_number, image_url=None, caption=None, media_id=None):
+        sent.append(media_id)
+        return {"messages": [{"id": f"wamid.{len(sent)}"}]}
+
+    monkeypatch.setattr(media.whatsapp_service, "send_image", send_image)
+
+    async def scenario():
+        await service.send_image("5511999999999", "https://cdn/a.png", caption="A")
+        await service.send_image("5511888888888", "https://cdn/a.png", caption="A")
+        await service.close()
+
+    asyncio.run(scenario())
+    assert sent == ["media-1", "media-1"]
+    assert len(uploads) == 1
+    assert service.stats()["hits"] == 1
@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy.exc import OperationalError
+
+from app.crud.crud_message import interaction_to_row, row_to_interaction
+from app.services.message_log import MessageLog
+
+SENT = {
+    "type": "message_sent",
+    "content": "Temos sim!",
+    "message_id": "wamid.1",
+    "intent": "purchase_intent",
+    "source": "llm",
+    "products": [{"product_name": "camiseta", "quantity": 1, "specific_info": []}],
+    "timestamp": "2026-10-17T12:00:00"
+}
+
+def test_interaction_round_trips_through_message_row():
+    row = interaction_to_row(7, SENT)
+
+    assert row["direction"] == "outgoing" and row["processed_by_ai"]
+    assert row["ai_response"]["intent"] == "purchase_intent"
+    assert row_to_interaction(SimpleNamespace(**row)) == SENT
+
+def test_buffer_writes_in_order_and_in_batches(monkeypatch):
+    batches = []
+    log = MessageLog(max_size=3, flush_interval=0.01)
+    monkeypatch.setattr(log, "_write", lambda items: batches.append(items) or len(items))
+
+    async def scenario():
+        for i in range(7):
+            log.add(i % 2, {"type": "message_received", "content": str(i)})
+        await log.flush()
+
+    asyncio.run(scenario())
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [item[1]["content"] for batch in batches for item in batch] == [str(i) for i in range(7)]
+    assert log.stats()["written"] == 7
+
+def test_rejected_item_is_isolated_and_dropped(monkeypatch):
+    written = []
+    log = MessageLog(max_size=8, flush_interval=0.01)
+
+    def write(items):
+        if any(item[1]["content"] == "bad" for item in items):
+            raise ValueError("linha inválida")
+        written.extend(items)
+        return len(items)
+
+    monkeypatch.setattr(log, "_write", write)
+
+    async def scenario():
+        for content in ["0", "1", "bad", "3", "4"]:
+            log.add(1, {"type": "message_received", "content": content})
+        await log.flush()
+
+    asyncio.run(scenario())
+
+    assert [item[1]["content"] for item in written] == ["0", "1", "3", "4"]
+    stats = log.stats()
+    assert stats["written"] == 4 and stats["dropped"] == 1 and stats["buffered"] == 0
+
+def test_database_outage_is_retried_with_backoff(monkeypatch):
+    written = []
+    outages = [OperationalError("INSERT", {}, Exception("conexão recusada"))] * 2
+    log = MessageLog(max_size=8, flush_interval=0.01)
+
+    def write(items):
+        if outages:
+            raise outages.pop()
+        written.extend(items)
+        return len(items)
+
+    monkeypatch.setattr(log, "_write", write)
+
+    async def scenario():
+        for i in range(3):
+            log.add(1, {"type": "message_received", "content": str(i)})
+        await log.flush()
+        buffered = log.stats()["buffered"]
+        # Primeira nova tentativa em 0,02s, a segunda em 0,04s
+        await asyncio.sleep(0.2)
+        return buffered
+
+    buffered = asyncio.run(scenario())
+
+    assert buffered == 3
+    assert [item[1]["content"] for item in written] == ["0", "1", "2"]
+    assert log.stats()["dropped"] == 0 and log.stats()["errors"] == 2
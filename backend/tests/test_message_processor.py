@@ -0,0 +1,160 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.services import message_processor
+
+CATALOG = [SimpleNamespace(id=1, name="Camiseta", price=49.9, image_url=None)]
+
+def test_turn_sends_reply_and_catalog_in_one_message(monkeypatch):
+    sent = []
+    logged = []
+
+    async def process_message_with_ai(text, **kwargs):
+        await asyncio.sleep(0.1)
+        return {"should_respond": True, "response": "Temos sim!", "intent": "purchase_intent"}
+
+    def load_catalog_products():
+        time.sleep(0.1)
+        return CATALOG
+
+    async def send_message(phone_number, message):
+        sent.append((phone_number, message))
+        return {"messages": [{"id": "wamid.1"}]}
+
+    monkeypatch.setattr(message_processor.ai_service, "process_message_with_ai", process_message_with_ai)
+    monkeypatch.setattr(message_processor.whatsapp_service, "send_message", send_message)
+    monkeypatch.setattr(message_processor, "load_catalog_products", load_catalog_products)
+    monkeypatch.setattr(message_processor, "log_interaction", lambda *args: logged.append(args))
+
+    started = time.monotonic()
+    asyncio.run(message_processor.respond_to_turn(
+        SimpleNamespace(id=1), "5511999999999", "quanto custa?", started
+    ))
+    elapsed = time.monotonic() - started
+
+    # IA e catálogo correm em paralelo: ~0,1s e não ~0,2s
+    assert elapsed < 0.18
+    assert sent == [
+        ("5511999999999", "Temos sim!\n\n" + message_processor.format_catalog(CATALOG))
+    ]
+    assert logged[0][1]["message_id"] == "wamid.1"
+
+def test_slow_reply_gets_holding_message_and_follow_up(monkeypatch):
+    sent = []
+
+    async def process_message_with_ai(text, **kwargs):
+        await asyncio.sleep(0.2)
+        return {"should_respond": True, "response": "Resposta completa", "intent": "general"}
+
+    async def send_message(phone_number, message):
+        sent.append(message)
+        return {"messages": [{"id": f"wamid.{len(sent)}"}]}
+
+    monkeypatch.setattr(message_processor.ai_service, "process_message_with_ai", process_message_with_ai)
+    monkeypatch.setattr(message_processor.whatsapp_service, "send_message", send_message)
+    monkeypatch.setattr(message_processor, "load_catalog_products", lambda: [])
+    monkeypatch.setattr(message_processor, "log_interaction", lambda *args: None)
+    monkeypatch.setattr(message_processor.settings, "AI_REPLY_SLA_SECONDS", 0.05)
+    monkeypatch.setattr(message_processor, "MIN_AI_BUDGET_SECONDS", 0.05)
+
+    async def scenario():
+        started = time.monotonic()
+        await message_processor.respond_to_turn(
+            SimpleNamespace(id=1), "5511999999999", "pergunta difícil", started
+        )
+        answered_after = time.monotonic() - started
+        await message_processor.dispatcher.drain()
+        return answered_after
+
+    answered_after = asyncio.run(scenario())
+    assert answered_after < 0.15
+    assert sent == [message_processor.ai_service.holding_reply()["response"], "Resposta completa"]
+
+def test_slow_customer_lookup_does_not_reorder_messages(monkeypatch):
+    handled = []
+
+    async def resolve_customers(messages):
+        # A primeira entrega vai ao banco; a segunda acerta o cache local
+        await asyncio.sleep(0.1 if messages[0]["id"] == "wamid.1" else 0)
+        return {m["from"]: SimpleNamespace(id=1) for m in messages}
+
+    async def handle_message(message, customer=None, replied=None):
+        handled.append(message["id"])
+
+    monkeypatch.setattr(message_processor, "resolve_customers", resolve_customers)
+    monkeypatch.setattr(message_processor, "handle_message", handle_message)
+
+    def entry(message_id):
+        return {"changes": [{"value": {"messages": [
+            {"id": message_id, "from": "5511999999999", "text": {"body": "oi"}}
+        ]}}]}
+
+    async def scenario():
+        await asyncio.gather(
+            message_processor.process_entries([entry("wamid.1")]),
+            message_processor.process_entries([entry("wamid.2")])
+        )
+
+    asyncio.run(scenario())
+    assert handled == ["wamid.1", "wamid.2"]
+
+def test_queue_entry_waits_for_its_coalesced_turn(monkeypatch):
+    answered = []
+
+    async def resolve_customers(messages):
+        return {m["from"]: SimpleNamespace(id=1) for m in messages}
+
+    async def respond_to_turn(customer, whatsapp_number, message_text, received_at=None):
+        await asyncio.sleep(0.05)
+        answered.append(message_text)
+
+    monkeypatch.setattr(message_processor, "resolve_customers", resolve_customers)
+    monkeypatch.setattr(message_processor, "respond_to_turn", respond_to_turn)
+    monkeypatch.setattr(message_processor, "log_interaction", lambda *args: None)
+    monkeypatch.setattr(message_processor.coalescer, "window_seconds", 0.05)
+    monkeypatch.setattr(message_processor.coalescer, "max_delay_seconds", 0.2)
+
+    entry = {"changes": [{"value": {"messages": [
+        {"id": "wamid.1", "from": "5511999999999", "text": {"body": "oi"}},
+        {"id": "wamid.2", "from": "5511999999999", "text": {"body": "tem camiseta?"}}
+    ]}}]}
+
+    asyncio.run(message_processor.process_entries([entry], wait_for_replies=True))
+    # A rodada agrupada já foi respondida quando a entrada pode ser confirmada
+    assert answered == ["oi\ntem camiseta?"]
+
+def test_catalog_photos_are_sent_through_the_media_cache(monkeypatch):
+    sent = []
+    images = []
+    products = [
+        SimpleNamespace(id=1, name="Camiseta", price=49.9, image_url="https://cdn/camiseta.png"),
+        SimpleNamespace(id=2, name="Boné", price=29.9, image_url=None)
+    ]
+
+    async def send_message(phone_number, message):
+        sent.append(message)
+        return {"messages": [{"id": "wamid.1"}]}
+
+    async def send_image(phone_number, image_url, caption=None):
+        images.append((image_url, caption))
+        return {"messages": [{"id": "wamid.2"}]}
+
+    async def catalog():
+        return products
+
+    monkeypatch.setattr(message_processor.whatsapp_service, "send_message", send_message)
+    monkeypatch.setattr(message_processor.media_service, "send_image", send_image)
+    monkeypatch.setattr(message_processor, "log_interaction", lambda *args: None)
+
+    async def scenario():
+        await message_processor.deliver_reply(
+            SimpleNamespace(id=1), "5511999999999",
+            {"should_respond": True, "response": "Temos sim!", "intent": "purchase_intent"},
+            asyncio.ensure_future(catalog())
+        )
+
+    asyncio.run(scenario())
+
+    assert len(sent) == 1
+    assert images == [("https://cdn/camiseta.png", "Camiseta: R$ 49.90")]
@@ -0,0 +1,44 @@
+import asyncio
+
+from app.core.config import settings
+from app.services.message_queue import WebhookQueue
+
+def entry(i):
+    return {"id": str(i), "changes": [{"value": {"messages": []}}]}
+
+def test_entries_stay_pending_until_acked(fake_redis):
+    queue = WebhookQueue()
+
+    async def scenario():
+        before = await queue.depth()
+        await queue.ensure_group()
+        await queue.ensure_group()
+        await queue.enqueue([entry(1), entry(2)])
+        batch = await queue.read("worker-1", count=10)
+        pending = await queue.depth()
+        await queue.ack(batch[0][0])
+        return before, batch, pending, await queue.depth(), await queue.read("worker-1", count=10)
+
+    before, batch, pending, after_ack, empty = asyncio.run(scenario())
+
+    assert before == 0
+    assert [item for _, item in batch] == [entry(1), entry(2)]
+    assert pending == 2 and after_ack == 1
+    assert empty == []
+
+def test_stale_entries_are_claimed_by_another_worker(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_CLAIM_IDLE_MS", 0)
+    queue = WebhookQueue()
+
+    async def scenario():
+        await queue.ensure_group()
+        await queue.enqueue([entry(1)])
+        await queue.read("worker-1", count=10)
+        claimed = await queue.claim_stale("worker-2", count=10)
+        await queue.ack(*[stream_id for stream_id, _ in claimed])
+        return claimed, await queue.depth(), await queue.claim_stale("worker-2", count=10)
+
+    claimed, depth, again = asyncio.run(scenario())
+
+    assert [item for _, item in claimed] == [entry(1)]
+    assert depth == 0 and again == []
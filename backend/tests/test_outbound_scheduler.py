@@ -0,0 +1,169 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.services.outbound_scheduler import (
+    AmbiguousDeliveryError,
+    OutboundScheduler,
+    TokenBucket,
+    PRIORITY_BULK,
+    PRIORITY_CONVERSATION
+)
+
+def make_scheduler(**overrides):
+    options = {
+        "rate": 1000,
+        "burst": 1000,
+        "max_retries": 3,
+        "backoff_base": 0.01,
+        "backoff_max": 0.05
+    }
+    options.update(overrides)
+    return OutboundScheduler(**options)
+
+def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=10, capacity=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[0] == 0 and waits[1] == 0
+    assert 0.09 < waits[2] < 0.11
+    assert 0.19 < waits[3] < 0.21
+
+def test_throughput_stays_at_the_limit():
+    async def scenario():
+        scheduler = make_scheduler(rate=50, burst=1)
+
+        async def send():
+            return httpx.Response(200, json={})
+
+        started = time.monotonic()
+        await asyncio.gather(*[scheduler.submit("123", send) for _ in range(26)])
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(scenario())
+    # 25 envios após a primeira ficha a 50/s levam cerca de 0,5s
+    assert 0.4 < elapsed < 0.8
+
+def test_retries_429_honouring_retry_after():
+    async def scenario():
+        scheduler = make_scheduler(backoff_max=1)
+        responses = [
+            httpx.Response(429, headers={"Retry-After": "0.1"}),
+            httpx.Response(200, json={"messages": [{"id": "wamid.1"}]})
+        ]
+        calls = []
+
+        async def send():
+            calls.append(time.monotonic())
+            return responses.pop(0)
+
+        response = await scheduler.submit("123", send)
+        return response, calls, scheduler.stats()["123"]
+
+    response, calls, stats = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert calls[1] - calls[0] >= 0.1
+    assert stats["throttled"] == 1
+    assert stats["retried"] == 1
+    assert stats["sent"] == 1
+
+def test_gives_up_after_max_retries():
+    async def scenario():
+        scheduler = make_scheduler(max_retries=2)
+        attempts = 0
+
+        async def send():
+            nonlocal attempts
+            attempts += 1
+            return httpx.Response(429)
+
+        response = await scheduler.submit("123", send)
+        return response, attempts, scheduler.stats()["123"]
+
+    response, attempts, stats = asyncio.run(scenario())
+    assert response.status_code == 429
+    assert attempts == 3
+    assert stats["failed"] == 1
+
+def test_client_errors_are_not_retried():
+    async def scenario():
+        scheduler = make_scheduler()
+        attempts = 0
+
+        async def send():
+            nonlocal attempts
+            attempts += 1
+            return httpx.Response(400)
+
+        response = await scheduler.submit("123", send)
+        return response, attempts
+
+    response, attempts = asyncio.run(scenario())
+    assert response.status_code == 400
+    assert attempts == 1
+
+def test_conversation_replies_go_before_bulk_sends():
+    async def scenario():
+        scheduler = make_scheduler(rate=100, burst=1)
+        order = []
+
+        def sender(label):
+            async def send():
+                order.append(label)
+                return httpx.Response(200, json={})
+            return send
+
+        bulk = [
+            asyncio.create_task(
+                scheduler.submit("123", sender(f"bulk-{i}"), priority=PRIORITY_BULK)
+            )
+            for i in range(5)
+        ]
+        await asyncio.sleep(0)
+        reply = asyncio.create_task(
+            scheduler.submit("123", sender("reply"), priority=PRIORITY_CONVERSATION)
+        )
+        await asyncio.gather(reply, *bulk)
+        return order
+
+    order = asyncio.run(scenario())
+    assert order.index("reply") <= 2
+
+def test_connection_failures_are_retried():
+    async def scenario():
+        scheduler = make_scheduler()
+        errors = [httpx.ConnectError("recusada"), httpx.PoolTimeout("sem conexão livre")]
+
+        async def send():
+            if errors:
+                raise errors.pop(0)
+            return httpx.Response(200, json={})
+
+        response = await scheduler.submit("123", send)
+        return response, scheduler.stats()["123"]
+
+    response, stats = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert stats["retried"] == 2 and stats["sent"] == 1
+
+@pytest.mark.parametrize("outcome", [httpx.ReadTimeout("sem resposta"), httpx.Response(502)])
+def test_possibly_accepted_sends_are_not_repeated(outcome):
+    async def scenario():
+        scheduler = make_scheduler()
+        attempts = 0
+
+        async def send():
+            nonlocal attempts
+            attempts += 1
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        with pytest.raises(AmbiguousDeliveryError):
+            await scheduler.submit("123", send)
+        return attempts, scheduler.stats()["123"]
+
+    attempts, stats = asyncio.run(scenario())
+    assert attempts == 1
+    assert stats["ambiguous"] == 1 and stats["retried"] == 0
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.core.pagination import cursor_param, encode_cursor, parse_cursor, set_next_cursor
+
+def test_cursor_round_trips_even_with_unescaped_timezone():
+    created_at = datetime(2026, 10, 17, 12, 30, 5, 123456, tzinfo=timezone(timedelta(hours=-3)))
+    cursor = encode_cursor(created_at, 42)
+
+    assert parse_cursor(cursor) == (created_at, 42)
+    assert parse_cursor(cursor.replace("+", " ")) == parse_cursor(cursor)
+    assert parse_cursor("2026-10-17T12:30:05,7") == (datetime(2026, 10, 17, 12, 30, 5), 7)
+
+    with pytest.raises(HTTPException) as error:
+        cursor_param("ontem,abc")
+    assert error.value.status_code == 422
+
+def test_next_cursor_only_when_page_is_full():
+    items = [
+        SimpleNamespace(id=i, created_at=datetime(2026, 10, i), last_interaction=datetime(2026, 9, i))
+        for i in (3, 2, 1)
+    ]
+    full, partial = Response(), Response()
+
+    set_next_cursor(full, items, limit=3, field="last_interaction")
+    set_next_cursor(partial, items, limit=4)
+
+    assert parse_cursor(full.headers["X-Next-Cursor"]) == (datetime(2026, 9, 1), 1)
+    assert "X-Next-Cursor" not in partial.headers
+
+def test_active_customers_route_is_not_captured_by_customer_id():
+    from starlette.routing import Match
+
+    from main import app
+
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/customers/active"}
+    route = next(r for r in app.routes if r.matches(scope)[0] == Match.FULL)
+    assert route.name == "get_active_customers"
@@ -0,0 +1,29 @@
+import asyncio
+from datetime import datetime, timezone
+
+from app.services.status_buffer import StatusBuffer, parse_status
+
+def test_bad_timestamp_keeps_the_status_without_it():
+    for timestamp in ["abc", "99999999999999999999", ["1"]]:
+        row = parse_status({"id": "wamid.1", "status": "read", "timestamp": timestamp})
+        assert row["status"] == "read" and row["timestamp"] is None
+
+    row = parse_status({"id": "wamid.1", "status": "read", "timestamp": "1792238400"})
+    assert row["timestamp"] == datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+def test_malformed_status_does_not_block_the_payload(monkeypatch):
+    written = []
+    buffer = StatusBuffer(max_size=10, flush_interval=0.01)
+    monkeypatch.setattr(buffer, "_write", lambda rows: written.extend(rows) or len(rows))
+
+    async def scenario():
+        buffer.add([
+            {"id": "wamid.1", "status": "delivered", "timestamp": "1e400"},
+            {"id": "wamid.2", "status": "failed", "errors": ["sem detalhes"]},
+            {"id": "wamid.3", "status": "read", "timestamp": "1792238400"}
+        ])
+        await buffer.flush()
+
+    asyncio.run(scenario())
+
+    assert [row["message_id"] for row in written] == ["wamid.1", "wamid.3"]
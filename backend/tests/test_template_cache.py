@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.services.template_cache import TemplateCache, TemplateError
+
+TEMPLATES = [{
+    "name": "pedido_enviado",
+    "language": "pt_BR",
+    "status": "APPROVED",
+    "components": [
+        {"type": "HEADER", "format": "IMAGE"},
+        {"type": "BODY", "text": "Olá {{1}}, seu pedido {{2}} foi enviado."},
+        {"type": "BUTTONS", "buttons": [
+            {"type": "URL", "url": "https://loja/rastreio/{{1}}"}
+        ]}
+    ]
+}]
+
+def make_cache(ttl=60, stale_ttl=120):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return TEMPLATES
+
+    return TemplateCache(fetch, ttl=ttl, stale_ttl=stale_ttl), calls
+
+def test_concurrent_misses_share_one_fetch():
+    cache, calls = make_cache()
+
+    async def scenario():
+        results = await asyncio.gather(*[cache.get_templates("waba") for _ in range(10)])
+        await cache.get_templates("waba")
+        return results
+
+    results = asyncio.run(scenario())
+    assert all(result == TEMPLATES for result in results)
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+def test_stale_entry_is_served_while_refreshing():
+    cache, calls = make_cache(ttl=0, stale_ttl=60)
+
+    async def scenario():
+        await cache.get_templates("waba")
+        stale = await cache.get_templates("waba")
+        await asyncio.sleep(0.05)
+        return stale
+
+    assert asyncio.run(scenario()) == TEMPLATES
+    assert len(calls) == 2
+    assert cache.stats()["stale_hits"] == 1
+
+def test_validate_checks_parameter_counts():
+    cache, _ = make_cache()
+    components = [
+        {"type": "header", "parameters": [{"type": "image", "image": {"link": "x"}}]},
+        {"type": "body", "parameters": [{"type": "text", "text": "Ana"}]},
+        {"type": "button", "sub_type": "url", "index": "0",
+         "parameters": [{"type": "text", "text": "123"}]}
+    ]
+
+    async def scenario():
+        with pytest.raises(TemplateError, match="body"):
+            await cache.validate("pedido_enviado", "pt_BR", components, key="waba")
+
+        components[1]["parameters"].append({"type": "text", "text": "42"})
+        await cache.validate("pedido_enviado", "pt_BR", components, key="waba")
+
+        with pytest.raises(TemplateError, match="não encontrado"):
+            await cache.validate("inexistente", "pt_BR", key="waba")
+
+    asyncio.run(scenario())
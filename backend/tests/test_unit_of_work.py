@@ -0,0 +1,50 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+
+from app.crud.crud_customer import customer as crud_customer
+from app.database import StatementCounter
+
+class FakeSession:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def execute(self, statement, params=None):
+        self.statements.append(statement)
+
+    def commit(self):
+        self.commits += 1
+
+    def query(self, *entities):
+        raise AssertionError("append_interactions não deve ler os clientes")
+
+def test_counter_tracks_statements_per_scope():
+    engine = create_engine("sqlite://")
+    counter = StatementCounter()
+    counter.attach(engine)
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+    with counter.track() as scope:
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO t VALUES (:x)"), [{"x": 1}, {"x": 2}, {"x": 3}])
+            conn.execute(text("SELECT count(*) FROM t"))
+
+    assert scope == {"statements": 4, "commits": 1}
+    assert counter.stats() == {"statements": 5, "commits": 2}
+
+def test_batch_of_interactions_is_two_statements_and_one_commit():
+    db = FakeSession()
+    interactions = {
+        customer_id: [
+            {"type": "message_received", "content": "oi", "timestamp": "2026-10-17T12:00:00"},
+            {"type": "message_sent", "content": "Olá!", "timestamp": "2026-10-17T12:00:01"}
+        ]
+        for customer_id in range(1, 51)
+    }
+
+    written = crud_customer.append_interactions(db, interactions=interactions)
+
+    assert written == 100 and db.commits == 1 and len(db.statements) == 2
+    update = str(db.statements[1].compile(dialect=postgresql.dialect()))
+    assert "json_to_recordset" in update and "jsonb_array_elements" in update